@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Count, Q
 from .models import User, Department
 
 
@@ -9,9 +10,16 @@ class DepartmentAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     readonly_fields = ['created_at', 'updated_at']
     
+    def get_queryset(self, request):
+        # Counted in the list query rather than once per row
+        return super().get_queryset(request).annotate(
+            active_user_count=Count('users', filter=Q(users__is_active=True))
+        )
+
     def user_count(self, obj):
-        return obj.users.filter(is_active=True).count()
+        return obj.active_user_count
     user_count.short_description = 'Active Users'
+    user_count.admin_order_field = 'active_user_count'
 
 
 @admin.register(User)
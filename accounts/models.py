@@ -1,7 +1,11 @@
+from functools import cached_property
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.urls import reverse
 from django.conf import settings as django_settings
+from .permissions import PermissionContext
 from .settings import ROLE_CHOICES, DEFAULT_ROLE
 
 
@@ -37,6 +41,13 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['first_name', 'last_name']
+        indexes = [
+            # Assignee autocomplete: case-insensitive prefix ranges (tasks.choices.search_users)
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('first_name'), Lower('last_name'), name='user_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+            models.Index(Lower('employee_id'), name='user_employee_id_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.username})"
@@ -56,6 +67,11 @@ class User(AbstractUser):
     def is_employee(self):
         return self.role == 'employee'
 
+    @cached_property
+    def permissions(self):
+        """This user's PermissionContext, built once per loaded instance (i.e. per request)"""
+        return PermissionContext(self)
+
     def can_assign_tasks(self):
         return self.is_admin or self.is_manager
 
@@ -63,7 +79,7 @@ class User(AbstractUser):
         """Check if this user can assign tasks to the given user"""
         if self.is_admin:
             return True
-        if self.is_manager and user.department == self.department:
+        if self.is_manager and user.department_id == self.department_id:
             return True
         return False
 
@@ -71,6 +87,6 @@ class User(AbstractUser):
         """Get users that this user can assign tasks to"""
         if self.is_admin:
             return User.objects.filter(is_active=True)
-        if self.is_manager and self.department:
-            return User.objects.filter(department=self.department, is_active=True)
+        if self.is_manager and self.department_id:
+            return User.objects.filter(department_id=self.department_id, is_active=True)
         return User.objects.none()
\ No newline at end of file
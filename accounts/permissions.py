@@ -0,0 +1,55 @@
+"""
+Request-scoped permission context for users.
+
+A PermissionContext snapshots the role flags and department of a user and
+answers the task permission questions the views, forms and templates ask,
+comparing foreign keys by id so answering never loads a related row.
+Reach it through ``user.permissions``: AuthenticationMiddleware loads
+request.user afresh for every request, so the context lives exactly as long
+as the request does.
+"""
+
+from functools import cached_property
+
+
+class PermissionContext:
+    def __init__(self, user):
+        self._user = user
+        self.user_id = user.pk
+        self.department_id = user.department_id
+        self.is_admin = user.is_admin
+        self.is_manager = user.is_manager
+        self.is_employee = user.is_employee
+        self.can_assign_tasks = self.is_admin or self.is_manager
+
+    @cached_property
+    def managed_users(self):
+        """The users this user can assign tasks to (User.get_managed_users()), built once per request"""
+        return self._user.get_managed_users()
+
+    def can_assign_to(self, user):
+        if self.is_admin:
+            return True
+        return self.is_manager and user.department_id == self.department_id
+
+    def can_view_task(self, task):
+        if self.is_admin:
+            return True
+        if self.is_manager:
+            return task.department_id == self.department_id
+        return task.assigned_to_id == self.user_id
+
+    def can_edit_task(self, task):
+        """Edit or delete: admins, or the manager who created the task in their department"""
+        if self.is_admin:
+            return True
+        return (
+            self.is_manager
+            and task.department_id == self.department_id
+            and task.created_by_id == self.user_id
+        )
+
+    def can_update_status(self, task):
+        if self.is_admin or task.assigned_to_id == self.user_id:
+            return True
+        return self.is_manager and task.department_id == self.department_id
@@ -1,9 +1,13 @@
 from django.test import TestCase, Client
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 from accounts.models import Department, User
 from tasks.models import Task, TaskComment
+from tasks import cache as task_cache
+from asgiref.sync import sync_to_async
+from accounts.views import aget_dashboard_payload, get_dashboard_payload
 
 
 User = get_user_model()
@@ -26,6 +30,23 @@ class DepartmentModelTest(TestCase):
         self.assertEqual(departments[0].name, 'HR Department')
         self.assertEqual(departments[1].name, 'IT Department')
 
+    def test_admin_list_counts_active_users(self):
+        admin = User.objects.create_superuser(username='root', password='testpass123', email='root@example.com')
+        for i in range(6):
+            department = Department.objects.create(name=f'Department {i}')
+            User.objects.create_user(username=f'user{i}', password='testpass123', department=department)
+            User.objects.create_user(
+                username=f'former{i}', password='testpass123', department=department, is_active=False
+            )
+        self.client.force_login(admin)
+        # One count per row would fail here as an N+1 (QueryInstrumentationMiddleware)
+        response = self.client.get('/admin/accounts/department/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {department.name: department.active_user_count for department in response.context['cl'].result_list},
+            {**{f'Department {i}': 1 for i in range(6)}, 'IT Department': 0},
+        )
+
 
 class UserModelTest(TestCase):
     def setUp(self):
@@ -92,6 +113,40 @@ class UserModelTest(TestCase):
         self.assertIn(self.employee, manager_managed)
         self.assertNotIn(self.admin, manager_managed)
 
+    def test_permission_context(self):
+        task = Task.objects.create(
+            title='Owned',
+            description='Permissions',
+            department=self.department,
+            created_by=self.manager,
+            assigned_to=self.employee,
+            due_date=timezone.now() + timedelta(days=1)
+        )
+        other_manager = User.objects.create_user(
+            username='other_manager',
+            password='testpass123',
+            role='manager',
+            department=self.department
+        )
+        # Built once per user instance, without touching related rows
+        self.assertIs(self.manager.permissions, self.manager.permissions)
+        task = Task.objects.get(pk=task.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.admin.permissions.can_edit_task(task))
+            self.assertTrue(self.manager.permissions.can_edit_task(task))
+            self.assertFalse(other_manager.permissions.can_edit_task(task))
+            self.assertTrue(other_manager.permissions.can_update_status(task))
+            self.assertTrue(self.employee.permissions.can_update_status(task))
+            self.assertFalse(self.employee.permissions.can_edit_task(task))
+            self.assertTrue(self.employee.permissions.can_view_task(task))
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                set(self.manager.permissions.managed_users),
+                {self.manager, self.employee, other_manager}
+            )
+            # The same queryset, and its results, for the rest of the request
+            self.assertIn(self.employee, self.manager.permissions.managed_users)
+
 
 class TaskModelTest(TestCase):
     def setUp(self):
@@ -282,3 +337,61 @@ class ViewAccessControlTest(TestCase):
         
         response = self.client.get('/tasks/')
         self.assertEqual(response.status_code, 302)  # Redirect to login
+
+
+class DashboardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name='IT')
+        self.manager = User.objects.create_user(
+            username='manager',
+            password='testpass123',
+            role='manager',
+            department=self.department
+        )
+        self.other_manager = User.objects.create_user(
+            username='other_manager',
+            password='testpass123',
+            role='manager',
+            department=self.department
+        )
+        self.employee = User.objects.create_user(
+            username='employee',
+            password='testpass123',
+            role='employee',
+            department=self.department
+        )
+        self.task = Task.objects.create(
+            title='Test Task',
+            description='Description',
+            created_by=self.manager,
+            assigned_to=self.employee,
+            department=self.department,
+            due_date=timezone.now() + timedelta(days=7)
+        )
+
+    def test_managers_in_department_share_payload(self):
+        payload = get_dashboard_payload(self.manager)
+        self.assertEqual(payload['total_tasks'], 1)
+        self.assertEqual(payload['pending_tasks'], 1)
+        with self.assertNumQueries(0):
+            get_dashboard_payload(self.other_manager)
+        self.assertEqual(task_cache.get_counters(task_cache.DASHBOARD_NAMESPACE), {'hits': 1, 'misses': 1})
+
+    def test_task_change_invalidates_scope(self):
+        self.assertEqual(get_dashboard_payload(self.employee)['completed_tasks'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = 'completed'
+            self.task.save()
+        payload = get_dashboard_payload(self.employee)
+        self.assertEqual(payload['completed_tasks'], 1)
+        self.assertEqual(payload['pending_tasks'], 0)
+
+    async def test_async_payload_shares_the_cache(self):
+        payload = await aget_dashboard_payload(self.manager)
+        self.assertEqual(payload['total_tasks'], 1)
+        self.assertEqual(payload['pending_tasks'], 1)
+        self.assertEqual(payload['overdue_tasks'], 0)
+        self.assertEqual([task.title for task in payload['recent_tasks']], ['Test Task'])
+        self.assertEqual(await sync_to_async(get_dashboard_payload)(self.other_manager), payload)
+        self.assertEqual(task_cache.get_counters(task_cache.DASHBOARD_NAMESPACE), {'hits': 1, 'misses': 1})
@@ -1,8 +1,9 @@
 from django.urls import path
+from tasks.settings import ASYNC_VIEWS
 from . import views
 
 urlpatterns = [
-    path('', views.dashboard, name='dashboard'),
+    path('', views.dashboard_async if ASYNC_VIEWS else views.dashboard, name='dashboard'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('profile/', views.profile_view, name='profile'),
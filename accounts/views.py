@@ -1,11 +1,16 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Q
-from django.utils import timezone
 from .forms import CustomUserCreationForm, CustomAuthenticationForm
-from tasks.models import Task
+from tasks import cache as task_cache
+from tasks.concurrency import async_login_required, gather_queries, get_request_user
+from tasks.models import Task, TaskStats
+from tasks.settings import DASHBOARD_CACHE_TIMEOUT, LIVE_UPDATES
 
 
 def login_view(request):
@@ -33,50 +38,107 @@ def logout_view(request):
     return redirect('login')
 
 
+def get_overdue_count(tasks):
+    return tasks.filter(is_overdue=True).count()
+
+
+def get_task_counts(tasks, counts=None, overdue=None, **stats_filters):
+    """
+    Dashboard counters read from the TaskStats rollup; overdue is counted from the is_overdue flag.
+
+    counts (from TaskStats.get_counts) and overdue may be passed in when
+    they were fetched elsewhere.
+    """
+    if counts is None:
+        counts = TaskStats.get_counts(**stats_filters)
+    if overdue is None:
+        overdue = get_overdue_count(tasks)
+    return {
+        'total_tasks': sum(counts.values()),
+        'completed_tasks': counts.get('completed', 0),
+        'pending_tasks': counts.get('pending', 0),
+        'in_progress_tasks': counts.get('in_progress', 0),
+        'overdue_tasks': overdue,
+    }
+
+
+def get_dashboard_scope(user):
+    """(tasks, TaskStats filters, context name for the recent tasks) for the user's role"""
+    permissions = user.permissions
+    if permissions.is_admin:
+        return Task.objects.all(), {}, 'recent_tasks'
+    elif permissions.is_manager:
+        return (
+            Task.objects.filter(department_id=permissions.department_id),
+            {'department_id': permissions.department_id},
+            'recent_tasks',
+        )
+    return Task.objects.filter(assigned_to_id=permissions.user_id), {'assigned_to_id': permissions.user_id}, 'assigned_tasks'
+
+
+def get_recent_tasks(tasks):
+    return list(tasks.select_related('assigned_to', 'department')[:10])
+
+
+def get_dashboard_payload(user):
+    """
+    Counters and recent tasks for the user's scope.
+
+    Cached per scope (global, department or user) so every user sharing a
+    scope shares one entry; task signals bump the scope version on change.
+    """
+    tasks, stats_filters, recent_key = get_dashboard_scope(user)
+
+    def compute():
+        payload = get_task_counts(tasks, **stats_filters)
+        payload[recent_key] = get_recent_tasks(tasks)
+        return payload
+
+    return task_cache.get_or_compute(
+        task_cache.DASHBOARD_NAMESPACE,
+        task_cache.scope_for_user(user),
+        compute,
+        DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
+async def aget_dashboard_payload(user):
+    """get_dashboard_payload with the stats, overdue and recent tasks queries run concurrently"""
+    tasks, stats_filters, recent_key = get_dashboard_scope(user)
+
+    async def compute():
+        counts, overdue, recent = await gather_queries(
+            partial(TaskStats.get_counts, **stats_filters),
+            partial(get_overdue_count, tasks),
+            partial(get_recent_tasks, tasks),
+        )
+        payload = get_task_counts(tasks, counts, overdue)
+        payload[recent_key] = recent
+        return payload
+
+    return await task_cache.aget_or_compute(
+        task_cache.DASHBOARD_NAMESPACE,
+        task_cache.scope_for_user(user),
+        compute,
+        DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
 @login_required
 def dashboard(request):
     user = request.user
-    context = {}
-    
-    if user.is_admin:
-        # Admin sees all statistics
-        context['total_tasks'] = Task.objects.count()
-        context['completed_tasks'] = Task.objects.filter(status='completed').count()
-        context['pending_tasks'] = Task.objects.filter(status='pending').count()
-        context['in_progress_tasks'] = Task.objects.filter(status='in_progress').count()
-        context['overdue_tasks'] = Task.objects.filter(
-            due_date__lt=timezone.now()
-        ).exclude(status='completed').count()
-        context['recent_tasks'] = Task.objects.select_related('assigned_to', 'department').all()[:10]
-        
-    elif user.is_manager:
-        # Manager sees department statistics
-        dept_tasks = Task.objects.filter(department=user.department)
-        context['total_tasks'] = dept_tasks.count()
-        context['completed_tasks'] = dept_tasks.filter(status='completed').count()
-        context['pending_tasks'] = dept_tasks.filter(status='pending').count()
-        context['in_progress_tasks'] = dept_tasks.filter(status='in_progress').count()
-        context['overdue_tasks'] = dept_tasks.filter(
-            due_date__lt=timezone.now()
-        ).exclude(status='completed').count()
-        context['department_users'] = user.get_managed_users()
-        context['recent_tasks'] = dept_tasks.select_related('assigned_to')[:10]
-        
-    else:
-        # Employee sees their assigned tasks
-        assigned_tasks = Task.objects.filter(assigned_to=user)
-        context['total_tasks'] = assigned_tasks.count()
-        context['completed_tasks'] = assigned_tasks.filter(status='completed').count()
-        context['pending_tasks'] = assigned_tasks.filter(status='pending').count()
-        context['in_progress_tasks'] = assigned_tasks.filter(status='in_progress').count()
-        context['overdue_tasks'] = assigned_tasks.filter(
-            due_date__lt=timezone.now()
-        ).exclude(status='completed').count()
-        context['assigned_tasks'] = assigned_tasks.select_related('department')[:10]
-    
+    context = dict(get_dashboard_payload(user), live_updates=LIVE_UPDATES)
     return render(request, 'accounts/dashboard.html', context)
 
 
+@async_login_required
+async def dashboard_async(request):
+    """dashboard for ASGI deployments"""
+    user = await get_request_user(request)
+    context = dict(await aget_dashboard_payload(user), live_updates=LIVE_UPDATES)
+    return await sync_to_async(render)(request, 'accounts/dashboard.html', context)
+
+
 @login_required
 def profile_view(request):
     return render(request, 'accounts/profile.html', {'user': request.user})
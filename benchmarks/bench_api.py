@@ -0,0 +1,64 @@
+"""
+Benchmark the JSON API against the HTML views it replaces for scripts: payload size and latency.
+
+    python -m benchmarks.bench_api --tasks 20000 --page-size 50
+"""
+
+import argparse
+from unittest import mock
+
+from benchmarks.common import percentile, seed, test_database, timed
+from task_management.urls_configurable import get_task_management_urls
+
+
+# The templates reverse un-namespaced URL names; render them against this URLconf
+urlpatterns = get_task_management_urls()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from django.test import Client
+    from django.test.utils import override_settings
+    from tasks import cache as task_cache
+    from tasks.models import Task
+
+    with test_database(), override_settings(ROOT_URLCONF='benchmarks.bench_api'), \
+            mock.patch('tasks.views.TASK_LIST_PAGE_SIZE', args.page_size):
+        users = seed(tasks=args.tasks)
+        print(f'Seeded {args.tasks} tasks; {args.page_size} rows per page')
+        print(f"{'what':<34} {'role':<8} {'p50 ms':>8} {'p95 ms':>8} {'KiB':>7}")
+        for role, user in (('admin', users['admin']), ('manager', users['managers'][0])):
+            client = Client()
+            client.force_login(user)
+            pk = Task.get_user_tasks(user).order_by('-created_at').values_list('pk', flat=True).first()
+            cases = (
+                ('html list', '/tasks/', {}),
+                ('api list', '/tasks/api/', {'limit': args.page_size}),
+                ('api list ?fields=id,title,status', '/tasks/api/', {
+                    'limit': args.page_size, 'fields': 'id,title,status',
+                }),
+                ('html detail', f'/tasks/{pk}/', {}),
+                ('api detail', f'/tasks/api/{pk}/', {}),
+            )
+            for label, url, params in cases:
+                def run():
+                    # Measure the full render, not the fragment cache or a 304
+                    task_cache.get_cache().clear()
+                    return client.get(url, params)
+
+                response = run()
+                assert response.status_code == 200, (url, response.status_code)
+                _, durations = timed(run, repeat=args.repeat)
+                print(
+                    f'{label:<34} {role:<8} {percentile(durations, 50) * 1000:>8.1f} '
+                    f'{percentile(durations, 95) * 1000:>8.1f} {len(response.content) / 1024:>7.1f}'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Load test the dashboard, task list and task detail under concurrent users, sync (WSGI) vs async (ASGI).
+
+    python -m benchmarks.bench_async --tasks 20000 --users 16 --requests 20
+
+Each simulated user logs in and requests the three pages in turn, as fast
+as it can. The sync views are driven through Django's WSGI handler from a
+thread per user, the async ones through its ASGI handler from one event
+loop, and p50/p99 latency is reported per page. Caching is off, so every
+request reaches the database. SQLite serialises much of the work, so run
+against the production database engine for representative numbers.
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.urls import path
+
+from benchmarks.common import percentile, seed, test_database
+from task_management.urls_configurable import get_task_management_urls
+
+
+def get_urlpatterns():
+    from accounts.views import dashboard_async
+    from tasks.views import task_detail_async, task_list_async
+
+    # The templates reverse un-namespaced URL names; the async views live under async/
+    return get_task_management_urls() + [
+        path('async/', dashboard_async),
+        path('async/tasks/', task_list_async),
+        path('async/tasks/<int:pk>/', task_detail_async),
+    ]
+
+
+urlpatterns = get_urlpatterns()
+
+
+def page_urls(prefix, task_pk):
+    return (
+        ('dashboard', f'{prefix}/'),
+        ('task list', f'{prefix}/tasks/'),
+        ('task detail', f'{prefix}/tasks/{task_pk}/'),
+    )
+
+
+def run_sync(users, task_pks, requests):
+    """Every user in its own thread, through the WSGI handler; returns {page: [seconds, ...]}"""
+    from django.test import Client
+
+    # Log in up front: SQLite's shared in-memory test database does not take concurrent writes
+    clients = {}
+    for user in users:
+        clients[user.pk] = Client()
+        clients[user.pk].force_login(user)
+
+    def user_session(user):
+        client = clients[user.pk]
+        durations = []
+        for _ in range(requests):
+            for page, url in page_urls('', task_pks[user.pk]):
+                started = time.perf_counter()
+                response = client.get(url)
+                durations.append((page, time.perf_counter() - started))
+                assert response.status_code == 200, (url, response.status_code)
+        return durations
+
+    with ThreadPoolExecutor(max_workers=len(users)) as executor:
+        return collect(executor.map(user_session, users))
+
+
+def run_async(users, task_pks, requests):
+    """Every user as a coroutine on one event loop, through the ASGI handler"""
+    from django.test import AsyncClient
+
+    clients = {}
+    for user in users:
+        clients[user.pk] = AsyncClient()
+        clients[user.pk].force_login(user)
+
+    async def user_session(user):
+        client = clients[user.pk]
+        durations = []
+        for _ in range(requests):
+            for page, url in page_urls('/async', task_pks[user.pk]):
+                started = time.perf_counter()
+                response = await client.get(url)
+                durations.append((page, time.perf_counter() - started))
+                assert response.status_code == 200, (url, response.status_code)
+        return durations
+
+    async def main():
+        return await asyncio.gather(*(user_session(user) for user in users))
+
+    return collect(asyncio.run(main()))
+
+
+def collect(per_user):
+    results = {}
+    for durations in per_user:
+        for page, duration in durations:
+            results.setdefault(page, []).append(duration)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=16, help='concurrent users')
+    parser.add_argument('--requests', type=int, default=20, help='rounds of the three pages per user')
+    args = parser.parse_args()
+
+    from django.test.utils import override_settings
+    from tasks.models import Task
+
+    with test_database(), override_settings(ROOT_URLCONF='benchmarks.bench_async'), \
+            mock.patch('accounts.views.DASHBOARD_CACHE_TIMEOUT', 0), \
+            mock.patch('tasks.views.FRAGMENT_CACHE_TIMEOUT', 0):
+        seeded = seed(tasks=args.tasks)
+        # A mix of roles: the admin, then managers and employees alternating
+        pool = [seeded['admin']] + [
+            user for pair in zip(seeded['managers'], seeded['employees']) for user in pair
+        ]
+        users = [pool[i % len(pool)] for i in range(args.users)]
+        task_pks = {
+            user.pk: Task.get_user_tasks(user).order_by('-created_at').values_list('pk', flat=True).first()
+            for user in users
+        }
+        print(f'Seeded {args.tasks} tasks; {args.users} concurrent users, {args.requests} rounds each')
+        print(f"{'mode':<6} {'page':<12} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+        for mode, run in (('wsgi', run_sync), ('asgi', run_async)):
+            started = time.perf_counter()
+            results = run(users, task_pks, args.requests)
+            elapsed = time.perf_counter() - started
+            total = sum(len(durations) for durations in results.values())
+            for page, durations in results.items():
+                print(
+                    f'{mode:<6} {page:<12} {percentile(durations, 50) * 1000:>8.1f} '
+                    f'{percentile(durations, 99) * 1000:>8.1f} {total / elapsed:>8.1f}'
+                )
+
+
+if __name__ == '__main__':
+    main()
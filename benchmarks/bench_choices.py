@@ -0,0 +1,71 @@
+"""
+Benchmark TaskForm's assignee and department widgets and the user search, cold vs cached.
+
+    python -m benchmarks.bench_choices --departments 50 --employees-per-department 200
+"""
+
+import argparse
+
+from benchmarks.common import percentile, seed, test_database, timed
+from task_management.urls_configurable import get_task_management_urls
+
+
+# The forms reverse un-namespaced URL names; render them against this URLconf
+urlpatterns = get_task_management_urls()
+
+
+def render_form(user):
+    from tasks.forms import TaskForm
+
+    # Fresh user object per render, as AuthenticationMiddleware gives each request
+    form = TaskForm(user=type(user).objects.get(pk=user.pk))
+    return str(form['assigned_to']) + str(form['department'])
+
+
+def search(user, term='employee_1'):
+    from tasks.choices import get_user_search_results
+
+    return str(get_user_search_results(type(user).objects.get(pk=user.pk), term))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--departments', type=int, default=50)
+    parser.add_argument('--employees-per-department', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext, override_settings
+    from tasks import cache as task_cache
+
+    with test_database(), override_settings(ROOT_URLCONF='benchmarks.bench_choices'):
+        users = seed(
+            tasks=1000,
+            departments=args.departments,
+            employees_per_department=args.employees_per_department,
+        )
+        print(f'Seeded {args.departments * args.employees_per_department} employees')
+        print(f"{'what':<8} {'role':<8} {'cache':<6} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'KiB':>6}")
+        for what, func in (('form', render_form), ('search', search)):
+            for role, user in (('admin', users['admin']), ('manager', users['managers'][0])):
+                for label, cold in (('cold', True), ('warm', False)):
+                    def run():
+                        if cold:
+                            task_cache.get_cache().clear()
+                        return func(user)
+
+                    func(user)
+                    if cold:
+                        task_cache.get_cache().clear()
+                    with CaptureQueriesContext(connection) as queries:
+                        html = func(user)
+                    _, durations = timed(run, repeat=args.repeat)
+                    print(
+                        f'{what:<8} {role:<8} {label:<6} {percentile(durations, 50) * 1000:>8.1f} '
+                        f'{percentile(durations, 95) * 1000:>8.1f} {len(queries):>8} {len(html) / 1024:>6.1f}'
+                    )
+
+
+if __name__ == '__main__':
+    main()
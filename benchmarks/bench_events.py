@@ -0,0 +1,74 @@
+"""
+Benchmark the live event broker: memory per open stream and fan-out time with many streams.
+
+    python -m benchmarks.bench_events --streams 10000 --departments 50
+
+Streams are subscriptions as task_events opens them (without the HTTP
+side), split between managers of --departments departments; each published
+event goes to one department's managers.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.common import percentile
+
+
+class Viewer:
+    """Stands in for a manager's PermissionContext"""
+
+    def __init__(self, user_id, department_id):
+        self.user_id = user_id
+        self.department_id = department_id
+        self.is_admin = False
+        self.is_manager = True
+
+
+async def run(streams, departments, repeat):
+    from django.utils import timezone
+    from tasks import events
+
+    broker = events.EventBroker()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    subscriptions = [
+        broker.subscribe(Viewer(i, i % departments)) for i in range(streams)
+    ]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{streams} streams: {(after - before) / streams / 1024:.2f} KiB each')
+
+    durations = []
+    for i in range(repeat):
+        department_id = i % departments
+        event = events.task_event(events.TASK_UPDATED, {
+            'id': i, 'title': 'Task', 'status': 'pending', 'priority': 'medium',
+            'department_id': department_id, 'assigned_to_id': None, 'is_overdue': False,
+            'updated_at': timezone.now(),
+        })
+        started = time.perf_counter()
+        broker.publish(event)
+        # Let the loop run the deliveries queued by call_soon_threadsafe()
+        await asyncio.sleep(0)
+        durations.append(time.perf_counter() - started)
+        for subscription in subscriptions[department_id::departments]:
+            subscription.queue.get_nowait()
+    print(
+        f'publish to {streams // departments} of them: p50 {percentile(durations, 50) * 1000:.2f} ms, '
+        f'p95 {percentile(durations, 95) * 1000:.2f} ms'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--streams', type=int, default=10000)
+    parser.add_argument('--departments', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.streams, args.departments, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark the streaming task export: peak RSS and rows/sec per format.
+
+    python -m benchmarks.bench_export --tasks 100000
+"""
+
+import argparse
+import time
+
+from benchmarks.common import current_rss_kb, seed, test_database
+
+
+def run_export(user, export_format):
+    from django.test import RequestFactory
+    from tasks.views import task_export
+
+    request = RequestFactory().get('/tasks/export/', {'format': export_format})
+    request.user = user
+    response = task_export(request)
+
+    rss_before = current_rss_kb()
+    peak_rss = rss_before
+    lines = 0
+    size = 0
+    started = time.perf_counter()
+    for chunk in response.streaming_content:
+        lines += chunk.count(b'\n')
+        size += len(chunk)
+        if lines % 1000 == 0:
+            peak_rss = max(peak_rss, current_rss_kb())
+    elapsed = time.perf_counter() - started
+    peak_rss = max(peak_rss, current_rss_kb())
+    rows = lines - 1 if export_format == 'csv' else lines
+    return rows, size, elapsed, peak_rss - rss_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000, help='Number of tasks to seed')
+    args = parser.parse_args()
+
+    with test_database():
+        users = seed(tasks=args.tasks)
+        print(f'Seeded {args.tasks} tasks')
+        print(f"{'format':<8} {'role':<8} {'rows':>9} {'MiB':>8} {'rows/sec':>10} {'RSS growth KiB':>15}")
+        for role, user in (('admin', users['admin']), ('manager', users['managers'][0])):
+            for export_format in ('csv', 'ndjson'):
+                rows, size, elapsed, rss_growth = run_export(user, export_format)
+                print(
+                    f'{export_format:<8} {role:<8} {rows:>9} {size / 2 ** 20:>8.1f} '
+                    f'{rows / elapsed:>10.0f} {rss_growth:>15}'
+                )
+
+
+if __name__ == '__main__':
+    main()
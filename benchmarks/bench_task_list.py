@@ -0,0 +1,89 @@
+"""
+Benchmark task_list render time on large pages, with and without fragment caching.
+
+    python -m benchmarks.bench_task_list --tasks 5000 --page-size 500
+"""
+
+import argparse
+import copy
+from unittest import mock
+
+from benchmarks.common import percentile, seed, test_database, timed
+from task_management.urls_configurable import get_task_management_urls
+
+
+# The templates reverse un-namespaced URL names; render them against this URLconf
+urlpatterns = get_task_management_urls()
+
+
+def render_list(user):
+    from django.test import RequestFactory
+    from tasks.views import task_list
+
+    request = RequestFactory().get('/tasks/')
+    request.user = type(user).objects.get(pk=user.pk)
+    return task_list(request)
+
+
+def with_loaders(templates, cached):
+    templates = copy.deepcopy(templates)
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    templates[0].pop('APP_DIRS', None)
+    templates[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', loaders)] if cached else loaders
+    return templates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    from django.test.utils import override_settings
+    from tasks import cache as task_cache
+    from tasks.models import Task
+
+    with test_database(), override_settings(ROOT_URLCONF='benchmarks.bench_task_list'):
+        users = seed(tasks=args.tasks)
+        print(f'Seeded {args.tasks} tasks; {args.page_size} rows per page')
+        print(f"{'loader':<9} {'role':<8} {'fragments':<14} {'p50 ms':>8} {'p95 ms':>8}")
+
+        def touch_one_row():
+            # A save bumps updated_at: that row and the table miss, the other rows hit
+            task = Task.objects.order_by('-created_at', '-id').first()
+            Task.objects.filter(pk=task.pk).update(title=task.title)
+            task.save(update_fields=['updated_at'])
+
+        scenarios = (
+            ('off', 0, lambda: None),
+            ('cold', 300, lambda: task_cache.get_cache().clear()),
+            ('one row stale', 300, touch_one_row),
+            ('warm', 300, lambda: None),
+        )
+        for cached_loader in (False, True):
+            loader = 'cached' if cached_loader else 'uncached'
+            with override_settings(TEMPLATES=with_loaders(settings.TEMPLATES, cached_loader)), \
+                    mock.patch('tasks.views.TASK_LIST_PAGE_SIZE', args.page_size):
+                for role, user in (('admin', users['admin']), ('manager', users['managers'][0])):
+                    for label, timeout, prepare in scenarios:
+                        with mock.patch('tasks.views.FRAGMENT_CACHE_TIMEOUT', timeout):
+                            render_list(user)
+
+                            def run():
+                                prepare()
+                                return render_list(user)
+
+                            _, durations = timed(run, repeat=args.repeat)
+                        print(
+                            f'{loader:<9} {role:<8} {label:<14} {percentile(durations, 50) * 1000:>8.1f} '
+                            f'{percentile(durations, 95) * 1000:>8.1f}'
+                        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Shared setup for the benchmark scripts.
+
+Each benchmark runs against a throwaway test database (created the same way
+the test runner does) seeded with synthetic departments, users and tasks, so
+it never touches db.sqlite3. Run them from the project root, e.g.:
+
+    python -m benchmarks.bench_export --tasks 200000
+"""
+
+import contextlib
+import os
+import resource
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_management.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+
+@contextlib.contextmanager
+def test_database():
+    """Create the test databases for the duration of the block"""
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def seed(tasks=10000, departments=10, employees_per_department=20, batch_size=5000):
+    """
+    Insert synthetic data with bulk_create and return the users to benchmark as.
+
+    Returns {'admin': User, 'managers': [User, ...], 'employees': [User, ...]}.
+    """
+    from accounts.models import Department, User
+    from tasks.models import Task
+
+    password = make_password('benchmark')
+    admin = User.objects.create(username='bench_admin', role='admin', password=password)
+    depts = Department.objects.bulk_create(
+        [Department(name=f'Department {i}') for i in range(departments)]
+    )
+    User.objects.bulk_create(
+        [
+            User(username=f'manager_{d.pk}', first_name='Manager', last_name=str(d.pk),
+                 role='manager', department=d, password=password)
+            for d in depts
+        ] + [
+            User(username=f'employee_{d.pk}_{i}', first_name='Employee', last_name=f'{d.pk}-{i}',
+                 role='employee', department=d, employee_id=f'E{d.pk}-{i}', password=password)
+            for d in depts
+            for i in range(employees_per_department)
+        ]
+    )
+    managers = list(User.objects.filter(role='manager').order_by('pk'))
+    employees = list(User.objects.filter(role='employee').order_by('pk'))
+
+    now = timezone.now()
+    statuses = ['pending', 'in_progress', 'completed']
+    priorities = ['low', 'medium', 'high']
+    batch = []
+    for i in range(tasks):
+        employee = employees[i % len(employees)]
+        manager = managers[(employee.department_id - depts[0].pk) % len(managers)]
+        status = statuses[i % len(statuses)]
+        batch.append(Task(
+            title=f'Task {i}',
+            description=f'Synthetic task number {i} for benchmarking the task views',
+            created_by=manager,
+            assigned_to=employee,
+            department_id=employee.department_id,
+            status=status,
+            priority=priorities[i % len(priorities)],
+            due_date=now + timedelta(days=(i % 60) - 20),
+            completed_at=now if status == 'completed' else None,
+        ))
+        if len(batch) >= batch_size:
+            Task.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Task.objects.bulk_create(batch)
+
+    # bulk_create bypasses the TaskStats bookkeeping in Task.save()
+    call_command('rebuild_task_stats', stdout=open(os.devnull, 'w'))
+    return {'admin': admin, 'managers': managers, 'employees': employees}
+
+
+def current_rss_kb():
+    """Resident set size of this process in KiB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def timed(func, repeat=1):
+    """Return (result of the last call, list of durations in seconds)"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+    return result, durations
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
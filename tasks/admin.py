@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Task, TaskComment
+from .models import Job, Task, TaskArchive, TaskComment, TaskEvent
 
 
 class TaskCommentInline(admin.TabularInline):
@@ -50,6 +50,8 @@ class TaskAdmin(admin.ModelAdmin):
 @admin.register(TaskComment)
 class TaskCommentAdmin(admin.ModelAdmin):
     list_display = ['task', 'author', 'short_content', 'created_at']
+    # Rows (and TaskComment.__str__) read both; load them with the list
+    list_select_related = ['task', 'author']
     list_filter = ['created_at', 'task__department']
     search_fields = ['content', 'task__title', 'author__username']
     readonly_fields = ['created_at', 'updated_at']
@@ -57,3 +59,40 @@ class TaskCommentAdmin(admin.ModelAdmin):
     def short_content(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
     short_content.short_description = 'Content'
+
+
+@admin.register(TaskArchive)
+class TaskArchiveAdmin(admin.ModelAdmin):
+    list_display = ['title', 'department', 'assigned_to', 'status', 'priority', 'completed_at', 'archived_at']
+    list_filter = ['department', 'completed_at', 'archived_at']
+    search_fields = ['title', 'description', 'assigned_to__username']
+    date_hierarchy = 'completed_at'
+    
+    # Archived tasks are read-only; they are only ever written by the archive_tasks command
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TaskEvent)
+class TaskEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'type', 'task_id', 'department_id', 'assigned_to_id', 'created_at']
+    list_filter = ['type', 'created_at']
+    search_fields = ['=task_id']
+    
+    # The event log is append-only; events are written alongside the changes they describe
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'queue', 'status', 'attempts', 'run_at', 'locked_by', 'created_at']
+    list_filter = ['status', 'queue']
+    search_fields = ['name']
+    readonly_fields = ['attempts', 'locked_by', 'locked_until', 'last_error', 'created_at']
@@ -0,0 +1,172 @@
+"""
+Read-only JSON API over tasks, for internal tools.
+
+Lists take the same filters as task_list (status, priority, assigned_to,
+search) and are scoped by Task.get_user_tasks. A fields= parameter (e.g.
+?fields=id,title,status) picks the keys returned; rows are fetched with a
+.values() projection of just those columns, so related tables are joined
+only when a field needs them. Lists are paginated by cursor, like the HTML
+views, and responses are encoded without whitespace.
+
+Archived tasks are not served here. The changes feed (task_changes) serves
+the TaskEvent log, for consumers that sync incrementally.
+"""
+
+from functools import wraps
+
+from django.http import JsonResponse
+
+from .models import Task, TaskEvent
+from .pagination import cursor_url, paginate_by_cursor
+from .settings import API_MAX_PAGE_SIZE, API_PAGE_SIZE
+from .views import filter_tasks
+
+
+# (field name, queryset lookup)
+API_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'status': 'status',
+    'priority': 'priority',
+    'department': 'department__name',
+    'department_id': 'department_id',
+    'assigned_to': 'assigned_to__username',
+    'assigned_to_id': 'assigned_to_id',
+    'created_by': 'created_by__username',
+    'created_by_id': 'created_by_id',
+    'due_date': 'due_date',
+    'completed_at': 'completed_at',
+    'is_overdue': 'is_overdue',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={'separators': (',', ':')})
+
+
+def api_view(view):
+    """Answer anonymous requests with a JSON 401 instead of the login redirect, and APIErrors as JSON"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_response({'error': 'Authentication required'}, status=401)
+        try:
+            return view(request, *args, **kwargs)
+        except APIError as e:
+            return api_response({'error': str(e)}, status=e.status)
+    return wrapper
+
+
+def get_fields(request):
+    """The field names asked for with fields=, in order; every field by default"""
+    requested = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+    if not requested:
+        return list(API_FIELDS)
+    unknown = [name for name in requested if name not in API_FIELDS]
+    if unknown:
+        raise APIError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(requested))
+
+
+def get_page_size(request):
+    try:
+        page_size = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        raise APIError('limit must be a number')
+    return max(1, min(page_size, API_MAX_PAGE_SIZE))
+
+
+def project(tasks, fields, *extra):
+    """tasks as .values() dicts holding the lookups for fields, plus pk and any extra columns for the cursor"""
+    return tasks.values(*dict.fromkeys(['pk', *extra, *(API_FIELDS[name] for name in fields)]))
+
+
+def serialize(row, fields):
+    return {name: row[API_FIELDS[name]] for name in fields}
+
+
+@api_view
+def task_list(request):
+    """A page of the tasks the user can see: {'results': [...], 'next': url, 'previous': url}"""
+    fields = get_fields(request)
+    tasks, ordering_field = filter_tasks(request)
+    page = paginate_by_cursor(
+        project(tasks, fields, ordering_field),
+        request.GET.get('cursor'),
+        get_page_size(request),
+        field=ordering_field,
+    )
+    return api_response({
+        'results': [serialize(row, fields) for row in page],
+        'next': request.build_absolute_uri(cursor_url(request, page.next_cursor)) if page.has_next else None,
+        'previous': (
+            request.build_absolute_uri(cursor_url(request, page.previous_cursor)) if page.has_previous else None
+        ),
+    })
+
+
+@api_view
+def task_detail(request, pk):
+    """One task the user can see, or a 404"""
+    fields = get_fields(request)
+    row = project(Task.get_user_tasks(request.user).filter(pk=pk), fields).first()
+    if row is None:
+        raise APIError('Not found', status=404)
+    return api_response(serialize(row, fields))
+
+
+def parse_position(value):
+    """A TaskEvent position from the feed's since: an event id, or "<txid>.<id>" on PostgreSQL"""
+    txid, _, pk = value.rpartition('.')
+    return (int(txid) if txid else None, int(pk))
+
+
+def format_position(position):
+    txid, pk = position
+    return pk if txid is None else f'{txid}.{pk}'
+
+
+@api_view
+def task_changes(request):
+    """
+    The TaskEvents the user can see after since=<position>, in commit order.
+
+    Returns {'results': [...], 'since': position, 'has_more': bool}: pass
+    since back, as it is, to get the next page, and again later to get newer
+    events. Positions are event ids, or "<txid>.<id>" strings on PostgreSQL.
+    A since older than the oldest kept event is answered 410 Gone, as events
+    have been pruned in between; the consumer has to re-read the tasks instead.
+    """
+    since = request.GET.get('since', '0')
+    try:
+        position = parse_position(since)
+    except ValueError:
+        raise APIError('since must be a position returned by the feed')
+    limit = get_page_size(request)
+    if position[1]:
+        oldest = TaskEvent.objects.order_by('pk').values_list('pk', flat=True).first()
+        if oldest is not None and position[1] < oldest - 1:
+            raise APIError('Events after since have been pruned', status=410)
+    rows = list(
+        TaskEvent.after(position, TaskEvent.get_user_events(request.user))
+        .values('id', 'txid', 'type', 'task_id', 'changes', 'created_at')[:limit + 1]
+    )
+    results = rows[:limit]
+    if results:
+        position = (results[-1]['txid'], results[-1]['id'])
+    for row in results:
+        del row['txid']
+    return api_response({
+        'results': results,
+        'since': format_position(position),
+        'has_more': len(rows) > limit,
+    })
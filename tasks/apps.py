@@ -11,6 +11,7 @@ class TasksConfig(AppConfig):
         """Initialize app settings when Django starts."""
         # Import settings module to ensure defaults are set
         from . import settings as app_settings
+        from . import signals  # noqa: F401
         
         # Set default settings if not already configured
         if not hasattr(settings, 'TASK_MANAGEMENT_TASKS'):
@@ -0,0 +1,61 @@
+"""
+Moving completed tasks out of the hot Task table into TaskArchive.
+
+Archiving runs in small batches, each in its own short transaction, so it
+never holds locks on many Task rows at once. Archived tasks keep their
+primary keys and stay counted in TaskStats; only the table they live in
+changes.
+"""
+
+from django.db import transaction
+from django.http import Http404
+
+from . import cache as task_cache
+from .models import Task, TaskArchive, TaskEvent
+from .settings import ALLOW_COMMENTS
+from .signals import skip_task_bookkeeping
+
+if ALLOW_COMMENTS:
+    from .models import TaskArchiveComment, TaskComment
+
+
+def get_archivable_tasks(cutoff):
+    """Completed tasks finished before cutoff, oldest first"""
+    return Task.objects.filter(status='completed', completed_at__lt=cutoff).order_by('completed_at', 'pk')
+
+
+def archive_batch(cutoff, batch_size):
+    """Move up to batch_size tasks completed before cutoff into the archive; return how many moved"""
+    with transaction.atomic():
+        # Rows a concurrent writer holds are left for the next run rather than waited on
+        tasks = list(get_archivable_tasks(cutoff).select_for_update(skip_locked=True)[:batch_size])
+        if not tasks:
+            return 0
+        task_ids = [task.pk for task in tasks]
+
+        TaskArchive.objects.bulk_create([TaskArchive.from_task(task) for task in tasks])
+        if ALLOW_COMMENTS:
+            TaskArchiveComment.objects.bulk_create([
+                TaskArchiveComment.from_comment(comment)
+                for comment in TaskComment.objects.filter(task_id__in=task_ids)
+            ])
+
+        # The tasks are still counted in TaskStats, only the cached pages listing them go stale
+        with skip_task_bookkeeping():
+            Task.objects.filter(pk__in=task_ids).delete()
+        TaskEvent.record(*(TaskEvent.for_task(TaskEvent.ARCHIVED, task) for task in tasks))
+        keys = {task.stats_key for task in tasks}
+        transaction.on_commit(lambda: task_cache.bump_task_scopes(*keys))
+    return len(tasks)
+
+
+def get_task_or_archived(pk):
+    """The live Task with this pk, else its archived copy; raises Http404 if neither exists"""
+    related = ('assigned_to', 'created_by', 'department')
+    task = Task.objects.select_related(*related).filter(pk=pk).first()
+    if task is not None:
+        return task
+    task = TaskArchive.objects.select_related(*related).filter(pk=pk).first()
+    if task is None:
+        raise Http404('No task matches the given query.')
+    return task
@@ -0,0 +1,170 @@
+"""
+Bulk status, priority and reassignment operations on tasks.
+
+The selected tasks are loaded once, checked against the user's permissions
+in memory, and changed with a single set-based UPDATE per operation. Like
+every other write that bypasses Task.save(), this keeps TaskStats, the
+task caches, the TaskEvent log and the live events in step by hand.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cache as task_cache, events
+from .models import Task, TaskEvent, TaskStats
+from .settings import AUTO_COMPLETE_ON_STATUS_CHANGE, BULK_ACTION_MAX_TASKS
+
+
+# Per-task outcomes reported back to the caller
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+INVALID = 'invalid'
+
+# operation -> Task field it writes
+OPERATIONS = {
+    'set_status': 'status',
+    'set_priority': 'priority',
+    'reassign': 'assigned_to_id',
+}
+
+
+class BulkActionError(Exception):
+    """The operation as a whole is invalid; no task was touched"""
+
+
+def get_editable(user, operation):
+    """
+    Return a predicate telling whether user may apply operation to a task row.
+
+    Mirrors the per-task checks in task_update_status (status) and
+    task_update (priority, assignee), evaluated once for the whole set.
+    """
+    permissions = user.permissions
+    if operation == 'set_status':
+        return permissions.can_update_status
+    if not permissions.can_assign_tasks:
+        return None
+    return permissions.can_edit_task
+
+
+def clean_value(operation, value):
+    """Validate a status or priority, raising BulkActionError for unknown choices"""
+    choices = Task.STATUS_CHOICES if operation == 'set_status' else Task.PRIORITY_CHOICES
+    if value not in dict(choices):
+        raise BulkActionError(f'Invalid {OPERATIONS[operation]} {value!r}.')
+    return value
+
+
+def apply_bulk_action(user, task_ids, operation, value):
+    """
+    Apply operation to the tasks in task_ids on behalf of user.
+
+    For reassign, value is the new assignee (a User, or None to unassign).
+    Returns {task_id: outcome}. Raises BulkActionError when the request
+    itself is invalid; missing or forbidden tasks are reported per task.
+    """
+    if operation not in OPERATIONS:
+        raise BulkActionError(f'Unknown operation {operation!r}.')
+    task_ids = list(dict.fromkeys(task_ids))
+    if not task_ids:
+        raise BulkActionError('No tasks selected.')
+    if len(task_ids) > BULK_ACTION_MAX_TASKS:
+        raise BulkActionError(f'At most {BULK_ACTION_MAX_TASKS} tasks can be changed at once.')
+
+    editable = get_editable(user, operation)
+    if editable is None:
+        return {task_id: FORBIDDEN for task_id in task_ids}
+
+    assignee = None
+    if operation == 'reassign':
+        assignee = value
+        if assignee is not None and not user.permissions.can_assign_to(assignee):
+            return {task_id: FORBIDDEN for task_id in task_ids}
+        value = assignee.pk if assignee is not None else None
+    else:
+        value = clean_value(operation, value)
+
+    field = OPERATIONS[operation]
+    outcomes = {task_id: NOT_FOUND for task_id in task_ids}
+    now = timezone.now()
+    with transaction.atomic():
+        # The PermissionContext checks read foreign keys by id, so no related rows are loaded
+        tasks = (
+            Task.objects.filter(pk__in=task_ids)
+            .select_for_update()
+            .only(
+                'title', 'created_by', 'assigned_to', 'department', 'status', 'priority', 'completed_at', 'due_date',
+                'is_overdue',
+            )
+        )
+
+        changed = []
+        for task in tasks:
+            if not editable(task):
+                outcome = FORBIDDEN
+            elif assignee is not None and assignee.department_id != task.department_id:
+                # Same rule as Task.clean(): assignees stay within the task's department
+                outcome = INVALID
+            elif getattr(task, field) == value:
+                outcome = UNCHANGED
+            else:
+                outcome = UPDATED
+                changed.append(task)
+            outcomes[task.pk] = outcome
+
+        if not changed:
+            return outcomes
+
+        updates = {field: value, 'updated_at': now}
+        if operation == 'set_status':
+            # Same rules as Task.save(): completed tasks are never overdue, reopened ones are once past due
+            updates['is_overdue'] = (
+                Value(False) if value == 'completed'
+                else ExpressionWrapper(Q(due_date__lt=now), output_field=BooleanField())
+            )
+        if operation == 'set_status' and AUTO_COMPLETE_ON_STATUS_CHANGE:
+            # Keep an existing completion time, clear it when reopened
+            if value == 'completed':
+                updates['completed_at'] = Coalesce('completed_at', Value(now))
+            else:
+                updates['completed_at'] = None
+        Task.objects.filter(pk__in=[task.pk for task in changed]).update(**updates)
+
+        # QuerySet.update() bypasses Task.save() and its signals, so do their bookkeeping here
+        deltas = Counter()
+        event_type = events.TASK_STATUS if operation == 'set_status' else events.TASK_UPDATED
+        task_events = []
+        outbox = []
+        for task in changed:
+            previous_key = task.stats_key
+            setattr(task, field, value)
+            task.updated_at = now
+            changes = {field: value}
+            if 'is_overdue' in updates:
+                task.is_overdue = changes['is_overdue'] = task.get_overdue(now)
+            if 'completed_at' in updates:
+                task.completed_at = (task.completed_at or now) if value == 'completed' else None
+                changes['completed_at'] = task.completed_at
+            task_events.append(events.task_event(event_type, task, previous_key))
+            outbox.append(TaskEvent.for_task(
+                TaskEvent.STATUS if operation == 'set_status' else TaskEvent.UPDATED, task, previous_key, changes,
+            ))
+            new_key = task.stats_key
+            if previous_key != new_key:
+                deltas[previous_key] -= 1
+                deltas[new_key] += 1
+        for key, delta in deltas.items():
+            if delta:
+                TaskStats.adjust(key, delta)
+        TaskEvent.record(*outbox)
+        keys = {task.stats_key for task in changed} | set(deltas)
+        transaction.on_commit(lambda: task_cache.bump_task_scopes(*keys))
+        events.publish_on_commit(*task_events)
+
+    return outcomes
@@ -0,0 +1,165 @@
+"""
+Versioned cache helpers for the tasks app.
+
+Every cached value lives under a key that embeds the current version of its
+scope (e.g. a department). Bumping that version from a signal makes all the
+scope's entries unreachable at once, without having to track or delete keys;
+stale entries simply expire.
+"""
+
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+from .settings import CACHE_ALIAS, CACHE_KEY_PREFIX
+
+
+GLOBAL_SCOPE = 'all'
+
+DASHBOARD_NAMESPACE = 'dashboard'
+CHOICES_NAMESPACE = 'choices'
+
+# Namespaces whose entries are derived from Task rows and must follow task changes
+TASK_NAMESPACES = (DASHBOARD_NAMESPACE,)
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def department_scope(department_id):
+    return f'department:{department_id}'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def scope_for_user(user):
+    """The widest scope a user can see: everything, their department, or their own tasks"""
+    if user.is_admin:
+        return GLOBAL_SCOPE
+    if user.is_manager:
+        return department_scope(user.department_id)
+    return user_scope(user.pk)
+
+
+def scopes_for_task_key(key):
+    """Scopes affected by a change to a task in the (department_id, assigned_to_id, status) bucket"""
+    if key is None:
+        return set()
+    department_id, assigned_to_id, _ = key
+    scopes = {department_scope(department_id)}
+    if assigned_to_id is not None:
+        scopes.add(user_scope(assigned_to_id))
+    return scopes
+
+
+def _version_key(namespace, scope):
+    return f'{CACHE_KEY_PREFIX}:version:{namespace}:{scope}'
+
+
+def _counter_key(namespace, name):
+    return f'{CACHE_KEY_PREFIX}:counter:{namespace}:{name}'
+
+
+def _incr(key, initial=1):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing key: add() is atomic, so only one concurrent caller wins
+        if cache.add(key, initial, None):
+            return initial
+        return cache.incr(key)
+
+
+def get_version(namespace, scope):
+    return get_cache().get_or_set(_version_key(namespace, scope), 1, None)
+
+
+def bump_versions(namespace, scopes):
+    """Invalidate every entry cached for the given scopes"""
+    for scope in scopes:
+        # A missing version reads as 1, so a bump must land past it
+        _incr(_version_key(namespace, scope), initial=2)
+
+
+def bump_task_scopes(*keys):
+    """Invalidate task-derived entries for the global scope and the scopes of the given task buckets"""
+    scopes = {GLOBAL_SCOPE}
+    for key in keys:
+        scopes |= scopes_for_task_key(key)
+    for namespace in TASK_NAMESPACES:
+        bump_versions(namespace, scopes)
+
+
+def bump_choice_scopes(*department_ids):
+    """Invalidate the cached choice lists of the global scope and the given departments"""
+    scopes = {GLOBAL_SCOPE}
+    scopes |= {department_scope(department_id) for department_id in department_ids if department_id}
+    bump_versions(CHOICES_NAMESPACE, scopes)
+
+
+def make_key(namespace, scope, *parts):
+    version = get_version(namespace, scope)
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{CACHE_KEY_PREFIX}:{namespace}:{scope}:v{version}:{suffix}'
+
+
+def get_or_compute(namespace, scope, compute, timeout, *parts):
+    """Return the cached value for (namespace, scope, parts), computing and storing it on a miss"""
+    cache = get_cache()
+    key = make_key(namespace, scope, *parts)
+    value = cache.get(key)
+    if value is not None:
+        _incr(_counter_key(namespace, 'hits'))
+        return value
+    _incr(_counter_key(namespace, 'misses'))
+    value = compute()
+    cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_compute(namespace, scope, compute, timeout, *parts):
+    """get_or_compute for async views; compute is a coroutine function"""
+    cache = get_cache()
+    key = await sync_to_async(make_key)(namespace, scope, *parts)
+    value = await cache.aget(key)
+    if value is not None:
+        await sync_to_async(_incr)(_counter_key(namespace, 'hits'))
+        return value
+    await sync_to_async(_incr)(_counter_key(namespace, 'misses'))
+    value = await compute()
+    await cache.aset(key, value, timeout)
+    return value
+
+
+def task_row_key(task, *parts):
+    """
+    Vary-on value for a cached task list row: the row's model, id and updated_at, plus parts.
+
+    parts carries whatever else the row's HTML depends on (the viewer's
+    permissions, whether the task is overdue, ...); updated_at changes on
+    every save, so an edit never shows a stale row.
+    """
+    return ':'.join(str(part) for part in (task._meta.model_name, task.pk, task.updated_at.isoformat(), *parts))
+
+
+def digest(*parts):
+    """A short, cache-safe stand-in for an arbitrarily long key"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def get_counters(namespace):
+    """Return {'hits': n, 'misses': n} for a namespace"""
+    cache = get_cache()
+    return {
+        name: cache.get(_counter_key(namespace, name), 0)
+        for name in ('hits', 'misses')
+    }
+
+
+def reset_counters(namespace):
+    get_cache().delete_many([_counter_key(namespace, name) for name in ('hits', 'misses')])
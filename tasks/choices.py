@@ -0,0 +1,152 @@
+"""
+Choice lists and assignee lookups for the task forms.
+
+The department list is small and is cached whole, per scope (every
+department for admins, one department for managers), in the versioned task
+cache. Users are too many to list, so the assignee and "Assigned To" widgets
+are text boxes backed by a prefix search instead; its results are cached
+briefly under the same scopes. User and Department signals bump the
+affected scopes, so an edit shows up on the next render instead of after a
+timeout.
+"""
+
+import hashlib
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from accounts.models import Department
+
+from . import cache as task_cache
+from .settings import (
+    AUTOCOMPLETE_CACHE_TIMEOUT,
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_MIN_LENGTH,
+    CHOICES_CACHE_TIMEOUT,
+)
+
+
+# Which users a search looks through: anyone the user manages, or only the employees tasks go to
+ASSIGNEES = 'assignees'
+USERS = 'users'
+SEARCH_KINDS = (ASSIGNEES, USERS)
+
+# Matched by prefix, case-insensitively, through the Lower() indexes on User
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'employee_id')
+
+# Sorts after every character, closing the range of strings that start with a prefix
+PREFIX_END = '\U0010ffff'
+
+
+def choices_scope(permissions):
+    """Admins pick from everyone; managers (and anyone else) from their own department"""
+    if permissions.is_admin:
+        return task_cache.GLOBAL_SCOPE
+    return task_cache.department_scope(permissions.department_id)
+
+
+def get_cached_choices(permissions, name, compute, timeout=CHOICES_CACHE_TIMEOUT):
+    if not (permissions.is_admin or permissions.department_id):
+        return []
+    return task_cache.get_or_compute(
+        task_cache.CHOICES_NAMESPACE,
+        choices_scope(permissions),
+        compute,
+        timeout,
+        name,
+    )
+
+
+def get_department_choices(permissions):
+    """(id, name) of the departments a user can create tasks in"""
+    def compute():
+        departments = Department.objects.all()
+        if not permissions.is_admin:
+            departments = departments.filter(pk=permissions.department_id)
+        return list(departments.values_list('pk', 'name'))
+    return get_cached_choices(permissions, 'departments', compute)
+
+
+def searchable_users(user, kind=ASSIGNEES):
+    """The users a user may pick: their managed users, narrowed to employees for assignment"""
+    users = user.permissions.managed_users
+    if kind == ASSIGNEES:
+        users = users.filter(role='employee')
+    return users
+
+
+def prefix_range(field, prefix):
+    return Q(**{f'{field}_lower__gte': prefix, f'{field}_lower__lt': prefix + PREFIX_END})
+
+
+def search_users(users, term):
+    """
+    Narrow users to those with a username, first name, last name or employee ID starting with term.
+
+    "Ann Sm" also matches first name "Ann..." with last name "Sm...". Each
+    prefix is a range on a Lower() expression rather than a LIKE, so every
+    database can answer it from the expression indexes.
+    """
+    term = ' '.join(term.lower().split())
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= prefix_range(field, term)
+    first, _, last = term.partition(' ')
+    if last:
+        condition |= Q(first_name_lower=first) & prefix_range('last_name', last)
+    return users.alias(**{f'{field}_lower': Lower(field) for field in SEARCH_FIELDS}).filter(condition)
+
+
+def user_label(user):
+    return user.get_full_name() or user.username
+
+
+def get_user_search_results(user, term, kind=ASSIGNEES):
+    """
+    Up to AUTOCOMPLETE_LIMIT matches for term as {'results': [...], 'more': bool}.
+
+    Each result is {'id', 'value', 'label'}; value is the username, which is
+    what the widgets submit. Terms shorter than AUTOCOMPLETE_MIN_LENGTH match
+    nothing, without a query.
+    """
+    term = ' '.join(term.split())
+    permissions = user.permissions
+    if len(term) < AUTOCOMPLETE_MIN_LENGTH or not (permissions.is_admin or permissions.department_id):
+        return {'results': [], 'more': False}
+
+    def compute():
+        users = search_users(searchable_users(user, kind), term).only(
+            'pk', 'username', 'first_name', 'last_name'
+        )
+        rows = list(users[:AUTOCOMPLETE_LIMIT + 1])
+        return {
+            'results': [
+                {'id': row.pk, 'value': row.username, 'label': user_label(row)}
+                for row in rows[:AUTOCOMPLETE_LIMIT]
+            ],
+            'more': len(rows) > AUTOCOMPLETE_LIMIT,
+        }
+
+    # Terms are user input; hash them into a cache-safe key
+    digest = hashlib.sha1(term.lower().encode()).hexdigest()
+    return get_cached_choices(permissions, f'search:{kind}:{digest}', compute, AUTOCOMPLETE_CACHE_TIMEOUT)
+
+
+def lookup_user(users, value):
+    """
+    The user in users named by value: a username or employee ID (case-insensitive), or an id.
+
+    This is what the assignee text boxes submit when JavaScript is off;
+    returns None when nothing, or more than one user, matches.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    lowered = value.lower()
+    matches = list(
+        users.alias(username_lower=Lower('username'), employee_id_lower=Lower('employee_id'))
+        .filter(Q(username_lower=lowered) | Q(employee_id_lower=lowered))[:2]
+    )
+    if not matches and value.isdigit():
+        matches = list(users.filter(pk=value)[:2])
+    return matches[0] if len(matches) == 1 else None
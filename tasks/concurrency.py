@@ -0,0 +1,80 @@
+"""
+Helpers for the async views (used instead of the sync ones when ASYNC_VIEWS is on).
+
+Django's own async ORM methods (aget(), acount(), ...) run every query of a
+request on one thread, and so one connection, in turn. gather_queries()
+runs independent pieces of ORM work on separate worker threads instead;
+each thread has its own connection, so under an ASGI server the queries
+overlap rather than queue.
+"""
+
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+from .middleware import record_on_this_thread
+from .settings import CONCURRENT_QUERIES
+
+
+def on_own_connection(func):
+    """
+    func for a worker thread: the thread's connection is checked before and after
+    the call, as Django does around each request, so CONN_MAX_AGE is honoured. Its
+    queries count towards the request's in QueryInstrumentationMiddleware.
+    """
+    @wraps(func)
+    def wrapper():
+        close_old_connections()
+        try:
+            with record_on_this_thread():
+                return func()
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+def in_transaction(using=DEFAULT_DB_ALIAS):
+    return connections[using].in_atomic_block
+
+
+def release_connections():
+    """Close this thread's database connections, e.g. before a long-lived response; kept inside a transaction"""
+    if not in_transaction():
+        connections.close_all()
+
+
+async def gather_queries(*funcs):
+    """
+    Call each of funcs (no arguments, sync ORM code) and return their results in order.
+
+    They run concurrently, each on its own connection, unless the request's
+    connection is inside a transaction: other connections would not see its
+    uncommitted writes, so then they run one after another on it.
+    """
+    if not CONCURRENT_QUERIES or await sync_to_async(in_transaction)():
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(
+        sync_to_async(on_own_connection(func), thread_sensitive=False)() for func in funcs
+    ))
+
+
+async def get_request_user(request):
+    """request.user, loaded (from the session) off the event loop"""
+    def load():
+        request.user.is_authenticated  # Evaluates the lazy object
+        return request.user
+    return await sync_to_async(load)()
+
+
+def async_login_required(view):
+    """login_required for async views"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await get_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
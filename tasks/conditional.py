@@ -0,0 +1,156 @@
+"""
+Conditional GET for the task pages.
+
+Each page gets an ETag and a Last-Modified computed from a few aggregate
+queries that covering indexes answer on their own (the "conditional GET"
+indexes on Task and TaskComment), so a browser tab refreshing an unchanged
+page gets a 304 without the page queries or the render. The ETag is the
+real validator: browsers send If-None-Match along with If-Modified-Since,
+and then the latter is ignored, since a max(updated_at) does not move when
+a task is deleted.
+
+A page also depends on things outside the task rows: who is looking (their
+role decides columns and buttons), user and department names (the choice
+cache version), the CSRF secret embedded in its forms and any pending flash
+messages. The ETag covers the first three; pages with messages are never
+answered with a 304, so the messages are shown and consumed.
+"""
+
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.db.models import Count, Max, Q
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import cache as task_cache
+from .models import Task, TaskArchive, TaskArchiveComment, TaskComment
+
+
+def page_validators(func):
+    """
+    Wrap func(request, *args, **kwargs) -> (etag_parts, last_modified) or None as a view decorator.
+
+    func runs once per request; None (e.g. for POSTs or pages that cannot be
+    validated cheaply) skips the conditional handling and renders normally.
+    The pages are per-user, so they are marked private and revalidated on
+    every use. Wraps sync and async views alike.
+    """
+    def get(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            validators = None
+            if request.method in ('GET', 'HEAD') and not len(messages.get_messages(request)):
+                validators = func(request, *args, **kwargs)
+            request._page_validators = validators
+        return request._page_validators
+
+    def etag(request, *args, **kwargs):
+        validators = get(request, *args, **kwargs)
+        if validators is None:
+            return None
+        parts, _ = validators
+        return task_cache.digest(*viewer_parts(request), *parts)
+
+    def last_modified(request, *args, **kwargs):
+        validators = get(request, *args, **kwargs)
+        return validators[1] if validators else None
+
+    def decorator(view):
+        if not asyncio.iscoroutinefunction(view):
+            return wraps(view)(cache_control(private=True, no_cache=True)(
+                condition(etag_func=etag, last_modified_func=last_modified)(view)
+            ))
+
+        # condition() and cache_control() only wrap sync views before Django 5.0; this is what they do
+        def validate(request, *args, **kwargs):
+            etag_value = etag(request, *args, **kwargs)
+            modified = last_modified(request, *args, **kwargs)
+            return (
+                quote_etag(etag_value) if etag_value is not None else None,
+                int(modified.timestamp()) if modified else None,
+            )
+
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag_value, modified = await sync_to_async(validate)(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag_value, last_modified=modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(modified)
+                if etag_value:
+                    response.headers.setdefault('ETag', etag_value)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def viewer_parts(request):
+    """What every page depends on besides its tasks"""
+    permissions = request.user.permissions
+    # Make sure the CSRF secret exists now, so a first visit's ETag matches the cookie it is sent
+    get_token(request)
+    return (
+        permissions.user_id,
+        permissions.is_admin,
+        permissions.is_manager,
+        permissions.department_id,
+        task_cache.get_version(task_cache.CHOICES_NAMESPACE, task_cache.GLOBAL_SCOPE),
+        request.META.get('CSRF_COOKIE'),
+        timezone.get_current_timezone_name(),
+    )
+
+
+def task_set_validators(tasks, *parts):
+    """
+    Validators for a page listing tasks: their count, latest updated_at and overdue count.
+
+    The count catches deletions and tasks leaving the scope, updated_at any
+    edit, and the overdue count tasks the sweeper flags as their due date
+    passes, which changes the page without a save.
+    """
+    stats = tasks.order_by().aggregate(
+        count=Count('pk'),
+        last_modified=Max('updated_at'),
+        overdue=Count('pk', filter=Q(is_overdue=True)),
+    )
+    return (*parts, stats['count'], stats['last_modified'], stats['overdue']), stats['last_modified']
+
+
+def task_detail_validators(request, pk):
+    """Validators for task_detail: the task's updated_at and its comments' count and latest created_at"""
+    fields = ('updated_at', 'due_date', 'department_id', 'assigned_to_id', 'created_by_id')
+    task = Task.objects.filter(pk=pk).values(*fields, 'is_overdue').first()
+    model, comment_model = Task, TaskComment
+    if task is None:
+        task = TaskArchive.objects.filter(pk=pk).values(*fields).first()
+        model, comment_model = TaskArchive, TaskArchiveComment
+    if task is None:
+        # Let the view answer with its 404
+        return None
+
+    visible = Task(pk=pk, **{name: task[name] for name in fields if name.endswith('_id')})
+    if not request.user.permissions.can_view_task(visible):
+        # ... or its 403
+        return None
+
+    comments = comment_model.objects.filter(task_id=pk).aggregate(
+        count=Count('pk'), latest=Max('created_at'),
+    )
+    due_date = task['due_date']
+    now = timezone.now()
+    last_modified = max(filter(None, (task['updated_at'], comments['latest'])))
+    parts = (
+        'detail', model._meta.model_name, pk, task['updated_at'], comments['count'], comments['latest'],
+        # The overdue flag is set by the sweeper; the days remaining change with time alone
+        task.get('is_overdue', False), (due_date - now).days,
+    )
+    return parts, last_modified
@@ -0,0 +1,295 @@
+"""
+Live task events for the event stream (the task_events view).
+
+Task and TaskComment signals publish an event to an in-process broker once
+their transaction commits; each open stream is a subscription holding a
+small asyncio queue and the viewer's scope, and only receives the events
+its viewer could see. A stream holds no database connection and does no
+polling of its own, so a worker can keep thousands open.
+
+With several worker processes a signal only reaches the streams of its own
+process. Setting EVENT_STREAM_POLL_INTERVAL switches every process to one
+shared poller instead, which reads tasks and comments changed since its
+last look and publishes those; deletions are not seen by the poller.
+"""
+
+import asyncio
+import itertools
+import threading
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Task
+from .settings import (
+    ALLOW_COMMENTS,
+    EVENT_QUEUE_SIZE,
+    EVENT_REPLAY_SIZE,
+    EVENT_STREAM_POLL_INTERVAL,
+)
+
+if ALLOW_COMMENTS:
+    from .models import TaskComment
+
+
+TASK_CREATED = 'task.created'
+TASK_UPDATED = 'task.updated'
+TASK_STATUS = 'task.status'
+TASK_DELETED = 'task.deleted'
+COMMENT_CREATED = 'comment.created'
+# Without a poller, Task and TaskComment signals publish the events
+PUBLISH_FROM_SIGNALS = not EVENT_STREAM_POLL_INTERVAL
+
+# Sent instead of the events a slow subscriber's full queue could not take; clients reload
+RESET = 'reset'
+
+# How long browsers wait before reconnecting a closed stream, in milliseconds
+RETRY_MS = 3000
+
+TASK_EVENT_FIELDS = (
+    'id', 'title', 'status', 'priority', 'department_id', 'assigned_to_id', 'is_overdue', 'updated_at',
+)
+
+
+def task_event(event_type, task, previous_key=None, **extra):
+    """
+    An event about task (a Task, or a dict of TASK_EVENT_FIELDS).
+
+    previous_key is the task's (department_id, assigned_to_id, status)
+    before the change; viewers of the old department or assignee are told
+    too, so a task moving out of their scope leaves their pages.
+    """
+    if not isinstance(task, dict):
+        task = {name: getattr(task, name) for name in TASK_EVENT_FIELDS}
+    department_ids = {task['department_id']}
+    user_ids = {task['assigned_to_id']}
+    if previous_key:
+        department_ids.add(previous_key[0])
+        user_ids.add(previous_key[1])
+    return {
+        'type': event_type,
+        'task': task,
+        **extra,
+        'scope': (frozenset(department_ids - {None}), frozenset(user_ids - {None})),
+    }
+
+
+def visible_to(permissions, event):
+    """Whether the viewer with this PermissionContext may see event (as Task.get_user_tasks would)"""
+    if event['type'] == RESET or permissions.is_admin:
+        return True
+    department_ids, user_ids = event['scope']
+    if permissions.is_manager:
+        return permissions.department_id in department_ids
+    return permissions.user_id in user_ids
+
+
+def client_data(event):
+    """event as sent to browsers: without its scope"""
+    return {name: value for name, value in event.items() if name not in ('id', 'scope')}
+
+
+class Subscription:
+    """One open stream: the viewer's permissions and a queue owned by the stream's event loop"""
+
+    def __init__(self, permissions, loop):
+        self.permissions = permissions
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    def put(self, event):
+        # Runs on self.loop
+        if self.queue.full():
+            # The client is not keeping up: drop what it has not read and have it reload instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'id': event['id'], 'type': RESET}
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+def deliver(subscriptions, event):
+    # Runs on the subscriptions' event loop
+    for subscription in subscriptions:
+        subscription.put(event)
+
+
+class EventBroker:
+    """
+    Fans published events out to the subscriptions allowed to see them.
+
+    Subscriptions are indexed by what they may see (everything, a
+    department or their own tasks), so publishing an event only touches its
+    recipients. publish() may be called from any thread; each event loop
+    with recipients is handed the event once, with call_soon_threadsafe().
+    The last EVENT_REPLAY_SIZE events are kept so a reconnecting stream can
+    resume from its Last-Event-ID.
+    """
+
+    def __init__(self):
+        self.subscriptions = set()
+        self.admins = set()
+        self.by_department = defaultdict(set)
+        self.by_user = defaultdict(set)
+        self.recent = deque(maxlen=EVENT_REPLAY_SIZE)
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.poller = None
+
+    def get_index(self, permissions):
+        if permissions.is_admin:
+            return self.admins, None
+        if permissions.is_manager:
+            return self.by_department, permissions.department_id
+        return self.by_user, permissions.user_id
+
+    def subscribe(self, permissions, last_event_id=None):
+        """A new Subscription for the running event loop, primed with the events after last_event_id"""
+        subscription = Subscription(permissions, asyncio.get_running_loop())
+        index, key = self.get_index(permissions)
+        with self.lock:
+            self.subscriptions.add(subscription)
+            (index if key is None else index[key]).add(subscription)
+            missed = self.get_missed(last_event_id)
+        for event in missed:
+            if visible_to(permissions, event):
+                subscription.put(event)
+        if EVENT_STREAM_POLL_INTERVAL:
+            self.start_poller()
+        return subscription
+
+    def get_missed(self, last_event_id):
+        """The kept events after last_event_id, or a RESET when they are not all kept"""
+        if last_event_id is None:
+            return []
+        newest = self.recent[-1]['id'] if self.recent else 0
+        if last_event_id == newest:
+            return []
+        if last_event_id > newest or self.recent[0]['id'] > last_event_id + 1:
+            # From another process (or before a restart), or older than anything kept
+            return [{'id': newest, 'type': RESET}]
+        return [event for event in self.recent if event['id'] > last_event_id]
+
+    def unsubscribe(self, subscription):
+        index, key = self.get_index(subscription.permissions)
+        with self.lock:
+            self.subscriptions.discard(subscription)
+            if key is None:
+                index.discard(subscription)
+            elif key in index:
+                index[key].discard(subscription)
+                if not index[key]:
+                    del index[key]
+
+    def get_recipients(self, event):
+        department_ids, user_ids = event['scope']
+        recipients = list(self.admins)
+        for department_id in department_ids:
+            recipients += self.by_department.get(department_id, ())
+        for user_id in user_ids:
+            recipients += self.by_user.get(user_id, ())
+        return recipients
+
+    def publish(self, event):
+        with self.lock:
+            event = {'id': next(self.ids), **event}
+            self.recent.append(event)
+            by_loop = defaultdict(list)
+            for subscription in self.get_recipients(event):
+                by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver, subscriptions, event)
+            except RuntimeError:
+                # The loop has closed; its streams are gone
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+        return event
+
+    def start_poller(self):
+        loop = asyncio.get_running_loop()
+        if self.poller is None or self.poller.done() or self.poller.get_loop() is not loop:
+            self.poller = loop.create_task(self.poll())
+
+    async def poll(self):
+        """Publish the changes ChangePoller finds while anyone is subscribed"""
+        poller = ChangePoller()
+        while self.subscriptions:
+            await asyncio.sleep(EVENT_STREAM_POLL_INTERVAL)
+            for event in await sync_to_async(poller.poll, thread_sensitive=False)():
+                self.publish(event)
+
+
+broker = EventBroker()
+
+
+def publish_on_commit(*events):
+    """Publish events once the current transaction commits, unless the poller publishes changes instead"""
+    if not PUBLISH_FROM_SIGNALS or not events:
+        return
+    transaction.on_commit(lambda: [broker.publish(event) for event in events])
+
+
+class ChangePoller:
+    """
+    Finds tasks and comments changed since the previous poll, for multi-process deployments.
+
+    Each poll looks back an extra EVENT_STREAM_POLL_INTERVAL, so a
+    transaction that committed late, with an older updated_at, is still
+    seen; rows already reported are remembered and skipped.
+    """
+
+    def __init__(self):
+        self.since = timezone.now()
+        self.seen = {}
+
+    def poll(self):
+        close_old_connections()
+        try:
+            return self.find_changes()
+        finally:
+            close_old_connections()
+
+    def find_changes(self):
+        now = timezone.now()
+        since = self.since - timedelta(seconds=EVENT_STREAM_POLL_INTERVAL)
+        events = []
+        tasks = Task.objects.filter(updated_at__gt=since).order_by('updated_at').values(
+            *TASK_EVENT_FIELDS, 'created_at'
+        )
+        for task in tasks:
+            key = ('task', task['id'], task['updated_at'])
+            if key in self.seen:
+                continue
+            # New since the last look, unless already reported as created within the window
+            created = task.pop('created_at') > since and ('task', task['id']) not in self.seen
+            self.seen[key] = self.seen[('task', task['id'])] = task['updated_at']
+            events.append(task_event(TASK_CREATED if created else TASK_UPDATED, task))
+        if ALLOW_COMMENTS:
+            comments = TaskComment.objects.filter(created_at__gt=since).order_by('created_at').values(
+                'id', 'created_at', *(f'task__{name}' for name in TASK_EVENT_FIELDS)
+            )
+            for comment in comments:
+                key = ('comment', comment['id'], comment['created_at'])
+                if key in self.seen:
+                    continue
+                self.seen[key] = comment['created_at']
+                task = {name: comment[f'task__{name}'] for name in TASK_EVENT_FIELDS}
+                events.append(task_event(COMMENT_CREATED, task, comment_id=comment['id']))
+        # Only rows inside the next look-back window can be seen again
+        self.since = now
+        horizon = now - timedelta(seconds=EVENT_STREAM_POLL_INTERVAL)
+        self.seen = {key: at for key, at in self.seen.items() if at > horizon}
+        return events
+
+
+def format_event(event):
+    """event in text/event-stream framing"""
+    data = DjangoJSONEncoder(separators=(',', ':')).encode(client_data(event))
+    return f"id: {event['id']}\ndata: {data}\n\n"
@@ -1,10 +1,64 @@
 from django import forms
+from django.urls import reverse
 from django.utils import timezone
+from .choices import ASSIGNEES, get_department_choices, lookup_user
 from .models import Task, TaskComment
 from accounts.models import User, Department
 
 
+class UserAutocompleteInput(forms.TextInput):
+    """
+    A text box for a username or employee ID.
+
+    With JavaScript on, base.html fills the attached <datalist> from the user
+    search endpoint as the user types; without it, the typed name is looked
+    up on submit.
+    """
+    template_name = 'tasks/widgets/user_autocomplete.html'
+
+    def __init__(self, attrs=None, kind=ASSIGNEES):
+        self.kind = kind
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        widget_attrs = context['widget']['attrs']
+        widget_attrs['list'] = f"{widget_attrs.get('id', name)}-options"
+        widget_attrs['autocomplete'] = 'off'
+        widget_attrs['data-autocomplete-url'] = f"{reverse('task-user-search')}?kind={self.kind}"
+        widget_attrs.setdefault('placeholder', 'Username or employee ID')
+        return context
+
+
+class UserLookupField(forms.ModelChoiceField):
+    """A user from the queryset, named by username, employee ID or id instead of picked from a list"""
+    widget = UserAutocompleteInput
+
+    def prepare_value(self, value):
+        if hasattr(value, '_meta'):
+            return value.username
+        # A ModelForm's initial value is the id; submitted values are strings and shown as typed
+        if isinstance(value, int):
+            return User.objects.filter(pk=value).values_list('username', flat=True).first() or value
+        return value
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        user = lookup_user(self.queryset, str(value))
+        if user is None:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return user
+
+
 class TaskForm(forms.ModelForm):
+    assigned_to = UserLookupField(
+        queryset=User.objects.all(),
+        required=False,
+        label='Assigned to',
+        widget=UserAutocompleteInput(attrs={'class': 'form-control'}),
+    )
+
     class Meta:
         model = Task
         fields = ['title', 'description', 'department', 'assigned_to', 'priority', 'due_date']
@@ -12,7 +66,6 @@ class TaskForm(forms.ModelForm):
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
             'department': forms.Select(attrs={'class': 'form-control'}),
-            'assigned_to': forms.Select(attrs={'class': 'form-control'}),
             'priority': forms.Select(attrs={'class': 'form-control'}),
             'due_date': forms.DateTimeInput(
                 attrs={'class': 'form-control', 'type': 'datetime-local'},
@@ -25,25 +78,32 @@ class TaskForm(forms.ModelForm):
         self.user = user
         
         if user:
+            permissions = user.permissions
+            
             # Filter departments based on user role
-            if user.is_manager:
-                self.fields['department'].queryset = Department.objects.filter(id=user.department_id)
-                self.fields['department'].initial = user.department
-            elif user.is_admin:
+            if permissions.is_manager:
+                self.fields['department'].queryset = Department.objects.filter(id=permissions.department_id)
+                self.fields['department'].initial = permissions.department_id
+            elif permissions.is_admin:
                 self.fields['department'].queryset = Department.objects.all()
             
             # Filter assignable users based on department
-            if user.is_manager and user.department:
+            if permissions.is_manager and permissions.department_id:
                 self.fields['assigned_to'].queryset = User.objects.filter(
-                    department=user.department,
+                    department_id=permissions.department_id,
                     role='employee',
                     is_active=True
                 )
-            elif user.is_admin:
+            elif permissions.is_admin:
                 self.fields['assigned_to'].queryset = User.objects.filter(
                     role='employee',
                     is_active=True
                 )
+            
+            # The queryset above only validates the submitted id; the options come from the cache
+            if permissions.can_assign_tasks:
+                field = self.fields['department']
+                field.choices = [('', field.empty_label), *get_department_choices(permissions)]
 
     def clean_due_date(self):
         due_date = self.cleaned_data.get('due_date')
@@ -58,14 +118,14 @@ class TaskForm(forms.ModelForm):
         
         # Validate that assigned user is in the selected department
         if assigned_to and department:
-            if assigned_to.department != department:
+            if assigned_to.department_id != department.pk:
                 raise forms.ValidationError(
                     'The assigned user must belong to the selected department.'
                 )
         
         # Validate user permissions
-        if self.user and not self.user.is_admin:
-            if department and self.user.department != department:
+        if self.user and not self.user.permissions.is_admin:
+            if department and self.user.permissions.department_id != department.pk:
                 raise forms.ValidationError(
                     'You can only create tasks in your own department.'
                 )
@@ -93,3 +153,55 @@ class TaskCommentForm(forms.ModelForm):
                 'placeholder': 'Add a comment...'
             }),
         }
+
+
+class TaskBulkActionForm(forms.Form):
+    OPERATION_CHOICES = [
+        ('set_status', 'Set status'),
+        ('set_priority', 'Set priority'),
+        ('reassign', 'Reassign'),
+    ]
+
+    task_ids = forms.Field(widget=forms.MultipleHiddenInput)
+    operation = forms.ChoiceField(choices=OPERATION_CHOICES)
+    status = forms.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = forms.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    assigned_to = UserLookupField(queryset=User.objects.none(), required=False)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        
+        # Same assignee choices as TaskForm; reassigning across departments is rejected per task
+        permissions = user.permissions if user else None
+        if permissions and permissions.is_admin:
+            self.fields['assigned_to'].queryset = User.objects.filter(role='employee', is_active=True)
+        elif permissions and permissions.is_manager:
+            self.fields['assigned_to'].queryset = User.objects.filter(
+                department_id=permissions.department_id,
+                role='employee',
+                is_active=True
+            )
+
+    def clean_task_ids(self):
+        # Accept repeated task_ids fields as well as a single comma-separated value
+        values = self.cleaned_data.get('task_ids') or []
+        if isinstance(values, str):
+            values = [values]
+        try:
+            return [int(task_id) for value in values for task_id in value.split(',') if task_id.strip()]
+        except ValueError:
+            raise forms.ValidationError('Task ids must be integers.')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        operation = cleaned_data.get('operation')
+        for required_operation, field in (('set_status', 'status'), ('set_priority', 'priority')):
+            if operation == required_operation and not cleaned_data.get(field) and field not in self.errors:
+                self.add_error(field, 'This field is required for this operation.')
+        return cleaned_data
+
+    def get_value(self):
+        """The value to apply for the selected operation"""
+        field = {'set_status': 'status', 'set_priority': 'priority', 'reassign': 'assigned_to'}
+        return self.cleaned_data[field[self.cleaned_data['operation']]]
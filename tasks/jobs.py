@@ -0,0 +1,239 @@
+"""
+Background jobs, stored in the database (the Job model) and run by the run_workers command.
+
+Register a function with the job decorator, then queue calls to it from a
+request (inside its transaction, if any: the job only becomes visible once
+that commits):
+
+    @job(queue='exports', timeout=600)
+    def build_report(user_id):
+        ...
+
+    build_report.enqueue({'user_id': request.user.pk})
+
+Keyword arguments are stored as JSON. Workers poll for due jobs and claim
+one at a time. Where the database supports SKIP LOCKED (PostgreSQL),
+workers lock the row they take and pass over rows other workers hold;
+elsewhere (SQLite) a conditional UPDATE claims the job only if it is still
+queued. A failed job is retried after JOB_RETRY_DELAY seconds, doubling
+per attempt, until max_attempts; a job still running when its lease ends
+is assumed lost with its worker and queued again. Jobs can therefore run
+more than once and should be safe to repeat.
+
+JOB_QUEUES can cap how many jobs of a queue run at once across all
+workers. The cap is exact on PostgreSQL (claims on a capped queue take an
+advisory lock) and on SQLite (writes are serialised).
+"""
+
+import logging
+import os
+import signal
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import Count, F, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+from .settings import JOB_MAX_RETRY_DELAY, JOB_POLL_INTERVAL, JOB_QUEUES, JOB_RETRY_DELAY
+
+logger = logging.getLogger(__name__)
+
+
+# Job name -> function, filled in by the job decorator
+registry = {}
+
+
+def job(func=None, *, queue=None, max_attempts=None, timeout=None):
+    """Register func as a job, callable later through func.enqueue(kwargs) or enqueue(func, kwargs)"""
+    def register(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        func.job_options = {
+            name: value
+            for name, value in (('queue', queue), ('max_attempts', max_attempts), ('timeout', timeout))
+            if value is not None
+        }
+        func.enqueue = lambda kwargs=None, **options: enqueue(func, kwargs, **options)
+        registry[func.job_name] = func
+        return func
+    return register(func) if func is not None else register
+
+
+def enqueue(func, kwargs=None, *, queue=None, delay=None):
+    """Queue a call to the job func with kwargs, to run now or after delay (seconds or a timedelta)"""
+    if getattr(func, 'job_name', None) not in registry:
+        raise ValueError(f'{func!r} is not registered with @job')
+    options = dict(func.job_options)
+    if queue is not None:
+        options['queue'] = queue
+    if delay is not None:
+        if not isinstance(delay, timedelta):
+            delay = timedelta(seconds=delay)
+        options['run_at'] = timezone.now() + delay
+    return Job.objects.create(name=func.job_name, kwargs=kwargs or {}, **options)
+
+
+def get_job_function(name):
+    """The registered function for a job name, importing its module if needed; None if there is none"""
+    if name not in registry:
+        try:
+            import_string(name)
+        except ImportError:
+            return None
+    return registry.get(name)
+
+
+def get_retry_delay(attempts):
+    return timedelta(seconds=min(JOB_RETRY_DELAY * 2 ** (attempts - 1), JOB_MAX_RETRY_DELAY))
+
+
+def requeue_expired(now=None):
+    """Queue again the running jobs whose lease has run out, or fail those out of attempts"""
+    now = now or timezone.now()
+    expired = Job.objects.filter(status=Job.RUNNING, locked_until__lt=now)
+    released = {'locked_by': '', 'locked_until': None, 'last_error': 'Lease expired'}
+    requeued = expired.filter(attempts__lt=F('max_attempts')).update(status=Job.QUEUED, run_at=now, **released)
+    failed = expired.update(status=Job.FAILED, **released)
+    return requeued + failed
+
+
+def get_due_queues(queues=None, now=None):
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now or timezone.now())
+    if queues:
+        due = due.filter(queue__in=queues)
+    return list(due.order_by().values_list('queue', flat=True).distinct())
+
+
+def get_running(queue, now):
+    return Job.objects.filter(queue=queue, status=Job.RUNNING, locked_until__gte=now)
+
+
+def claim(worker, queues=None):
+    """Claim the oldest due job of queues (every queue by default) for worker; None if there is none"""
+    now = timezone.now()
+    for queue in get_due_queues(queues, now):
+        job = claim_from(queue, worker, now)
+        if job is not None:
+            return job
+    return None
+
+
+def claim_from(queue, worker, now):
+    limit = JOB_QUEUES.get(queue, {}).get('concurrency')
+    token = f'{worker}:{uuid.uuid4().hex[:8]}'
+    due = Job.objects.filter(queue=queue, status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'pk')
+    connection = connections[router.db_for_write(Job)]
+
+    def lease(job_id, timeout):
+        return Job.objects.filter(pk=job_id, status=Job.QUEUED), {
+            'status': Job.RUNNING,
+            'attempts': F('attempts') + 1,
+            'locked_by': token,
+            'locked_until': now + timedelta(seconds=timeout),
+        }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=connection.alias):
+            if limit is not None:
+                if connection.vendor == 'postgresql':
+                    # Serialise claims on this queue until the transaction ends, so the count stays true
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f'tasks.jobs:{queue}'])
+                if get_running(queue, now).count() >= limit:
+                    return None
+            row = due.select_for_update(skip_locked=True).values_list('pk', 'timeout').first()
+            if row is None:
+                return None
+            claimed, updates = lease(*row)
+            claimed.update(**updates)
+    else:
+        # Try the first few due jobs; another worker may take each between the read and the UPDATE
+        for row in due.values_list('pk', 'timeout')[:5]:
+            claimed, updates = lease(*row)
+            if limit is not None:
+                # Counted in the UPDATE itself, which SQLite runs alone
+                running = get_running(queue, now).order_by().values('queue').annotate(count=Count('pk'))
+                claimed = claimed.filter(LessThan(Coalesce(Subquery(running.values('count')), 0), limit))
+            if claimed.update(**updates):
+                break
+        else:
+            return None
+    return Job.objects.filter(locked_by=token).first()
+
+
+def finish(job, error=None):
+    """Record the outcome of running a claimed job, unless its lease was lost to another worker meanwhile"""
+    owned = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+    if error is None:
+        return owned.delete()[0] > 0
+    released = {'locked_by': '', 'locked_until': None, 'last_error': error}
+    if job.attempts < job.max_attempts:
+        updated = owned.update(status=Job.QUEUED, run_at=timezone.now() + get_retry_delay(job.attempts), **released)
+    else:
+        updated = owned.update(status=Job.FAILED, **released)
+    return updated > 0
+
+
+def execute(job):
+    """Run a claimed job and record its outcome"""
+    func = get_job_function(job.name)
+    if func is None:
+        job.max_attempts = job.attempts  # Retrying cannot help
+        return finish(job, f'Unknown job {job.name!r}')
+    try:
+        func(**job.kwargs)
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %d', job.pk, job.name, job.attempts)
+        return finish(job, traceback.format_exc())
+    return finish(job)
+
+
+class Worker:
+    """Claims and runs jobs one at a time until stopped (or, in burst mode, until none are due)"""
+
+    def __init__(self, queues=None, name=None):
+        self.queues = queues
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def run_once(self):
+        """Run one due job; return whether there was one"""
+        close_old_connections()
+        requeue_expired()
+        job = claim(self.name, self.queues)
+        if job is None:
+            return False
+        execute(job)
+        return True
+
+    def run(self, burst=False, poll_interval=JOB_POLL_INTERVAL):
+        """Run jobs; return how many ran"""
+        count = 0
+        while not self.stopping:
+            if self.run_once():
+                count += 1
+            elif burst:
+                break
+            else:
+                time.sleep(poll_interval)
+        return count
+
+
+def run_worker_process(queues, burst, poll_interval):
+    """Entry point of each process started by run_workers"""
+    import django
+    django.setup()
+    worker = Worker(queues)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run(burst=burst, poll_interval=poll_interval)
@@ -0,0 +1,72 @@
+"""
+Management command to move old completed tasks into the archive table.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.archive import archive_batch, get_archivable_tasks
+from tasks.settings import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Move tasks completed more than N days ago from the Task table to TaskArchive, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=ARCHIVE_AFTER_DAYS,
+            help=f'Archive tasks completed more than this many days ago (default: {ARCHIVE_AFTER_DAYS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help=f'Tasks moved per transaction (default: {ARCHIVE_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches to leave room for other writers (default: 0)',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches (default: run until nothing is left)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many tasks would be archived',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = max(1, options['batch_size'])
+
+        if options['dry_run']:
+            count = get_archivable_tasks(cutoff).count()
+            self.stdout.write(f'{count} task(s) completed before {cutoff:%Y-%m-%d %H:%M} would be archived')
+            return
+
+        archived = batches = 0
+        started = time.monotonic()
+        while options['max_batches'] is None or batches < options['max_batches']:
+            moved = archive_batch(cutoff, batch_size)
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+            self.stdout.write(f'Batch {batches}: {moved} task(s) archived ({archived} total)')
+            if options['sleep'] and moved == batch_size:
+                time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {archived} task(s) archived in {batches} batch(es), {elapsed:.1f}s'
+        ))
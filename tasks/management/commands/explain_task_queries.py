@@ -0,0 +1,180 @@
+"""
+Management command to EXPLAIN the hot task queries and flag full table scans.
+"""
+
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from accounts.models import Department, User
+from tasks.models import Task, TaskStats
+from tasks.overdue import get_due_tasks
+from tasks.settings import OVERDUE_SWEEP_BATCH_SIZE, TASK_LIST_PAGE_SIZE
+
+
+# Plan lines that indicate the whole table is read row by row
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(?P<table>\w+)$'),
+    'postgresql': re.compile(r'\bSeq Scan on (?P<table>\w+)'),
+}
+
+# Plan lines that indicate an explicit sort step
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    'postgresql': re.compile(r'^\s*(?:->\s*)?Sort\b'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN for the task list and dashboard queries and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--department',
+            type=int,
+            help='Department id used for manager-scoped queries (default: first department)',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='User id used for employee-scoped queries (default: first user with assigned tasks)',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Refresh planner statistics (ANALYZE) before explaining',
+        )
+        parser.add_argument(
+            '--no-seqscan',
+            action='store_true',
+            help='PostgreSQL only: discourage sequential scans to check an index is usable on small tables',
+        )
+        parser.add_argument(
+            '--fail-on-scan',
+            action='store_true',
+            help='Exit with an error if any full table scan is found',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Print the full plan for every query',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        scan_pattern = FULL_SCAN_PATTERNS.get(vendor)
+        sort_pattern = SORT_PATTERNS.get(vendor)
+        if scan_pattern is None:
+            self.stdout.write(self.style.WARNING(
+                f'Plan analysis is not supported on {vendor}; plans will be printed without checks.'
+            ))
+            options['verbose'] = True
+
+        department_id = options['department'] or self.default_department_id()
+        user_id = options['user'] or self.default_user_id()
+        watched_tables = {Task._meta.db_table}
+
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        full_scans = []
+        with transaction.atomic():
+            if options['no_seqscan'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset in self.get_view_queries(department_id, user_id):
+                plan = queryset.explain()
+                scanned = set()
+                sorted_ = False
+                for line in plan.splitlines():
+                    if scan_pattern:
+                        match = scan_pattern.search(line.strip())
+                        if match and match.group('table') in watched_tables:
+                            scanned.add(match.group('table'))
+                    if sort_pattern and sort_pattern.search(line):
+                        sorted_ = True
+
+                if scanned:
+                    full_scans.append(label)
+                    self.stdout.write(self.style.ERROR(f'❌ {label}: full scan on {", ".join(sorted(scanned))}'))
+                elif sorted_:
+                    self.stdout.write(self.style.WARNING(f'⚠️  {label}: uses an index but sorts in memory'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'✅ {label}'))
+
+                if options['verbose'] or scanned:
+                    for line in plan.splitlines():
+                        self.stdout.write(f'      {line}')
+
+        if full_scans:
+            message = f'{len(full_scans)} query(ies) fall back to a full table scan'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No full table scans found'))
+
+    def default_department_id(self):
+        return Department.objects.values_list('id', flat=True).first() or 0
+
+    def default_user_id(self):
+        return (
+            Task.objects.filter(assigned_to__isnull=False)
+            .values_list('assigned_to_id', flat=True)
+            .first()
+            or User.objects.values_list('id', flat=True).first()
+            or 0
+        )
+
+    def get_view_queries(self, department_id, user_id):
+        """
+        Build querysets with the same shape as the ones issued by the views.
+
+        Count queries are explained without ordering, like QuerySet.count() does.
+        """
+        now = timezone.now()
+        all_tasks = Task.objects.all()
+        dept_tasks = Task.objects.filter(department_id=department_id)
+        user_tasks = Task.objects.filter(assigned_to_id=user_id)
+
+        def keyset_page(queryset):
+            # Same shape as tasks.pagination.paginate_by_cursor past the first page
+            return (
+                queryset.filter(created_at__lte=now)
+                .filter(Q(created_at__lt=now) | Q(pk__lt=2 ** 31))
+                .order_by('-created_at', '-pk')[:TASK_LIST_PAGE_SIZE + 1]
+            )
+
+        queries = [
+            ('task_list (admin)', keyset_page(all_tasks.select_related('assigned_to', 'department', 'created_by'))),
+            ('task_list (manager)', keyset_page(dept_tasks.select_related('assigned_to', 'created_by'))),
+            ('task_list (manager, status filter)', keyset_page(dept_tasks.filter(status='pending'))),
+            ('task_list (employee)', keyset_page(user_tasks.select_related('department', 'created_by'))),
+            ('task_list (employee, status filter)', keyset_page(user_tasks.filter(status='pending'))),
+            ('task_list (admin, overdue only)', keyset_page(all_tasks.filter(is_overdue=True))),
+            ('task_list (manager, overdue only)', keyset_page(dept_tasks.filter(is_overdue=True))),
+            ('task_list (employee, overdue only)', keyset_page(user_tasks.filter(is_overdue=True))),
+            ('my_tasks', keyset_page(user_tasks.select_related('department', 'created_by'))),
+            ('sweep_overdue_tasks', get_due_tasks(now).order_by('due_date', 'pk')[:OVERDUE_SWEEP_BATCH_SIZE]),
+        ]
+
+        # Same shapes as accounts.views.get_dashboard_payload. TaskStats holds a row per
+        # (department, assignee, status) bucket, so scans of it are not flagged
+        dashboards = (
+            ('admin', all_tasks, {}, 'recent tasks'),
+            ('manager', dept_tasks, {'department_id': department_id}, 'recent tasks'),
+            ('employee', user_tasks, {'assigned_to_id': user_id}, 'assigned tasks'),
+        )
+        for role, scoped, stats_filters, recent in dashboards:
+            counts = TaskStats.objects.filter(**stats_filters).values('status').annotate(total=Sum('count'))
+            queries += [
+                (f'dashboard {role}: TaskStats counts', counts.order_by()),
+                (f'dashboard {role}: overdue count', scoped.filter(is_overdue=True).order_by()),
+                (f'dashboard {role}: {recent}', scoped.select_related('assigned_to', 'department')[:10]),
+            ]
+        return queries
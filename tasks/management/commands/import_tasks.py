@@ -0,0 +1,213 @@
+"""
+Management command to bulk import tasks from CSV or NDJSON.
+"""
+
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Department, User
+from tasks import cache as task_cache
+from tasks.models import Task, TaskEvent, TaskStats
+from tasks.settings import AUTO_COMPLETE_ON_STATUS_CHANGE, DEFAULT_PRIORITY, DEFAULT_STATUS
+
+
+# Related fields resolved from the lookup maps; clean_fields() would query the DB for them
+RELATED_FIELDS = ['department', 'assigned_to', 'created_by']
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import tasks from a CSV or NDJSON file. Columns: title, description, department '
+        '(name or id), created_by and assigned_to (username or employee_id), status, priority, '
+        'due_date (ISO 8601).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin")
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='Input format (default: guessed from the file extension, csv for stdin)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows validated and inserted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--errors',
+            help='File receiving rejected rows as NDJSON (default: <path>.errors.ndjson)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate every row without inserting anything',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        batch_size = max(1, options['batch_size'])
+        errors_path = options['errors'] or ('import_errors.ndjson' if path == '-' else f'{path}.errors.ndjson')
+
+        self.load_lookups()
+
+        source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        imported = rejected = 0
+        started = time.monotonic()
+        try:
+            with source, open(errors_path, 'w', encoding='utf-8') as errors_file:
+                rows = self.read_rows(source, input_format)
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    tasks, failures = self.validate_batch(batch)
+                    for failure in failures:
+                        errors_file.write(json.dumps(failure, default=str) + '\n')
+                    if tasks and not options['dry_run']:
+                        self.insert_batch(tasks)
+
+                    imported += len(tasks)
+                    rejected += len(failures)
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f'{imported + rejected} rows processed, {imported} valid, {rejected} rejected '
+                        f'({(imported + rejected) / elapsed:.0f} rows/sec)'
+                    )
+        except OSError as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+        action = 'validated' if options['dry_run'] else 'imported'
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{imported} task(s) {action} in {elapsed:.1f}s ({imported / elapsed if elapsed else 0:.0f} tasks/sec)'
+        ))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f'{rejected} row(s) rejected, see {errors_path}'))
+
+    def load_lookups(self):
+        """Build the department and user lookup maps once, up front"""
+        self.departments = {}
+        for pk, name in Department.objects.values_list('pk', 'name'):
+            self.departments[name] = pk
+            self.departments[str(pk)] = pk
+
+        # Only what clean() and can_assign_to_user() look at, so validating never queries
+        self.users = {}
+        for user in User.objects.only('pk', 'username', 'employee_id', 'role', 'is_superuser', 'department_id'):
+            self.users[user.username] = user
+            if user.employee_id:
+                self.users[user.employee_id] = user
+
+    def read_rows(self, source, input_format):
+        """Yield (line_number, row) pairs without reading the whole input"""
+        if input_format == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, {'__error__': f'Invalid JSON: {e}'}
+                    continue
+                if not isinstance(row, dict):
+                    row = {'__error__': f'Expected a JSON object, got {type(row).__name__}.'}
+                yield line_number, row
+
+    def validate_batch(self, batch):
+        """Return (tasks, failures) for a batch, applying the same rules as Task.clean()"""
+        tasks = []
+        failures = []
+        now = timezone.now()
+        for line_number, row in batch:
+            try:
+                task = self.build_task(row, now)
+                task.clean_fields(exclude=RELATED_FIELDS)
+                task.clean()
+            except ValidationError as e:
+                errors = e.message_dict if hasattr(e, 'error_dict') else {'__all__': e.messages}
+                failures.append({'line': line_number, 'row': row, 'errors': errors})
+            else:
+                tasks.append(task)
+        return tasks, failures
+
+    def build_task(self, row, now):
+        if '__error__' in row:
+            raise ValidationError(row['__error__'])
+
+        errors = {}
+        department_id = self.departments.get(str(row.get('department', '')).strip())
+        if department_id is None:
+            errors['department'] = f"Unknown department {row.get('department')!r}."
+        created_by = self.users.get(str(row.get('created_by', '')).strip())
+        if created_by is None:
+            errors['created_by'] = f"Unknown user {row.get('created_by')!r}."
+        assigned_to = None
+        if row.get('assigned_to'):
+            assigned_to = self.users.get(str(row['assigned_to']).strip())
+            if assigned_to is None:
+                errors['assigned_to'] = f"Unknown user {row['assigned_to']!r}."
+        due_date = None
+        try:
+            due_date = parse_datetime(str(row.get('due_date', '')).strip())
+        except ValueError:
+            pass
+        if due_date is None:
+            errors['due_date'] = 'Enter a valid ISO 8601 date/time.'
+        elif timezone.is_naive(due_date):
+            due_date = timezone.make_aware(due_date)
+        if errors:
+            raise ValidationError(errors)
+
+        task = Task(
+            title=row.get('title') or '',
+            description=row.get('description') or '',
+            department_id=department_id,
+            created_by=created_by,
+            assigned_to=assigned_to,
+            status=row.get('status') or DEFAULT_STATUS,
+            priority=row.get('priority') or DEFAULT_PRIORITY,
+            due_date=due_date,
+        )
+        if AUTO_COMPLETE_ON_STATUS_CHANGE and task.status == 'completed':
+            task.completed_at = now
+        task.is_overdue = task.get_overdue(now)
+        return task
+
+    def insert_batch(self, tasks):
+        """Insert a batch, its TaskEvents and the matching TaskStats deltas in one transaction"""
+        using = router.db_for_write(Task)
+        if not connections[using].features.can_return_rows_from_bulk_insert:
+            # bulk_create would leave the primary keys the TaskEvents need unset: save() each
+            # task instead, which does the same bookkeeping one task at a time
+            with transaction.atomic(using=using):
+                for task in tasks:
+                    task.save(using=using)
+            return
+
+        # bulk_create bypasses Task.save() and its signals, so do their bookkeeping here
+        deltas = Counter(task.stats_key for task in tasks)
+        with transaction.atomic(using=using):
+            Task.objects.using(using).bulk_create(tasks)
+            TaskEvent.record(*(
+                TaskEvent.for_task(TaskEvent.CREATED, task, changes=TaskEvent.get_changes(task)) for task in tasks
+            ), using=using)
+            for key, count in deltas.items():
+                TaskStats.adjust(key, count)
+            transaction.on_commit(lambda: task_cache.bump_task_scopes(*deltas))
@@ -0,0 +1,55 @@
+"""
+Management command to delete old events from the TaskEvent log.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.models import TaskEvent
+from tasks.settings import TASK_EVENT_PRUNE_BATCH_SIZE, TASK_EVENT_RETENTION_DAYS
+
+
+class Command(BaseCommand):
+    help = 'Delete TaskEvents older than N days, oldest first, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=TASK_EVENT_RETENTION_DAYS,
+            help=f'Delete events older than this many days (default: {TASK_EVENT_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TASK_EVENT_PRUNE_BATCH_SIZE,
+            help=f'Events deleted per transaction (default: {TASK_EVENT_PRUNE_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many events would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = max(1, options['batch_size'])
+        # Ids grow with created_at, so the old events are the first ones by id
+        old_events = TaskEvent.objects.filter(created_at__lt=cutoff).order_by('pk')
+
+        if options['dry_run']:
+            count = old_events.count()
+            self.stdout.write(f'{count} event(s) from before {cutoff:%Y-%m-%d %H:%M} would be deleted')
+            return
+
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                ids = list(old_events.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                deleted += TaskEvent.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'✅ {deleted} event(s) deleted'))
@@ -0,0 +1,92 @@
+"""
+Management command to recompute the TaskStats rollup and detect drift.
+"""
+
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from accounts.models import Department
+from tasks.models import Task, TaskArchive, TaskStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the TaskStats rollup from the Task and TaskArchive tables in batches and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Number of departments recomputed per transaction (default: 50)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, do not modify TaskStats; exit with an error if drift is found',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        department_ids = list(Department.objects.order_by('pk').values_list('pk', flat=True))
+
+        drifted = 0
+        for start in range(0, len(department_ids), batch_size):
+            batch = department_ids[start:start + batch_size]
+            with transaction.atomic():
+                drifted += self.rebuild_batch(batch, fix=not options['check'])
+
+        if drifted and options['check']:
+            raise CommandError(f'{drifted} TaskStats bucket(s) have drifted from the Task table')
+
+        if drifted:
+            self.stdout.write(self.style.WARNING(f'Repaired {drifted} drifted bucket(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('TaskStats is in sync with the Task table'))
+
+    def rebuild_batch(self, department_ids, fix):
+        """Compare and optionally repair the buckets of a batch of departments"""
+        # Lock the existing buckets first so concurrent Task.save() calls wait for us
+        stored = {
+            (stat.department_id, stat.assigned_to_id, stat.status): stat
+            for stat in TaskStats.objects.select_for_update().filter(department_id__in=department_ids)
+        }
+        # Archived tasks stay counted in TaskStats
+        actual = Counter()
+        for model in (Task, TaskArchive):
+            for row in (
+                model.objects.filter(department_id__in=department_ids)
+                .values('department_id', 'assigned_to_id', 'status')
+                .annotate(total=Count('id'))
+                .order_by()
+            ):
+                actual[row['department_id'], row['assigned_to_id'], row['status']] += row['total']
+
+        drifted = 0
+        for key in stored.keys() | actual.keys():
+            expected = actual.get(key, 0)
+            stat = stored.get(key)
+            current = stat.count if stat else 0
+            if current == expected:
+                continue
+
+            drifted += 1
+            self.stdout.write(self.style.WARNING(
+                f'  department={key[0]} assigned_to={key[1]} status={key[2]}: '
+                f'stored {current}, actual {expected}'
+            ))
+            if not fix:
+                continue
+            if stat is None:
+                TaskStats.objects.create(
+                    department_id=key[0], assigned_to_id=key[1], status=key[2], count=expected
+                )
+            elif expected == 0:
+                stat.delete()
+            else:
+                stat.count = expected
+                stat.save(update_fields=['count'])
+
+        return drifted
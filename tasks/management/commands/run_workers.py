@@ -0,0 +1,79 @@
+"""
+Management command to run background job workers (see tasks.jobs).
+"""
+
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.jobs import Worker, run_worker_process
+from tasks.settings import JOB_POLL_INTERVAL
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers, each in its own process, until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Worker processes to start (default: 1, run in this process)',
+        )
+        parser.add_argument(
+            '--queues',
+            help='Comma-separated queues to take jobs from (default: all)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=JOB_POLL_INTERVAL,
+            help=f'Seconds an idle worker waits before looking for jobs again (default: {JOB_POLL_INTERVAL})',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once no job is due instead of waiting for more',
+        )
+
+    def handle(self, *args, **options):
+        queues = [name.strip() for name in (options['queues'] or '').split(',') if name.strip()] or None
+        processes = max(1, options['processes'])
+
+        if processes == 1:
+            worker = Worker(queues)
+            signal.signal(signal.SIGTERM, worker.stop)
+            count = worker.run(burst=options['burst'], poll_interval=options['poll_interval'])
+            self.stdout.write(self.style.SUCCESS(f'✅ {count} job(s) run'))
+            return
+
+        # Children open their own connections
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker_process,
+                args=(queues, options['burst'], options['poll_interval']),
+                name=f'job-worker-{i}',
+            )
+            for i in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f'Started {processes} worker process(es)')
+
+        def stop(*args):
+            # Workers finish the job in hand, then exit
+            for process in workers:
+                if process.is_alive():
+                    process.terminate()
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for process in workers:
+                process.join()
+        except KeyboardInterrupt:
+            # The terminal sent SIGINT to the workers too
+            for process in workers:
+                process.join()
+        self.stdout.write(self.style.SUCCESS('✅ Workers stopped'))
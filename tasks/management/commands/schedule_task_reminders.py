@@ -0,0 +1,50 @@
+"""
+Management command (the reminder scheduler) to fire due-date reminders for open tasks.
+"""
+
+from django.core.management.base import BaseCommand
+
+from tasks.reminders import ReminderScheduler
+from tasks.settings import REMINDER_HOURS, REMINDER_LOOKAHEAD, REMINDER_POLL_INTERVAL
+
+
+class Command(BaseCommand):
+    help = 'Fire reminders the configured hours before open tasks fall due (runs until interrupted)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            nargs='+',
+            default=REMINDER_HOURS,
+            help=f'Hours before the due date to remind at (default: {REMINDER_HOURS})',
+        )
+        parser.add_argument(
+            '--lookahead',
+            type=int,
+            default=REMINDER_LOOKAHEAD,
+            help=f'Minutes of upcoming reminders held in memory (default: {REMINDER_LOOKAHEAD})',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=REMINDER_POLL_INTERVAL,
+            help=f'Seconds between reads of task changes (default: {REMINDER_POLL_INTERVAL})',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Fire the reminders due now and exit',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(hours=options['hours'], lookahead=max(1, options['lookahead']))
+        if options['once']:
+            fired = scheduler.tick()
+            self.stdout.write(self.style.SUCCESS(f'✅ {fired} reminder(s) fired'))
+            return
+        self.stdout.write(f"Reminding {', '.join(map(str, scheduler.hours))} hour(s) before due dates")
+        try:
+            scheduler.run(poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('✅ Reminder scheduler stopped'))
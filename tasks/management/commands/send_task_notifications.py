@@ -0,0 +1,58 @@
+"""
+Management command (the notification worker) to send queued task notifications as digests.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.notifications import send_batch
+from tasks.settings import NOTIFICATION_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Send queued task notifications, one digest per recipient, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=NOTIFICATION_BATCH_SIZE,
+            help=f'Notifications taken per batch (default: {NOTIFICATION_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running, checking the queue every this many seconds once it is empty '
+                 '(default: exit when it is empty)',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches (default: no limit)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        sent = failed = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            batch_sent, batch_failed = send_batch(batch_size)
+            if not batch_sent and not batch_failed:
+                if options['interval'] is None:
+                    break
+                # Notifications queued while waiting are coalesced into the next digests
+                time.sleep(options['interval'])
+                continue
+            sent += batch_sent
+            failed += batch_failed
+            batches += 1
+            self.stdout.write(f'Batch {batches}: {batch_sent} sent, {batch_failed} failed')
+            if batch_failed:
+                # Retried on a later run, or after a pause
+                if options['interval'] is None:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {sent} notification(s) sent, {failed} failed, in {batches} batch(es)'
+        ))
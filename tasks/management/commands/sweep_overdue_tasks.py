@@ -0,0 +1,44 @@
+"""
+Management command to flag tasks that have passed their due date as overdue.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.overdue import get_due_tasks, sweep_batch
+from tasks.settings import OVERDUE_SWEEP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Set is_overdue on open tasks whose due date has passed, in small batches (run it from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OVERDUE_SWEEP_BATCH_SIZE,
+            help=f'Tasks flagged per transaction (default: {OVERDUE_SWEEP_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many tasks would be flagged',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = max(1, options['batch_size'])
+
+        if options['dry_run']:
+            count = get_due_tasks(now).count()
+            self.stdout.write(f'{count} task(s) would be flagged overdue')
+            return
+
+        flagged = batches = 0
+        while True:
+            flipped = sweep_batch(now, batch_size)
+            if not flipped:
+                break
+            flagged += flipped
+            batches += 1
+        self.stdout.write(self.style.SUCCESS(f'✅ {flagged} task(s) flagged overdue in {batches} batch(es)'))
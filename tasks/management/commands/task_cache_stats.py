@@ -0,0 +1,32 @@
+"""
+Management command to show cache hit/miss counters for the tasks app.
+"""
+
+from django.core.management.base import BaseCommand
+
+from tasks import cache as task_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Show hit/miss counters of the task management caches. '
+        'Counters live in the cache itself, so use a shared backend to see all workers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        for namespace in task_cache.TASK_NAMESPACES:
+            counters = task_cache.get_counters(namespace)
+            lookups = counters['hits'] + counters['misses']
+            ratio = counters['hits'] / lookups * 100 if lookups else 0
+            self.stdout.write(
+                f"{namespace}: {counters['hits']} hits, {counters['misses']} misses ({ratio:.1f}% hit rate)"
+            )
+            if options['reset']:
+                task_cache.reset_counters(namespace)
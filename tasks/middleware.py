@@ -0,0 +1,170 @@
+"""
+Per-request query instrumentation: add it near the top of MIDDLEWARE.
+
+    'tasks.middleware.QueryInstrumentationMiddleware',
+
+Every query a request runs on its thread's connections goes through a
+QueryRecorder (installed with connection.execute_wrapper()), which counts
+queries, times them and groups them by fingerprint: the SQL with literals
+and IN lists folded, so the same query for different rows shares one.
+Requests over QUERY_BUDGET queries or QUERY_TIME_BUDGET milliseconds in
+the database are logged with their view, and the same fingerprint run
+QUERY_REPEAT_THRESHOLD times or more is reported as a likely N+1. With
+RAISE_ON_N_PLUS_ONE on an N+1 raises RepeatedQueriesError instead, failing
+the test that made the request; tasks.test_runner.TaskTestRunner turns it
+on for test runs.
+
+The response carries the totals in a Server-Timing header, which browser
+developer tools show alongside the request. The middleware works in both
+sync and async stacks, so the async views are not switched to a thread for
+it. Queries that gather_queries() runs on worker threads are counted too
+(see record_on_this_thread()). Queries run after the response is returned
+(streamed bodies) are not counted.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .settings import QUERY_BUDGET, QUERY_REPEAT_THRESHOLD, QUERY_SERVER_TIMING, QUERY_TIME_BUDGET
+
+logger = logging.getLogger(__name__)
+
+# The QueryRecorder of the request being handled, copied into the threads sync_to_async() starts
+current_recorder = ContextVar('query_recorder', default=None)
+
+# Transaction control repeats legitimately (one savepoint per atomic block)
+IGNORED_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT', 'ROLLBACK')
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+
+
+class RepeatedQueriesError(AssertionError):
+    """A request ran the same query QUERY_REPEAT_THRESHOLD times or more (raised with RAISE_ON_N_PLUS_ONE)"""
+
+
+def fingerprint(sql):
+    """sql with its literals and IN lists folded, so queries differing only in values match"""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return ' '.join(sql.split())
+
+
+def raise_on_n_plus_one():
+    # Read per request, unlike tasks.settings, so tests can turn it on with override_settings
+    return getattr(settings, 'TASK_MANAGEMENT_TASKS', {}).get('RAISE_ON_N_PLUS_ONE', False)
+
+
+class QueryRecorder:
+    """An execute_wrapper() counting, timing and fingerprinting the queries it sees"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        # gather_queries() records from several threads at once
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            key = None if sql.lstrip().upper().startswith(IGNORED_PREFIXES) else fingerprint(sql)
+            with self.lock:
+                self.duration += duration
+                self.count += 1
+                if key is not None:
+                    self.fingerprints[key] += 1
+
+    def get_repeats(self, threshold=QUERY_REPEAT_THRESHOLD):
+        """[(fingerprint, times), ...] run threshold times or more, most repeated first"""
+        return [(sql, times) for sql, times in self.fingerprints.most_common() if times >= threshold]
+
+
+def install(stack, recorder):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+
+
+@contextmanager
+def record_on_this_thread():
+    """Count the queries of this thread's connections for the current request, if it is instrumented"""
+    recorder = current_recorder.get()
+    with ExitStack() as stack:
+        if recorder is not None:
+            install(stack, recorder)
+        yield
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else request.path
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        try:
+            with ExitStack() as stack:
+                install(stack, recorder)
+                response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        try:
+            with ExitStack() as stack:
+                # The ORM runs in the request's sync_to_async() thread, on that thread's connections
+                await sync_to_async(install)(stack, recorder)
+                response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        milliseconds = recorder.duration * 1000
+        if QUERY_SERVER_TIMING:
+            timing = f'db;dur={milliseconds:.1f};desc="{recorder.count} queries"'
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        view = get_view_name(request)
+        repeats = recorder.get_repeats()
+        if repeats:
+            if raise_on_n_plus_one():
+                sql, times = repeats[0]
+                raise RepeatedQueriesError(f'{view} ran this query {times} times (N+1?): {sql}')
+            for sql, times in repeats:
+                logger.warning('%s %s (%s) ran a query %d times (N+1?): %s', request.method, request.path, view,
+                               times, sql)
+        if recorder.count > QUERY_BUDGET or milliseconds > QUERY_TIME_BUDGET:
+            logger.warning('%s %s (%s) ran %d queries, %.1f ms in the database', request.method, request.path,
+                           view, recorder.count, milliseconds)
+        return response
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_task_stats(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskStats = apps.get_model('tasks', 'TaskStats')
+    rows = (
+        Task.objects.values('department_id', 'assigned_to_id', 'status')
+        .annotate(total=models.Count('id'))
+        .order_by()
+    )
+    TaskStats.objects.bulk_create(
+        [
+            TaskStats(
+                department_id=row['department_id'],
+                assigned_to_id=row['assigned_to_id'],
+                status=row['status'],
+                count=row['total'],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0001_initial'),
+        ('tasks', '0002_task_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to=settings.AUTH_USER_MODEL)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to='accounts.department')),
+            ],
+            options={
+                'verbose_name_plural': 'task stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskstats',
+            constraint=models.UniqueConstraint(fields=('department', 'assigned_to', 'status'), name='taskstats_unique_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('assigned_to__isnull', True)), fields=('department', 'status'), name='taskstats_unique_unassigned_bucket'),
+        ),
+        migrations.RunPython(populate_task_stats, migrations.RunPython.noop),
+    ]
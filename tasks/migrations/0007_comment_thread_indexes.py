@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskarchivecomment',
+            index=models.Index(fields=['task', '-created_at', '-id'], name='taskarchivecomment_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskcomment',
+            index=models.Index(fields=['task', '-created_at', '-id'], name='taskcomment_task_created_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-17 08:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_comment_thread_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['department', 'status', 'priority', 'updated_at', 'due_date'], name='task_dept_validator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'status', 'priority', 'updated_at', 'due_date'], name='task_assignee_validator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'priority', 'updated_at', 'due_date'], name='task_validator_idx'),
+        ),
+    ]
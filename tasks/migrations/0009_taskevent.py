@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 08:43
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_page_validator_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('task.created', 'Created'), ('task.updated', 'Updated'), ('task.status', 'Status changed'), ('task.deleted', 'Deleted'), ('task.archived', 'Archived'), ('comment.created', 'Commented')], max_length=20)),
+                ('task_id', models.BigIntegerField()),
+                ('department_id', models.BigIntegerField()),
+                ('assigned_to_id', models.BigIntegerField(blank=True, null=True)),
+                ('previous_department_id', models.BigIntegerField(blank=True, null=True)),
+                ('previous_assigned_to_id', models.BigIntegerField(blank=True, null=True)),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['department_id', 'id'], name='taskevent_dept_idx'), models.Index(fields=['assigned_to_id', 'id'], name='taskevent_assignee_idx'), models.Index(condition=models.Q(('previous_department_id__isnull', False)), fields=['previous_department_id', 'id'], name='taskevent_prev_dept_idx'), models.Index(condition=models.Q(('previous_assigned_to_id__isnull', False)), fields=['previous_assigned_to_id', 'id'], name='taskevent_prev_assignee_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-17 08:58
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def flag_overdue_tasks(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(due_date__lt=timezone.now()).exclude(status='completed').update(is_overdue=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_job'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_dept_validator_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_assignee_validator_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_validator_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='is_overdue',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(flag_overdue_tasks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_overdue', False), models.Q(('status', 'completed'), _negated=True)), fields=['due_date'], name='task_sweep_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_overdue', True)), fields=['department', '-created_at', '-id'], name='task_dept_overdue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_overdue', True)), fields=['assigned_to', '-created_at', '-id'], name='task_assignee_overdue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_overdue', True)), fields=['-created_at', '-id'], name='task_overdue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['department', 'status', 'priority', 'updated_at', 'is_overdue'], name='task_dept_validator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'status', 'priority', 'updated_at', 'is_overdue'], name='task_assignee_validator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'priority', 'updated_at', 'is_overdue'], name='task_validator_idx'),
+        ),
+    ]
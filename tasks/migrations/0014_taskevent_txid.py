@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 09:32
+
+from django.db import migrations, models
+
+
+def order_existing_events(apps, schema_editor):
+    # Events logged before this migration come first in commit order
+    if schema_editor.connection.vendor == 'postgresql':
+        apps.get_model('tasks', 'TaskEvent').objects.using(schema_editor.connection.alias).update(txid=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_taskreminder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskevent',
+            name='txid',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='taskevent',
+            index=models.Index(condition=models.Q(('txid__isnull', False)), fields=['txid', 'id'], name='taskevent_txid_idx'),
+        ),
+        migrations.RunPython(order_existing_events, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,25 @@
-from django.db import models
+import logging
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.base import DEFERRED
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from .settings import STATUS_CHOICES, PRIORITY_CHOICES, DEFAULT_STATUS, DEFAULT_PRIORITY, ALLOW_COMMENTS, AUTO_COMPLETE_ON_STATUS_CHANGE
+from .settings import (
+    STATUS_CHOICES, PRIORITY_CHOICES, DEFAULT_STATUS, DEFAULT_PRIORITY, ALLOW_COMMENTS, AUTO_COMPLETE_ON_STATUS_CHANGE,
+    SEND_NOTIFICATIONS, JOB_DEFAULT_QUEUE, JOB_MAX_ATTEMPTS, JOB_TIMEOUT, CHANGES_FEED_DELAY,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class Task(models.Model):
+    STATUS_CHOICES = STATUS_CHOICES
+    PRIORITY_CHOICES = PRIORITY_CHOICES
+
     title = models.CharField(max_length=200)
     description = models.TextField()
     created_by = models.ForeignKey(
@@ -37,53 +51,241 @@ class Task(models.Model):
     )
     due_date = models.DateTimeField()
     completed_at = models.DateTimeField(null=True, blank=True)
+    # Open and past its due date; kept by save() and the bulk writers, and set by the
+    # sweep_overdue_tasks command as due dates pass (see tasks.overdue)
+    is_overdue = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Manager list/dashboard: department scope + status filter, newest first
+            models.Index(fields=['department', 'status', '-created_at'], name='task_dept_status_created_idx'),
+            # Employee list/dashboard: assignee scope + status filter + overdue range
+            models.Index(fields=['assigned_to', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            # Keyset pagination over (-created_at, -id) for each role scope
+            models.Index(fields=['department', '-created_at', '-id'], name='task_dept_created_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='task_assignee_created_idx'),
+            # Admin list/dashboard: unscoped newest-first ordering and status counts
+            models.Index(fields=['-created_at', '-id'], name='task_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='task_status_created_idx'),
+            # archive_tasks: oldest completions first
+            models.Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+            # sweep_overdue_tasks: open tasks not yet flagged, by due date; partial where supported
+            models.Index(
+                fields=['due_date'],
+                name='task_sweep_due_idx',
+                condition=Q(is_overdue=False) & ~Q(status='completed'),
+            ),
+            # Overdue counts and "overdue only" lists per scope, newest first: only overdue rows are indexed
+            models.Index(
+                fields=['department', '-created_at', '-id'],
+                name='task_dept_overdue_idx',
+                condition=Q(is_overdue=True),
+            ),
+            models.Index(
+                fields=['assigned_to', '-created_at', '-id'],
+                name='task_assignee_overdue_idx',
+                condition=Q(is_overdue=True),
+            ),
+            models.Index(fields=['-created_at', '-id'], name='task_overdue_idx', condition=Q(is_overdue=True)),
+            # Conditional GET (tasks.conditional): count, max(updated_at) and overdue count per scope
+            # and status/priority filter, answered from the index alone
+            models.Index(
+                fields=['department', 'status', 'priority', 'updated_at', 'is_overdue'],
+                name='task_dept_validator_idx',
+            ),
+            models.Index(
+                fields=['assigned_to', 'status', 'priority', 'updated_at', 'is_overdue'],
+                name='task_assignee_validator_idx',
+            ),
+            models.Index(fields=['status', 'priority', 'updated_at', 'is_overdue'], name='task_validator_idx'),
+        ]
+
+    # Fields whose previous values are needed to keep TaskStats in sync
+    STATS_FIELDS = ('department_id', 'assigned_to_id', 'status')
+    # Fields whose change requires re-running the assignment checks in clean()
+    ASSIGNMENT_FIELDS = ('department_id', 'assigned_to_id', 'created_by_id')
+
+    # Live tasks can be edited; see TaskArchive
+    is_archived = False
 
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the values as loaded so save() can tell what moved
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if value is not DEFERRED
+        }
+        return instance
+
     def get_absolute_url(self):
         return reverse('task-detail', kwargs={'pk': self.pk})
 
+    @property
+    def stats_key(self):
+        """The (department_id, assigned_to_id, status) bucket this task is counted in"""
+        return (self.department_id, self.assigned_to_id, self.status)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        # What was just read is the new baseline for get_changed_fields()
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if (fields is None or field.attname in fields or field.name in fields) and field.attname in self.__dict__:
+                loaded[field.attname] = getattr(self, field.attname)
+        self._loaded_values = loaded
+
+    def get_stored_stats_key(self, using=None):
+        """
+        The bucket the task's row is counted in, locked until the transaction ends; None if
+        there is no row. Read from the database rather than from what this instance loaded,
+        which another save may have overtaken since.
+        """
+        row = (
+            Task.objects.using(using or router.db_for_write(Task))
+            .select_for_update()
+            .filter(pk=self.pk)
+            .values_list(*self.STATS_FIELDS)
+            .first()
+        )
+        return tuple(row) if row else None
+
+    def get_changed_fields(self):
+        """
+        Attribute names of the fields changed since the task was loaded or saved.
+
+        Returns None when that is unknown (new task, or built by hand rather than loaded).
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return None
+        changed = set()
+        for field in self._meta.concrete_fields:
+            if field.attname in loaded:
+                if getattr(self, field.attname) != loaded[field.attname]:
+                    changed.add(field.attname)
+            elif field.attname in self.__dict__:
+                # Deferred on load but set since: we cannot tell, so assume it changed
+                changed.add(field.attname)
+        return changed
+
     def clean(self):
         # Validate that due_date is in the future
         if self.due_date and self.due_date < timezone.now():
             if not self.pk:  # Only validate for new tasks
                 raise ValidationError({'due_date': 'Due date must be in the future.'})
         
+        # Assignment checks only depend on who/where, skip them for status or priority changes
+        changed = self.get_changed_fields()
+        if changed is not None and not changed.intersection(self.ASSIGNMENT_FIELDS):
+            return
+        if not self.assigned_to_id:
+            return
+        
         # Validate that the assigned user is in the same department
-        if self.assigned_to and self.assigned_to.department != self.department:
+        assignee = self.assigned_to
+        if assignee.department_id != self.department_id:
             raise ValidationError({
                 'assigned_to': 'Assigned user must be in the same department as the task.'
             })
         
         # Validate that the creator can assign to this user
-        if self.assigned_to and hasattr(self, 'created_by'):
-            if not self.created_by.can_assign_to_user(self.assigned_to):
-                raise ValidationError({
-                    'assigned_to': 'You do not have permission to assign tasks to this user.'
-                })
+        if self.created_by_id and not self.created_by.can_assign_to_user(assignee):
+            raise ValidationError({
+                'assigned_to': 'You do not have permission to assign tasks to this user.'
+            })
 
     def save(self, *args, **kwargs):
+        """
+        Save the task, writing only the columns changed since it was loaded.
+
+        Saving a loaded task runs, in one transaction: a SELECT (FOR UPDATE
+        where supported) of the stats bucket its row is counted in, an UPDATE
+        of the changed columns, a TaskStats UPDATE for each bucket it leaves
+        and enters when department, assignee or status change (a new bucket
+        adds a SELECT and an INSERT), and the TaskEvent INSERT, followed by
+        the TaskNotification INSERT when SEND_NOTIFICATIONS is on.
+        """
         # Update completed_at when status changes to completed
         if AUTO_COMPLETE_ON_STATUS_CHANGE:
             if self.status == 'completed' and not self.completed_at:
                 self.completed_at = timezone.now()
             elif self.status != 'completed':
                 self.completed_at = None
+        self.is_overdue = self.get_overdue()
         
-        self.full_clean()
-        super().save(*args, **kwargs)
+        # Only validate and write the columns that changed (plus those save() derives from them)
+        changed = self.get_changed_fields()
+        exclude = None
+        inferred = False
+        if changed is not None:
+            changed_names = {field.name for field in self._meta.concrete_fields if field.attname in changed}
+            exclude = {field.name for field in self._meta.concrete_fields} - changed_names
+            if not args and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = changed_names
+                inferred = True
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'status' in update_fields:
+                update_fields.add('completed_at')
+            if update_fields.intersection(('status', 'due_date')):
+                update_fields.add('is_overdue')
+            kwargs['update_fields'] = update_fields | {'updated_at'}
+        
+        self.full_clean(exclude=exclude)
+        with transaction.atomic(using=kwargs.get('using')):
+            previous_key = None if self._state.adding else self.get_stored_stats_key(kwargs.get('using'))
+            if previous_key is None and inferred:
+                # The row is gone (deleted since this instance was loaded): save it whole, as save() would
+                del kwargs['update_fields']
+            self._previous_stats_key = previous_key
+            super().save(*args, **kwargs)
+            TaskStats.move(previous_key, self.stats_key)
+            self.record_save(previous_key, kwargs.get('update_fields'), using=kwargs.get('using'))
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
 
-    @property
-    def is_overdue(self):
-        if self.status == 'completed':
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            # The post_delete signals take the bucket the row is counted in, not the loaded one
+            self._deleted_stats_key = self.get_stored_stats_key(using)
+            return super().delete(using=using, keep_parents=keep_parents)
+
+    def record_save(self, previous_key, update_fields=None, using=None):
+        """Write the TaskEvent for this save (the fields in update_fields, or all of them)"""
+        if previous_key is None:
+            event_type = TaskEvent.CREATED
+        elif previous_key[2] != self.status:
+            event_type = TaskEvent.STATUS
+        else:
+            event_type = TaskEvent.UPDATED
+        if update_fields is not None:
+            update_fields = {self._meta.get_field(name).attname for name in update_fields}
+        changes = TaskEvent.get_changes(self, update_fields)
+        if previous_key is not None:
+            # A full save (or a broad update_fields) writes columns that kept their value; the stored
+            # row tells for these, so keeping the assignee does not queue an assignment notification
+            for attname, value in zip(self.STATS_FIELDS, previous_key):
+                if attname in changes and changes[attname] == value:
+                    del changes[attname]
+        if changes or event_type == TaskEvent.CREATED:
+            TaskEvent.record(TaskEvent.for_task(event_type, self, previous_key, changes), using=using)
+
+    def get_overdue(self, now=None):
+        """Whether the task is overdue at now; is_overdue holds this as of the last save or sweep"""
+        if self.status == 'completed' or self.due_date is None:
             return False
-        return timezone.now() > self.due_date
+        return self.due_date < (now or timezone.now())
 
     @property
     def days_remaining(self):
@@ -103,9 +305,491 @@ class Task(models.Model):
         if user.is_admin:
             return cls.objects.all()
         elif user.is_manager:
-            return cls.objects.filter(department=user.department)
+            return cls.objects.filter(department_id=user.department_id)
+        else:
+            return cls.objects.filter(assigned_to_id=user.pk)
+
+
+class TaskArchive(models.Model):
+    """
+    A completed task moved out of the Task table by the archive_tasks command.
+
+    Keeps the primary key it had as a Task, so task URLs keep resolving, and
+    stays counted in TaskStats. Archived tasks are read-only.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    created_by = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='created_archived_tasks'
+    )
+    assigned_to = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='archived_tasks',
+        null=True,
+        blank=True
+    )
+    department = models.ForeignKey(
+        'accounts.Department',
+        on_delete=models.CASCADE,
+        related_name='archived_tasks'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES)
+    due_date = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # Fields copied over from Task as they are
+    COPIED_FIELDS = (
+        'id', 'title', 'description', 'created_by_id', 'assigned_to_id', 'department_id',
+        'status', 'priority', 'due_date', 'completed_at', 'created_at', 'updated_at',
+    )
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # "Include archived" task list, merged with Task on (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='taskarchive_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.get_status_display()} (archived)"
+
+    @classmethod
+    def from_task(cls, task):
+        return cls(**{name: getattr(task, name) for name in cls.COPIED_FIELDS})
+
+    def get_absolute_url(self):
+        return reverse('task-detail', kwargs={'pk': self.pk})
+
+    @property
+    def stats_key(self):
+        return (self.department_id, self.assigned_to_id, self.status)
+
+    @property
+    def is_overdue(self):
+        if self.status == 'completed':
+            return False
+        return timezone.now() > self.due_date
+
+    @property
+    def days_remaining(self):
+        if self.status == 'completed':
+            return 0
+        delta = self.due_date - timezone.now()
+        return max(0, delta.days)
+
+
+class TaskStats(models.Model):
+    """
+    Rollup of task counts per (department, assignee, status).
+
+    Kept in step with Task by Task.save() and the post_delete signal, so the
+    dashboard can read its numbers without counting the Task table.
+    Archived tasks stay counted: moving a task to TaskArchive leaves it alone,
+    and the TaskArchive post_delete signal removes it when its row goes.
+    Use the rebuild_task_stats command to recompute it and detect drift.
+    """
+    department = models.ForeignKey(
+        'accounts.Department',
+        on_delete=models.CASCADE,
+        related_name='task_stats'
+    )
+    assigned_to = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='task_stats',
+        null=True,
+        blank=True
+    )
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'task stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['department', 'assigned_to', 'status'],
+                name='taskstats_unique_bucket',
+            ),
+            # NULLs never collide in a unique index, so unassigned buckets need their own
+            models.UniqueConstraint(
+                fields=['department', 'status'],
+                condition=Q(assigned_to__isnull=True),
+                name='taskstats_unique_unassigned_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.department_id}/{self.assigned_to_id}/{self.status}: {self.count}"
+
+    @classmethod
+    def adjust(cls, key, delta):
+        """Add delta to the bucket identified by key, creating it if needed; counts never go below 0"""
+        department_id, assigned_to_id, status = key
+        bucket = cls.objects.filter(
+            department_id=department_id,
+            assigned_to_id=assigned_to_id,
+            status=status,
+        )
+        if delta < 0:
+            if not bucket.filter(count__gte=-delta).update(count=F('count') + delta):
+                logger.warning(
+                    'TaskStats bucket %s has fewer than %d tasks to remove; run rebuild_task_stats', key, -delta
+                )
+            return
+        if bucket.update(count=F('count') + delta):
+            return
+        _, created = cls.objects.get_or_create(
+            department_id=department_id,
+            assigned_to_id=assigned_to_id,
+            status=status,
+            defaults={'count': delta},
+        )
+        if not created:
+            bucket.update(count=F('count') + delta)
+
+    @classmethod
+    def move(cls, previous_key, new_key):
+        """Move one task from previous_key to new_key (either may be None)"""
+        if previous_key == new_key:
+            return
+        if previous_key is not None:
+            cls.adjust(previous_key, -1)
+        if new_key is not None:
+            cls.adjust(new_key, 1)
+
+    @classmethod
+    def get_counts(cls, **filters):
+        """Return {status: count} summed over the buckets matching filters"""
+        stats = cls.objects.filter(**filters)
+        return {
+            row['status']: row['total']
+            for row in stats.values('status').annotate(total=Sum('count')).order_by()
+        }
+
+
+class TaskEvent(models.Model):
+    """
+    Append-only log of task changes (an outbox), served by the changes feed in tasks.api.
+
+    Events are written with record(), in the same transaction as the change
+    they describe, by Task.save(), the Task post_delete signal,
+    TaskComment.save() and the set-based writers (bulk actions, import_tasks,
+    archive_tasks), so the log
+    never misses a committed change nor holds a rolled-back one. Consumers
+    sync incrementally by asking for the events after() the position of the
+    last one they saw, which walks the log in commit order (see after()).
+    changes holds the new values of the fields that
+    changed; department_id and assigned_to_id are the task's after the
+    change, and previous_department_id / previous_assigned_to_id are set
+    when the change moved it, so viewers of either side are told.
+    Use the prune_task_events command to drop old events.
+    """
+    CREATED = 'task.created'
+    UPDATED = 'task.updated'
+    STATUS = 'task.status'
+    DELETED = 'task.deleted'
+    ARCHIVED = 'task.archived'
+    COMMENTED = 'comment.created'
+    TYPE_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (STATUS, 'Status changed'),
+        (DELETED, 'Deleted'),
+        (ARCHIVED, 'Archived'),
+        (COMMENTED, 'Commented'),
+    ]
+
+    # Fields left out of changes: the key, and a timestamp every save moves
+    UNTRACKED_FIELDS = ('id', 'updated_at')
+
+    # Plain ids rather than foreign keys: events outlive the rows they describe
+    type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    task_id = models.BigIntegerField()
+    department_id = models.BigIntegerField()
+    assigned_to_id = models.BigIntegerField(null=True, blank=True)
+    previous_department_id = models.BigIntegerField(null=True, blank=True)
+    previous_assigned_to_id = models.BigIntegerField(null=True, blank=True)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    # PostgreSQL only: the writing transaction's id, which orders the log by commit (see after())
+    txid = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='taskevent_txid_idx', condition=Q(txid__isnull=False)),
+            # Changes feed: events after a cursor id for each role scope
+            models.Index(fields=['department_id', 'id'], name='taskevent_dept_idx'),
+            models.Index(fields=['assigned_to_id', 'id'], name='taskevent_assignee_idx'),
+            models.Index(
+                fields=['previous_department_id', 'id'],
+                name='taskevent_prev_dept_idx',
+                condition=Q(previous_department_id__isnull=False),
+            ),
+            models.Index(
+                fields=['previous_assigned_to_id', 'id'],
+                name='taskevent_prev_assignee_idx',
+                condition=Q(previous_assigned_to_id__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.type} task {self.task_id}"
+
+    @classmethod
+    def record(cls, *events, using=None):
+        """Save events, in the caller's transaction, and queue the notifications they call for"""
+        using = using or router.db_for_write(cls)
+        if connections[using].vendor == 'postgresql':
+            with connections[using].cursor() as cursor:
+                cursor.execute('SELECT txid_current()')
+                txid = cursor.fetchone()[0]
+            for event in events:
+                event.txid = txid
+        events = cls.objects.using(using).bulk_create(events)
+        if SEND_NOTIFICATIONS:
+            TaskNotification.queue(events, using=using)
+        return events
+
+    @classmethod
+    def get_changes(cls, task, attnames=None):
+        """{attname: value} for task's fields in attnames (every field by default)"""
+        return {
+            field.attname: getattr(task, field.attname)
+            for field in task._meta.concrete_fields
+            if field.attname not in cls.UNTRACKED_FIELDS and (attnames is None or field.attname in attnames)
+        }
+
+    @classmethod
+    def for_task(cls, event_type, task, previous_key=None, changes=None):
+        """An unsaved event about task; previous_key is its (department_id, assigned_to_id, status) before"""
+        event = cls(
+            type=event_type,
+            task_id=task.pk,
+            department_id=task.department_id,
+            assigned_to_id=task.assigned_to_id,
+            changes=changes or {},
+        )
+        if previous_key is not None:
+            if previous_key[0] != task.department_id:
+                event.previous_department_id = previous_key[0]
+            if previous_key[1] != task.assigned_to_id:
+                event.previous_assigned_to_id = previous_key[1]
+        return event
+
+    @property
+    def position(self):
+        """Where this event is in commit order, for after()"""
+        return (self.txid, self.pk)
+
+    @classmethod
+    def after(cls, position=None, events=None, using=None):
+        """
+        events (every event by default) after position, in commit order; position is an
+        event's position, or None for the start of the log.
+
+        Ids are given out as rows are inserted, not as transactions commit, so
+        a transaction that takes an id and commits late would slip behind a
+        consumer that has already moved past it. On SQLite writers take turns,
+        so ids are in commit order. On PostgreSQL events are ordered by their
+        transaction id instead, and only events from transactions older than
+        every one still running are returned: no event can appear before them
+        any more. Elsewhere the newest CHANGES_FEED_DELAY seconds are held
+        back, which is lossy: a transaction running longer than that (keep
+        the delay above the database's transaction timeout) can be missed.
+        """
+        using = using or router.db_for_read(cls)
+        events = (cls.objects.all() if events is None else events).using(using)
+        txid, pk = position or (None, 0)
+        vendor = connections[using].vendor
+        if vendor == 'postgresql':
+            with connections[using].cursor() as cursor:
+                cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+                horizon = cursor.fetchone()[0]
+            txid = txid or 0
+            return events.filter(
+                Q(txid__gt=txid) | Q(txid=txid, pk__gt=pk), txid__lt=horizon
+            ).order_by('txid', 'pk')
+        events = events.filter(pk__gt=pk).order_by('pk')
+        if vendor != 'sqlite':
+            events = events.filter(created_at__lt=timezone.now() - timedelta(seconds=CHANGES_FEED_DELAY))
+        return events
+
+    @classmethod
+    def get_user_events(cls, user):
+        """Events about tasks visible to a user, before or after the change (as Task.get_user_tasks)"""
+        if user.is_admin:
+            return cls.objects.all()
+        elif user.is_manager:
+            return cls.objects.filter(
+                Q(department_id=user.department_id) | Q(previous_department_id=user.department_id)
+            )
         else:
-            return cls.objects.filter(assigned_to=user)
+            return cls.objects.filter(Q(assigned_to_id=user.pk) | Q(previous_assigned_to_id=user.pk))
+
+
+class TaskNotification(models.Model):
+    """
+    A notification waiting to be sent, queued by TaskEvent.record() when SEND_NOTIFICATIONS is on
+    (and by the due-date reminder jobs, see tasks.reminders).
+
+    Rows are inserted in the transaction of the task change, so a request
+    never waits on delivery and a rolled-back change notifies nobody. The
+    send_task_notifications command sends them (see tasks.notifications)
+    and deletes them once sent; attempts counts failed deliveries.
+    """
+    ASSIGNED = 'assigned'
+    STATUS = 'status'
+    REMINDER = 'reminder'
+    KIND_CHOICES = [
+        (ASSIGNED, 'Assigned'),
+        (STATUS, 'Status changed'),
+        (REMINDER, 'Due soon'),
+    ]
+
+    recipient = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='task_notifications'
+    )
+    task_id = models.BigIntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # The new status, for status notifications
+    status = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # A recipient's other pending notifications join their digest
+            models.Index(fields=['recipient', 'id'], name='tasknotification_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} task {self.task_id} for {self.recipient_id}"
+
+    @classmethod
+    def queue(cls, events, using=None):
+        """
+        Queue the notifications for events (saved TaskEvents).
+
+        A task's new assignee is told it was assigned to them; its creator
+        and assignee are told when its status changes.
+        """
+        status_task_ids = [event.task_id for event in events if event.type == TaskEvent.STATUS]
+        creators = dict(
+            Task.objects.using(using).filter(pk__in=status_task_ids).values_list('pk', 'created_by_id')
+        ) if status_task_ids else {}
+        notifications = []
+        for event in events:
+            if event.type in (TaskEvent.CREATED, TaskEvent.UPDATED, TaskEvent.STATUS):
+                if event.changes.get('assigned_to_id'):
+                    notifications.append(cls(
+                        recipient_id=event.assigned_to_id, task_id=event.task_id, kind=cls.ASSIGNED,
+                    ))
+            if event.type == TaskEvent.STATUS:
+                recipients = {creators.get(event.task_id), event.assigned_to_id} - {None}
+                status = event.changes.get('status', '')
+                notifications.extend(
+                    cls(recipient_id=recipient_id, task_id=event.task_id, kind=cls.STATUS, status=status)
+                    for recipient_id in sorted(recipients)
+                )
+        if notifications:
+            cls.objects.using(using).bulk_create(notifications)
+
+
+class Job(models.Model):
+    """
+    A piece of background work: a function registered with tasks.jobs.job and its keyword arguments.
+
+    Created by tasks.jobs.enqueue() and run by the run_workers command. A
+    queued job becomes due at run_at; a worker claims it by setting status
+    to running and leasing it for timeout seconds (until locked_until). Jobs
+    whose lease runs out are queued again, so a job may run more than once.
+    Finished jobs are deleted; failed ones are kept, with their last error.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)
+    queue = models.CharField(max_length=50, default=JOB_DEFAULT_QUEUE)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=JOB_MAX_ATTEMPTS)
+    # Seconds a claimed job may run before its lease runs out
+    timeout = models.PositiveIntegerField(default=JOB_TIMEOUT)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Claiming: a queue's due jobs, oldest first
+            models.Index(
+                fields=['queue', 'run_at', 'id'],
+                name='job_queued_idx',
+                condition=Q(status='queued'),
+            ),
+            # Expired leases, and running jobs per queue for concurrency limits
+            models.Index(
+                fields=['queue', 'locked_until'],
+                name='job_running_idx',
+                condition=Q(status='running'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.queue}, {self.status})"
+
+
+class TaskReminder(models.Model):
+    """
+    A due-date reminder that has fired: one per task, threshold (hours before due) and due date.
+
+    The unique constraint is what makes a reminder fire once, however many
+    schedulers run and however often they restart; moving the due date
+    makes the task due for new reminders. sent_at is set by the reminder job
+    when it queues the notification.
+    """
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='reminders'
+    )
+    hours = models.PositiveIntegerField()
+    due_date = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'hours', 'due_date'], name='taskreminder_unique'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id}: {self.hours}h before {self.due_date:%Y-%m-%d %H:%M}"
 
 
 # Only create TaskComment model if comments are enabled
@@ -127,6 +811,52 @@ if ALLOW_COMMENTS:
 
         class Meta:
             ordering = ['-created_at']
+            indexes = [
+                # Comment threads are paged newest first with a (created_at, id) cursor
+                models.Index(fields=['task', '-created_at', '-id'], name='taskcomment_task_created_idx'),
+            ]
+
+        def __str__(self):
+            return f"Comment by {self.author} on {self.task.title}"
+
+        def save(self, *args, **kwargs):
+            adding = self._state.adding
+            with transaction.atomic(using=kwargs.get('using')):
+                super().save(*args, **kwargs)
+                if adding:
+                    event = TaskEvent.for_task(
+                        TaskEvent.COMMENTED, self.task, changes={'comment_id': self.pk, 'author_id': self.author_id}
+                    )
+                    TaskEvent.record(event, using=kwargs.get('using'))
+
+    class TaskArchiveComment(models.Model):
+        """A comment moved to the archive along with its task; keeps its original primary key"""
+        id = models.BigIntegerField(primary_key=True)
+        task = models.ForeignKey(
+            TaskArchive,
+            on_delete=models.CASCADE,
+            related_name='comments'
+        )
+        author = models.ForeignKey(
+            'accounts.User',
+            on_delete=models.CASCADE,
+            related_name='archived_task_comments'
+        )
+        content = models.TextField()
+        created_at = models.DateTimeField()
+        updated_at = models.DateTimeField()
+
+        COPIED_FIELDS = ('id', 'task_id', 'author_id', 'content', 'created_at', 'updated_at')
+
+        class Meta:
+            ordering = ['-created_at']
+            indexes = [
+                models.Index(fields=['task', '-created_at', '-id'], name='taskarchivecomment_task_idx'),
+            ]
+
+        @classmethod
+        def from_comment(cls, comment):
+            return cls(**{name: getattr(comment, name) for name in cls.COPIED_FIELDS})
 
         def __str__(self):
-            return f"Comment by {self.author} on {self.task.title}"
\ No newline at end of file
+            return f"Comment by {self.author} on {self.task.title}"
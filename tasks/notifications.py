@@ -0,0 +1,146 @@
+"""
+Delivery of queued TaskNotifications (the send_task_notifications command).
+
+Requests only insert TaskNotification rows, in the transaction of the task
+change; nothing is sent while a request waits. The worker takes the oldest
+pending notifications in batches, together with any others pending for
+the same recipients, coalesces each recipient's into one digest (a task
+changed several times appears once, with its latest status), and hands
+the digests to the NOTIFICATION_BACKEND.
+
+A backend has a send(digests) method returning the digests it could not
+deliver; those stay queued for another attempt.
+"""
+
+import logging
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import NoReverseMatch, reverse
+from django.utils.module_loading import import_string
+
+from .models import Task, TaskNotification
+from .settings import (
+    NOTIFICATION_BACKEND,
+    NOTIFICATION_BASE_URL,
+    NOTIFICATION_FROM_EMAIL,
+    NOTIFICATION_MAX_ATTEMPTS,
+    TASK_URL_NAMESPACE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_task_url(task):
+    try:
+        path = reverse(f'{TASK_URL_NAMESPACE}:task-detail', kwargs={'pk': task.pk})
+    except NoReverseMatch:
+        path = task.get_absolute_url()
+    return NOTIFICATION_BASE_URL.rstrip('/') + path
+
+
+class Digest:
+    """One recipient's pending notifications, coalesced per task"""
+
+    def __init__(self, recipient, notifications, tasks):
+        self.recipient = recipient
+        self.notifications = notifications
+        items = {}
+        for notification in notifications:
+            task = tasks.get(notification.task_id)
+            if task is None:
+                # Deleted (or archived) since; nothing left to look at
+                continue
+            item = items.setdefault(task.pk, {
+                'task': task, 'url': get_task_url(task), 'assigned': False, 'status': '', 'due_soon': False,
+            })
+            if notification.kind == TaskNotification.ASSIGNED:
+                item['assigned'] = True
+            elif notification.kind == TaskNotification.REMINDER:
+                item['due_soon'] = True
+            else:
+                item['status'] = dict(Task.STATUS_CHOICES).get(notification.status, notification.status)
+        self.items = list(items.values())
+
+    @property
+    def subject(self):
+        if len(self.items) == 1:
+            return f"Task update: {self.items[0]['task'].title}"
+        return f'{len(self.items)} task updates'
+
+    @property
+    def body(self):
+        return render_to_string('tasks/email/notification_digest.txt', {
+            'recipient': self.recipient,
+            'items': self.items,
+        })
+
+
+class EmailNotificationBackend:
+    """Sends each digest as an email through Django's EMAIL_BACKEND, over one connection per batch"""
+
+    def send(self, digests):
+        failed = []
+        with get_connection() as connection:
+            for digest in digests:
+                message = EmailMessage(
+                    digest.subject, digest.body, NOTIFICATION_FROM_EMAIL, [digest.recipient.email],
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception:
+                    logger.exception('Could not send task notifications to %s', digest.recipient.email)
+                    failed.append(digest)
+        return failed
+
+
+def get_notification_backend():
+    return import_string(NOTIFICATION_BACKEND)()
+
+
+def get_pending():
+    return TaskNotification.objects.filter(attempts__lt=NOTIFICATION_MAX_ATTEMPTS)
+
+
+def send_batch(batch_size, backend=None):
+    """
+    Send the digests for up to batch_size recipients' pending notifications.
+
+    Returns (sent, failed) counts of notifications; (0, 0) once the queue is empty.
+    """
+    backend = backend or get_notification_backend()
+    with transaction.atomic():
+        # Rows another worker holds are left to it
+        oldest = get_pending().select_for_update(skip_locked=True).order_by('pk')[:batch_size]
+        recipient_ids = set(oldest.values_list('recipient_id', flat=True))
+        if not recipient_ids:
+            return 0, 0
+        notifications = list(
+            get_pending().filter(recipient_id__in=recipient_ids)
+            .select_for_update(skip_locked=True).select_related('recipient').order_by('pk')
+        )
+        tasks = Task.objects.only('title', 'status', 'due_date').in_bulk({n.task_id for n in notifications})
+
+        by_recipient = {}
+        for notification in notifications:
+            by_recipient.setdefault(notification.recipient_id, []).append(notification)
+        digests = []
+        for recipient_notifications in by_recipient.values():
+            recipient = recipient_notifications[0].recipient
+            digest = Digest(recipient, recipient_notifications, tasks)
+            # Nobody to tell, or nothing left to tell them: dropped with the sent ones
+            if digest.items and recipient.is_active and recipient.email:
+                digests.append(digest)
+
+        try:
+            failed = backend.send(digests)
+        except Exception:
+            logger.exception('Could not send task notifications')
+            failed = digests
+        failed_ids = {n.pk for digest in failed for n in digest.notifications}
+        TaskNotification.objects.filter(pk__in=failed_ids).update(attempts=F('attempts') + 1)
+        TaskNotification.objects.filter(pk__in=[n.pk for n in notifications if n.pk not in failed_ids]).delete()
+    return len(notifications) - len(failed_ids), len(failed_ids)
@@ -0,0 +1,61 @@
+"""
+Keeping Task.is_overdue in step with the clock.
+
+Task.save(), bulk status changes and import_tasks set the flag from the
+due date and status as they write; a task whose due date merely passes is
+flagged by the sweep_overdue_tasks command, meant to run from cron every
+minute or so. Pages read the flag instead of comparing every due date with
+the current time, and "overdue only" lists and counts read a partial index
+holding just the overdue rows.
+
+Sweeping is idempotent and safe to run on several nodes at once: each
+batch is a short transaction over the open, unflagged tasks past their due
+date, rows another sweeper has locked are skipped, and the UPDATE re-checks
+the flag, so every task is flipped (and reported) once. The UPDATE stamps
+updated_at, both for the change poller behind the live pages and to tell
+which of the batch's rows it flipped.
+"""
+
+from django.db import transaction
+
+from . import cache as task_cache, events
+from .models import Task, TaskEvent
+
+
+def get_due_tasks(now):
+    """Open tasks past their due date at now that are not flagged overdue yet"""
+    return Task.objects.filter(is_overdue=False, due_date__lt=now).exclude(status='completed')
+
+
+def sweep_batch(now, batch_size):
+    """Flag up to batch_size tasks that fell due before now; return how many this call flipped"""
+    with transaction.atomic():
+        tasks = list(
+            get_due_tasks(now)
+            .select_for_update(skip_locked=True)
+            .order_by('due_date', 'pk')
+            .only(*events.TASK_EVENT_FIELDS, 'due_date')[:batch_size]
+        )
+        if not tasks:
+            return 0
+        pks = [task.pk for task in tasks]
+        # updated_at tells the change poller (tasks.events) and, below, which rows this UPDATE flipped
+        if not get_due_tasks(now).filter(pk__in=pks).update(is_overdue=True, updated_at=now):
+            # Another sweeper got there first
+            return 0
+        flipped_pks = set(
+            Task.objects.filter(pk__in=pks, is_overdue=True, updated_at=now).values_list('pk', flat=True)
+        )
+        tasks = [task for task in tasks if task.pk in flipped_pks]
+        for task in tasks:
+            task.is_overdue, task.updated_at = True, now
+
+        # QuerySet.update() bypasses Task.save(): the flag moves no TaskStats bucket, but the
+        # cached pages, the TaskEvent log and the live pages need to hear about it
+        TaskEvent.record(*(
+            TaskEvent.for_task(TaskEvent.UPDATED, task, changes={'is_overdue': True}) for task in tasks
+        ))
+        keys = {task.stats_key for task in tasks}
+        transaction.on_commit(lambda: task_cache.bump_task_scopes(*keys))
+        events.publish_on_commit(*(events.task_event(events.TASK_UPDATED, task) for task in tasks))
+    return len(tasks)
@@ -0,0 +1,148 @@
+"""
+Keyset (cursor) pagination over a descending (field, id) ordering.
+
+Each page is fetched with a range condition on the ordering columns instead
+of an OFFSET, so the cost of a page does not depend on how deep it is. The
+cursor handed to the client is an opaque token naming the row to continue
+from and the direction to go in.
+
+The ordering field defaults to created_at (newest first); search results
+paginate on their rank instead. Rows may be model instances or .values()
+dicts that include 'pk' and the ordering field.
+"""
+
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .settings import TASK_LIST_PAGE_SIZE
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorPage:
+    """A page of results with opaque cursors for its neighbours (None when there is none)"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def row_value(obj, field):
+    return obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+
+def encode_cursor(obj, direction, field='created_at'):
+    value = row_value(obj, field)
+    payload = {'f': field, 'i': row_value(obj, 'pk'), 'd': direction}
+    if isinstance(value, datetime.datetime):
+        payload['t'] = value.isoformat()
+    else:
+        payload['v'] = value
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, field='created_at'):
+    """Return (value, pk, direction), or None if the token is not a valid cursor for field"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if 't' in payload:
+            value = parse_datetime(payload['t'])
+        else:
+            value = payload['v']
+        pk = int(payload['i'])
+        direction = payload['d']
+        cursor_field = payload['f']
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    if value is None or cursor_field != field or direction not in (NEXT, PREVIOUS):
+        return None
+    return value, pk, direction
+
+
+def fetch_rows(querysets, position, limit, field):
+    """
+    Up to limit rows past position, nearest first, merged across querysets.
+
+    Going backwards (a PREVIOUS cursor) the rows come in ascending order.
+    """
+    backwards = position is not None and position[2] == PREVIOUS
+    rows = []
+    for queryset in querysets:
+        if position is not None:
+            value, pk, _ = position
+            if backwards:
+                queryset = queryset.filter(**{f'{field}__gte': value}).filter(
+                    Q(**{f'{field}__gt': value}) | Q(pk__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+                    Q(**{f'{field}__lt': value}) | Q(pk__lt=pk)
+                )
+        ordering = (field, 'pk') if backwards else (f'-{field}', '-pk')
+        rows += queryset.order_by(*ordering)[:limit]
+    if len(querysets) > 1:
+        rows.sort(key=lambda obj: (row_value(obj, field), row_value(obj, 'pk')), reverse=not backwards)
+    return rows[:limit]
+
+
+def paginate_by_cursor(queryset, cursor=None, page_size=TASK_LIST_PAGE_SIZE, field='created_at'):
+    """
+    Return a CursorPage of queryset ordered by field (descending), then pk.
+
+    queryset may also be a list of querysets whose primary keys never
+    collide (Task and TaskArchive); their rows are merged into one ordering.
+    An invalid or stale cursor falls back to the first page.
+    """
+    querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+    position = decode_cursor(cursor, field) if cursor else None
+
+    if position is not None and position[2] == PREVIOUS:
+        rows = fetch_rows(querysets, position, page_size + 1, field)
+        if rows:
+            has_more = len(rows) > page_size
+            rows = rows[:page_size][::-1]
+            return CursorPage(
+                rows,
+                next_cursor=encode_cursor(rows[-1], NEXT, field),
+                previous_cursor=encode_cursor(rows[0], PREVIOUS, field) if has_more else None,
+            )
+        position = None
+
+    rows = fetch_rows(querysets, position, page_size + 1, field)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1], NEXT, field) if has_more else None,
+        previous_cursor=encode_cursor(rows[0], PREVIOUS, field) if position is not None and rows else None,
+    )
+
+
+def cursor_url(request, cursor):
+    """The current URL with its cursor parameter replaced, keeping every other filter"""
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'?{params.urlencode()}'
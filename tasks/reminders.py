@@ -0,0 +1,168 @@
+"""
+Due-date reminders: a notification REMINDER_HOURS before each open task's due date.
+
+The schedule_task_reminders command runs a ReminderScheduler, which holds
+the reminders due within the next REMINDER_LOOKAHEAD minutes in a heap,
+ordered by when they fire, and sleeps until the first one (or the next
+poll). Rather than scanning every task each minute, it loads each new
+slice of the look-ahead window as the window moves on (one range query per
+threshold, on the due date index) and follows changes through the
+TaskEvent log: tasks whose due date moves, that are completed or deleted
+are reloaded, and entries that no longer match the task are dropped when
+they come up. Memory holds only the window, not the table.
+
+Firing a reminder inserts a TaskReminder row, unique per task, threshold
+and due date, and queues the send_reminder job in the same transaction; a
+second scheduler, or this one after a restart, finds the row taken and
+skips it, so each reminder fires once. With SEND_NOTIFICATIONS on, the
+job queues the notification for the assignee (the creator if there is
+none), sent with the other notifications by send_task_notifications.
+"""
+
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .jobs import job
+from .models import Task, TaskEvent, TaskNotification, TaskReminder
+from .settings import REMINDER_HOURS, REMINDER_LOOKAHEAD, REMINDER_POLL_INTERVAL, SEND_NOTIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+
+@job(queue='reminders')
+def send_reminder(reminder_id):
+    """Queue the notification for a fired reminder, once, if the task is still open and due then"""
+    with transaction.atomic():
+        if not TaskReminder.objects.filter(pk=reminder_id, sent_at=None).update(sent_at=timezone.now()):
+            return  # Already sent (the job ran before), or the task is gone
+        reminder = TaskReminder.objects.select_related('task').get(pk=reminder_id)
+        task = reminder.task
+        if task.status == 'completed' or task.due_date != reminder.due_date:
+            return
+        recipient_id = task.assigned_to_id or task.created_by_id
+        # Like the notifications TaskEvent.record() queues, only when SEND_NOTIFICATIONS is on
+        if recipient_id and SEND_NOTIFICATIONS:
+            TaskNotification.objects.create(
+                recipient_id=recipient_id, task_id=task.pk, kind=TaskNotification.REMINDER,
+            )
+
+
+def get_open_tasks():
+    # Open tasks not yet due: the rows of the due date index used by the overdue sweeper
+    return Task.objects.filter(is_overdue=False).exclude(status='completed')
+
+
+class ReminderScheduler:
+    """
+    Fires due-date reminders from an in-memory heap of the ones coming up.
+
+    The heap holds (fire_at, task_id, hours, due_date) for reminders firing
+    before window_end; due_dates holds the current due date of each task
+    with entries in it, and pending how many entries each has.
+    """
+
+    def __init__(self, hours=None, lookahead=None):
+        self.hours = sorted(set(REMINDER_HOURS if hours is None else hours))
+        self.lookahead = timedelta(minutes=REMINDER_LOOKAHEAD if lookahead is None else lookahead)
+        self.heap = []
+        self.due_dates = {}
+        self.pending = {}
+        self.window_end = None
+        self.position = None
+
+    def push(self, task_id, due_date, now):
+        """Schedule task's reminders that fire inside the window and before it falls due"""
+        self.due_dates[task_id] = due_date
+        for hours in self.hours:
+            fire_at = due_date - timedelta(hours=hours)
+            if fire_at < self.window_end and due_date > now:
+                heapq.heappush(self.heap, (fire_at, task_id, hours, due_date))
+                self.pending[task_id] = self.pending.get(task_id, 0) + 1
+        if task_id not in self.pending:
+            del self.due_dates[task_id]
+
+    def extend(self, now):
+        """Move the window's end to now + lookahead, loading the reminders that brings into it"""
+        start, end = self.window_end, now + self.lookahead
+        if start is not None and end <= start:
+            return
+        self.window_end = end
+        for hours in self.hours:
+            before = timedelta(hours=hours)
+            # Reminders firing in [start, end): on the first load, any not yet due
+            due_from = now if start is None else max(start + before, now)
+            tasks = get_open_tasks().filter(due_date__gte=due_from, due_date__lt=end + before)
+            for task_id, due_date in tasks.values_list('pk', 'due_date'):
+                heapq.heappush(self.heap, (due_date - before, task_id, hours, due_date))
+                self.pending[task_id] = self.pending.get(task_id, 0) + 1
+                self.due_dates[task_id] = due_date
+
+    def apply_changes(self, now):
+        """Reschedule the tasks changed since the last call, as the TaskEvent log tells"""
+        if self.position is None:
+            # Start at the end of the log: the first extend() reads the tasks as they are now
+            self.position = TaskEvent.after().reverse().values_list('txid', 'pk').first() or (None, 0)
+            return
+        rows = list(TaskEvent.after(self.position).values_list('txid', 'pk', 'task_id'))
+        if not rows:
+            return
+        self.position = rows[-1][:2]
+        task_ids = {task_id for _, _, task_id in rows}
+        due_dates = dict(
+            get_open_tasks().filter(pk__in=task_ids, due_date__isnull=False).values_list('pk', 'due_date')
+        )
+        for task_id in task_ids:
+            due_date = due_dates.get(task_id)
+            if due_date == self.due_dates.get(task_id):
+                continue
+            # Whatever is queued for the task no longer matches it and is dropped when it comes up
+            self.due_dates.pop(task_id, None)
+            if due_date is not None:
+                self.push(task_id, due_date, now)
+
+    def release(self, task_id):
+        self.pending[task_id] -= 1
+        if not self.pending[task_id]:
+            del self.pending[task_id]
+            self.due_dates.pop(task_id, None)
+
+    def fire(self, task_id, hours, due_date):
+        """Record the reminder and queue its job; False if it had fired already"""
+        try:
+            with transaction.atomic():
+                reminder = TaskReminder.objects.create(task_id=task_id, hours=hours, due_date=due_date)
+                send_reminder.enqueue({'reminder_id': reminder.pk})
+        except IntegrityError:
+            # Fired by another scheduler or before a restart (or the task was deleted meanwhile)
+            return False
+        return True
+
+    def tick(self, now=None):
+        """Catch up on changes, move the window and fire the reminders due by now; return how many fired"""
+        now = now or timezone.now()
+        self.apply_changes(now)
+        self.extend(now)
+        fired = 0
+        while self.heap and self.heap[0][0] <= now:
+            fire_at, task_id, hours, due_date = heapq.heappop(self.heap)
+            current = self.due_dates.get(task_id) == due_date
+            self.release(task_id)
+            if current and due_date > now and self.fire(task_id, hours, due_date):
+                fired += 1
+        return fired
+
+    def run(self, poll_interval=REMINDER_POLL_INTERVAL):
+        """Tick until interrupted, sleeping until the next reminder or poll"""
+        while True:
+            fired = self.tick()
+            if fired:
+                logger.info('Fired %d reminder(s)', fired)
+            delay = poll_interval
+            if self.heap:
+                delay = min(delay, max(0, (self.heap[0][0] - timezone.now()).total_seconds()))
+            time.sleep(delay)
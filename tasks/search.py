@@ -0,0 +1,183 @@
+"""
+Full-text search backends for tasks.
+
+Every backend narrows a (role-scoped) Task queryset to the rows matching a
+search string and annotates them with ``search_rank`` (higher is better),
+so the result can be paginated with ``paginate_by_cursor(field=...)``.
+
+- PostgreSQL: a generated ``search_vector`` tsvector column with a GIN index.
+- SQLite: an FTS5 external-content table kept in sync by triggers.
+- Anything else: the old icontains filter, ordered by creation date.
+
+The PostgreSQL column and the SQLite FTS table are created by migration
+0005 and are not part of the Task model.
+"""
+
+import re
+
+from django.db import DatabaseError, connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .settings import SEARCH_BACKEND
+
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'tasks_task_fts'
+TASK_TABLE = 'tasks_task'
+
+
+class SimpleSearchBackend:
+    """Substring match on title/description; no index support, newest first"""
+
+    ordering_field = 'created_at'
+
+    def search(self, queryset, query):
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+
+
+class PostgresSearchBackend:
+    """Match against the generated search_vector column, ranked with ts_rank"""
+
+    ordering_field = 'search_rank'
+
+    def search(self, queryset, query):
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        matches = RawSQL(f'SELECT id FROM {TASK_TABLE} WHERE search_vector @@ {tsquery}', [query])
+        # ts_rank() is a float4, which the cursor's float8 would not compare equal to at page
+        # boundaries; rounded and widened, the value the cursor carries is exactly the one compared
+        rank = RawSQL(
+            f'round(ts_rank({TASK_TABLE}.search_vector, {tsquery})::numeric, 6)::float8', [query],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+
+class SQLiteFTSSearchBackend:
+    """Match against the FTS5 shadow table, ranked with bm25 (title weighted above description)"""
+
+    ordering_field = 'search_rank'
+
+    def search(self, queryset, query):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return SimpleSearchBackend().search(queryset, query)
+        # Quote every term so user input can never be parsed as FTS5 syntax; prefix-match each one
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+        # bm25() is lower-is-better, negate it so every backend ranks descending
+        rank = RawSQL(
+            f'(SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TASK_TABLE}.id)',
+            [expression],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+
+def sqlite_fts_installed(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def get_search_backend(using='default'):
+    """The backend configured by SEARCH_BACKEND, or the best one the database supports"""
+    if SEARCH_BACKEND:
+        return import_string(SEARCH_BACKEND)()
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite' and sqlite_fts_installed(connection):
+        return SQLiteFTSSearchBackend()
+    return SimpleSearchBackend()
+
+
+def search_tasks(queryset, query, using='default'):
+    """Return (queryset, ordering_field) for the tasks in queryset matching query"""
+    backend = get_search_backend(using)
+    return backend.search(queryset, query), backend.ordering_field
+
+
+POSTGRES_INSTALL_SQL = [
+    f"""
+    ALTER TABLE {TASK_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    f'CREATE INDEX IF NOT EXISTS task_search_vector_idx ON {TASK_TABLE} USING GIN (search_vector)',
+]
+
+POSTGRES_UNINSTALL_SQL = [
+    'DROP INDEX IF EXISTS task_search_vector_idx',
+    f'ALTER TABLE {TASK_TABLE} DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TASK_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TASK_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON {TASK_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+def install_search(connection):
+    """
+    Create (or repair) the database objects backing full-text search.
+
+    Idempotent. On SQLite the triggers are lost whenever a migration rebuilds
+    tasks_task, so this also runs after every migrate and re-indexes when it
+    had to recreate them.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for statement in POSTGRES_INSTALL_SQL:
+                cursor.execute(statement)
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                    f"title, description, content='{TASK_TABLE}', content_rowid='id')"
+                )
+            except DatabaseError:
+                # SQLite built without FTS5: search falls back to SimpleSearchBackend
+                return
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{FTS_TABLE}_%'],
+            )
+            if cursor.fetchone()[0] == len(SQLITE_TRIGGERS_SQL):
+                return
+            for statement in SQLITE_TRIGGERS_SQL:
+                cursor.execute(statement)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search(connection):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for statement in POSTGRES_UNINSTALL_SQL:
+                cursor.execute(statement)
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
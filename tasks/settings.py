@@ -29,6 +29,104 @@ REQUIRE_ASSIGNEE = TASK_MANAGEMENT_TASKS.get('REQUIRE_ASSIGNEE', False)
 AUTO_COMPLETE_ON_STATUS_CHANGE = TASK_MANAGEMENT_TASKS.get('AUTO_COMPLETE_ON_STATUS_CHANGE', True)
 SEND_NOTIFICATIONS = TASK_MANAGEMENT_TASKS.get('SEND_NOTIFICATIONS', False)
 
+# Notifications (see the send_task_notifications command): delivery backend (dotted path), queued
+# notifications sent per batch, failed deliveries before one is given up on, sender address
+# (None: DEFAULT_FROM_EMAIL) and the site root prefixed to task links
+NOTIFICATION_BACKEND = TASK_MANAGEMENT_TASKS.get('NOTIFICATION_BACKEND', 'tasks.notifications.EmailNotificationBackend')
+NOTIFICATION_BATCH_SIZE = TASK_MANAGEMENT_TASKS.get('NOTIFICATION_BATCH_SIZE', 200)
+NOTIFICATION_MAX_ATTEMPTS = TASK_MANAGEMENT_TASKS.get('NOTIFICATION_MAX_ATTEMPTS', 5)
+NOTIFICATION_FROM_EMAIL = TASK_MANAGEMENT_TASKS.get('NOTIFICATION_FROM_EMAIL', None)
+NOTIFICATION_BASE_URL = TASK_MANAGEMENT_TASKS.get('NOTIFICATION_BASE_URL', '')
+
+# Background jobs (tasks.jobs, run by the run_workers command): queue used when a job names none,
+# per-queue options such as {'exports': {'concurrency': 2}} (running jobs across all workers),
+# attempts before a job is marked failed, first retry delay (doubling per attempt) and its cap,
+# seconds a job may run before another worker may claim it, and idle workers' polling interval
+JOB_DEFAULT_QUEUE = TASK_MANAGEMENT_TASKS.get('JOB_DEFAULT_QUEUE', 'default')
+JOB_QUEUES = TASK_MANAGEMENT_TASKS.get('JOB_QUEUES', {})
+JOB_MAX_ATTEMPTS = TASK_MANAGEMENT_TASKS.get('JOB_MAX_ATTEMPTS', 5)
+JOB_RETRY_DELAY = TASK_MANAGEMENT_TASKS.get('JOB_RETRY_DELAY', 10)
+JOB_MAX_RETRY_DELAY = TASK_MANAGEMENT_TASKS.get('JOB_MAX_RETRY_DELAY', 3600)
+JOB_TIMEOUT = TASK_MANAGEMENT_TASKS.get('JOB_TIMEOUT', 300)
+JOB_POLL_INTERVAL = TASK_MANAGEMENT_TASKS.get('JOB_POLL_INTERVAL', 1)
+
+# Due-date reminders (see the schedule_task_reminders command): hours before the due date at which
+# reminders fire, how far ahead (minutes) the scheduler holds them in memory, and how often (seconds)
+# it reads task changes
+REMINDER_HOURS = TASK_MANAGEMENT_TASKS.get('REMINDER_HOURS', [24])
+REMINDER_LOOKAHEAD = TASK_MANAGEMENT_TASKS.get('REMINDER_LOOKAHEAD', 60)
+REMINDER_POLL_INTERVAL = TASK_MANAGEMENT_TASKS.get('REMINDER_POLL_INTERVAL', 30)
+
+# Query instrumentation (tasks.middleware.QueryInstrumentationMiddleware): queries and
+# milliseconds in the database per request before it is logged, times one query may repeat within
+# a request before it is reported as an N+1, and the Server-Timing header. RAISE_ON_N_PLUS_ONE
+# makes N+1s raise instead (default False; tasks.test_runner.TaskTestRunner turns it on for test
+# runs); the middleware reads it per request
+QUERY_BUDGET = TASK_MANAGEMENT_TASKS.get('QUERY_BUDGET', 50)
+QUERY_TIME_BUDGET = TASK_MANAGEMENT_TASKS.get('QUERY_TIME_BUDGET', 200)
+QUERY_REPEAT_THRESHOLD = TASK_MANAGEMENT_TASKS.get('QUERY_REPEAT_THRESHOLD', 5)
+QUERY_SERVER_TIMING = TASK_MANAGEMENT_TASKS.get('QUERY_SERVER_TIMING', True)
+
+# Pagination
+TASK_LIST_PAGE_SIZE = TASK_MANAGEMENT_TASKS.get('TASK_LIST_PAGE_SIZE', 25)
+COMMENT_PAGE_SIZE = TASK_MANAGEMENT_TASKS.get('COMMENT_PAGE_SIZE', 20)
+API_PAGE_SIZE = TASK_MANAGEMENT_TASKS.get('API_PAGE_SIZE', 50)
+API_MAX_PAGE_SIZE = TASK_MANAGEMENT_TASKS.get('API_MAX_PAGE_SIZE', 200)
+
+# Changes feed (TaskEvent): on databases other than SQLite and PostgreSQL, which the feed reads in
+# commit order, events younger than CHANGES_FEED_DELAY seconds are held back so a transaction that
+# took an id earlier but committed later is not skipped by consumers' cursors. That is lossy: keep it
+# above the database's transaction timeout. prune_task_events drops events older than
+# TASK_EVENT_RETENTION_DAYS
+CHANGES_FEED_DELAY = TASK_MANAGEMENT_TASKS.get('CHANGES_FEED_DELAY', 1)
+TASK_EVENT_RETENTION_DAYS = TASK_MANAGEMENT_TASKS.get('TASK_EVENT_RETENTION_DAYS', 30)
+TASK_EVENT_PRUNE_BATCH_SIZE = TASK_MANAGEMENT_TASKS.get('TASK_EVENT_PRUNE_BATCH_SIZE', 5000)
+
+# Bulk actions
+BULK_ACTION_MAX_TASKS = TASK_MANAGEMENT_TASKS.get('BULK_ACTION_MAX_TASKS', 500)
+
+# Archiving (see the archive_tasks command)
+ARCHIVE_AFTER_DAYS = TASK_MANAGEMENT_TASKS.get('ARCHIVE_AFTER_DAYS', 90)
+ARCHIVE_BATCH_SIZE = TASK_MANAGEMENT_TASKS.get('ARCHIVE_BATCH_SIZE', 500)
+
+# Overdue sweep (see the sweep_overdue_tasks command)
+OVERDUE_SWEEP_BATCH_SIZE = TASK_MANAGEMENT_TASKS.get('OVERDUE_SWEEP_BATCH_SIZE', 500)
+
+# Export
+EXPORT_CHUNK_SIZE = TASK_MANAGEMENT_TASKS.get('EXPORT_CHUNK_SIZE', 2000)
+
+# Search backend (dotted path); None picks the best one for the database
+SEARCH_BACKEND = TASK_MANAGEMENT_TASKS.get('SEARCH_BACKEND', None)
+
+# Cache configuration
+CACHE_ALIAS = TASK_MANAGEMENT_TASKS.get('CACHE_ALIAS', 'default')
+CACHE_KEY_PREFIX = TASK_MANAGEMENT_TASKS.get('CACHE_KEY_PREFIX', 'task_management')
+DASHBOARD_CACHE_TIMEOUT = TASK_MANAGEMENT_TASKS.get('DASHBOARD_CACHE_TIMEOUT', 60)
+CHOICES_CACHE_TIMEOUT = TASK_MANAGEMENT_TASKS.get('CHOICES_CACHE_TIMEOUT', 300)
+AUTOCOMPLETE_CACHE_TIMEOUT = TASK_MANAGEMENT_TASKS.get('AUTOCOMPLETE_CACHE_TIMEOUT', 30)
+FRAGMENT_CACHE_TIMEOUT = TASK_MANAGEMENT_TASKS.get('FRAGMENT_CACHE_TIMEOUT', 300)
+
+# Assignee autocomplete
+AUTOCOMPLETE_LIMIT = TASK_MANAGEMENT_TASKS.get('AUTOCOMPLETE_LIMIT', 20)
+AUTOCOMPLETE_MIN_LENGTH = TASK_MANAGEMENT_TASKS.get('AUTOCOMPLETE_MIN_LENGTH', 2)
+
+# Async views: route the dashboard, task list and task detail to their async versions (for ASGI
+# deployments), which run independent queries concurrently unless CONCURRENT_QUERIES is off
+ASYNC_VIEWS = TASK_MANAGEMENT_TASKS.get('ASYNC_VIEWS', False)
+CONCURRENT_QUERIES = TASK_MANAGEMENT_TASKS.get('CONCURRENT_QUERIES', True)
+
+# Live event stream (task_events): heartbeat and maximum stream age in seconds (browsers reconnect
+# and resume), per-stream queue size, events kept for resuming, and the change poller interval
+# for multi-process deployments (None: publish from signals, in-process)
+EVENT_STREAM_HEARTBEAT = TASK_MANAGEMENT_TASKS.get('EVENT_STREAM_HEARTBEAT', 15)
+EVENT_STREAM_MAX_AGE = TASK_MANAGEMENT_TASKS.get('EVENT_STREAM_MAX_AGE', 300)
+EVENT_QUEUE_SIZE = TASK_MANAGEMENT_TASKS.get('EVENT_QUEUE_SIZE', 100)
+EVENT_REPLAY_SIZE = TASK_MANAGEMENT_TASKS.get('EVENT_REPLAY_SIZE', 500)
+EVENT_STREAM_POLL_INTERVAL = TASK_MANAGEMENT_TASKS.get('EVENT_STREAM_POLL_INTERVAL', None)
+# Whether the dashboard and task lists open the stream. Only for ASGI deployments: under WSGI each
+# open stream would hold a worker thread, so task_events answers 204 there and pages stay static
+LIVE_UPDATES = TASK_MANAGEMENT_TASKS.get('LIVE_UPDATES', ASYNC_VIEWS)
+
 # Template configuration
 TASK_TEMPLATE_BASE = TASK_MANAGEMENT_TASKS.get('TASK_TEMPLATE_BASE', 'base.html')
 TASK_TEMPLATE_DIR = TASK_MANAGEMENT_TASKS.get('TASK_TEMPLATE_DIR', 'tasks')
@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Department, User
+
+from . import cache, events
+from .models import Task, TaskArchive, TaskEvent, TaskStats
+from .search import install_search, sqlite_fts_installed
+from .settings import ALLOW_COMMENTS
+
+if ALLOW_COMMENTS:
+    from .models import TaskComment
+
+
+# Set while a caller that does its own TaskStats/cache bookkeeping deletes tasks
+_bookkeeping_skipped = ContextVar('task_bookkeeping_skipped', default=False)
+
+
+@contextmanager
+def skip_task_bookkeeping():
+    """Leave TaskStats and the task caches alone for Task deletes made within the block"""
+    token = _bookkeeping_skipped.set(True)
+    try:
+        yield
+    finally:
+        _bookkeeping_skipped.reset(token)
+
+
+def get_deleted_stats_key(instance):
+    # Task.delete() reads the stored bucket; cascades and queryset deletes load fresh instances
+    stored = getattr(instance, '_deleted_stats_key', None)
+    if stored is not None:
+        return stored
+    loaded = getattr(instance, '_loaded_values', {})
+    return tuple(loaded.get(name, getattr(instance, name)) for name in Task.STATS_FIELDS)
+
+
+def deleted_with_bucket(key, origin):
+    # Deleting a department or an assignee cascades to its TaskStats buckets as well
+    department_id, assigned_to_id, _ = key
+    return (
+        (isinstance(origin, Department) and origin.pk == department_id)
+        or (isinstance(origin, User) and origin.pk == assigned_to_id)
+    )
+
+
+@receiver(post_delete, sender=Task)
+def remove_task_from_stats(sender, instance, origin=None, **kwargs):
+    """Decrement the stats bucket of a deleted task, including cascaded deletes"""
+    if _bookkeeping_skipped.get():
+        return
+    key = get_deleted_stats_key(instance)
+    if not deleted_with_bucket(key, origin):
+        TaskStats.move(key, None)
+
+
+@receiver(post_delete, sender=TaskArchive)
+def remove_archived_task_from_stats(sender, instance, origin=None, **kwargs):
+    """Archived tasks stay counted until their row goes (from the admin, or with its user or department)"""
+    key = instance.stats_key
+    if not deleted_with_bucket(key, origin):
+        TaskStats.move(key, None)
+    transaction.on_commit(lambda: cache.bump_task_scopes(key))
+
+
+@receiver(post_delete, sender=Task)
+def record_task_deleted(sender, instance, using, **kwargs):
+    # Runs inside the delete's transaction; archive_batch records its own events
+    if _bookkeeping_skipped.get():
+        return
+    TaskEvent.record(TaskEvent.for_task(TaskEvent.DELETED, instance, get_deleted_stats_key(instance)), using=using)
+
+
+@receiver(post_save, sender=Task)
+def invalidate_task_caches_on_save(sender, instance, **kwargs):
+    previous_key = getattr(instance, '_previous_stats_key', None)
+    new_key = instance.stats_key
+    # Bump after commit so a concurrent reader cannot re-cache pre-commit data under the new version
+    transaction.on_commit(lambda: cache.bump_task_scopes(previous_key, new_key))
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_task_caches_on_delete(sender, instance, **kwargs):
+    if _bookkeeping_skipped.get():
+        return
+    key = get_deleted_stats_key(instance)
+    transaction.on_commit(lambda: cache.bump_task_scopes(key))
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, **kwargs):
+    previous_key = getattr(instance, '_previous_stats_key', None)
+    if created:
+        event_type = events.TASK_CREATED
+    elif previous_key and previous_key[2] != instance.status:
+        event_type = events.TASK_STATUS
+    else:
+        event_type = events.TASK_UPDATED
+    events.publish_on_commit(events.task_event(event_type, instance, previous_key))
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    # Archiving moves tasks out of the live table without changing what the dashboards count
+    if _bookkeeping_skipped.get():
+        return
+    events.publish_on_commit(events.task_event(events.TASK_DELETED, instance, get_deleted_stats_key(instance)))
+
+
+if ALLOW_COMMENTS:
+    @receiver(post_save, sender=TaskComment)
+    def publish_comment_created(sender, instance, created, **kwargs):
+        if not created or not events.PUBLISH_FROM_SIGNALS:
+            return
+        if sender.task.is_cached(instance):
+            task = instance.task
+        else:
+            task = Task.objects.filter(pk=instance.task_id).values(*events.TASK_EVENT_FIELDS).first()
+        if task is not None:
+            events.publish_on_commit(events.task_event(events.COMMENT_CREATED, task, comment_id=instance.pk))
+
+
+# User fields shown in, or deciding membership of, the cached choice lists
+USER_CHOICE_FIELDS = {'username', 'first_name', 'last_name', 'role', 'department', 'is_active'}
+
+
+def affects_choices(update_fields):
+    # Logins save only last_login; skip those
+    return update_fields is None or bool(USER_CHOICE_FIELDS.intersection(update_fields))
+
+
+@receiver(pre_save, sender=User)
+def remember_user_department(sender, instance, update_fields=None, **kwargs):
+    """Remember the department a user is leaving, whose choice lists change too"""
+    if instance.pk and affects_choices(update_fields):
+        instance._previous_department_id = (
+            User.objects.filter(pk=instance.pk).values_list('department_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=User)
+def invalidate_choices_on_user_save(sender, instance, update_fields=None, **kwargs):
+    if not affects_choices(update_fields):
+        return
+    department_ids = (instance.department_id, getattr(instance, '_previous_department_id', None))
+    transaction.on_commit(lambda: cache.bump_choice_scopes(*department_ids))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_choices_on_user_delete(sender, instance, **kwargs):
+    department_id = instance.department_id
+    transaction.on_commit(lambda: cache.bump_choice_scopes(department_id))
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_choices_on_department_change(sender, instance, **kwargs):
+    department_id = instance.pk
+    transaction.on_commit(lambda: cache.bump_choice_scopes(department_id))
+
+
+@receiver(post_migrate)
+def repair_search_triggers(sender, using, **kwargs):
+    """Reinstall the SQLite FTS triggers dropped when a migration rebuilds tasks_task"""
+    if sender.label != 'tasks':
+        return
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and sqlite_fts_installed(connection):
+        install_search(connection)
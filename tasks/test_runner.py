@@ -0,0 +1,23 @@
+"""
+Test runner that makes QueryInstrumentationMiddleware raise on N+1 queries.
+
+    TEST_RUNNER = 'tasks.test_runner.TaskTestRunner'
+
+Every request a test makes then fails the test if it runs one query
+QUERY_REPEAT_THRESHOLD times or more. A test can still turn it off with
+override_settings(TASK_MANAGEMENT_TASKS={..., 'RAISE_ON_N_PLUS_ONE': False}).
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TaskTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.saved_task_settings = getattr(settings, 'TASK_MANAGEMENT_TASKS', {})
+        settings.TASK_MANAGEMENT_TASKS = {'RAISE_ON_N_PLUS_ONE': True, **self.saved_task_settings}
+
+    def teardown_test_environment(self, **kwargs):
+        settings.TASK_MANAGEMENT_TASKS = self.saved_task_settings
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,1679 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core import mail
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.http import Http404, HttpResponse
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from accounts.models import Department, User
+from task_management.urls_configurable import get_task_management_urls
+from tasks import events
+from tasks.api import API_FIELDS, format_position, parse_position
+from tasks.archive import get_task_or_archived
+from tasks.concurrency import gather_queries
+from tasks.bulk import FORBIDDEN, INVALID, NOT_FOUND, UNCHANGED, UPDATED, apply_bulk_action
+from tasks.choices import ASSIGNEES, USERS, get_department_choices, get_user_search_results, search_users
+from tasks.export import EXPORT_COLUMNS
+from tasks.jobs import Worker, claim, enqueue, finish, job, registry, requeue_expired
+from tasks.forms import TaskForm, TaskStatusForm
+from tasks.middleware import QueryInstrumentationMiddleware, RepeatedQueriesError, fingerprint
+from tasks.models import (
+    Job, Task, TaskArchive, TaskArchiveComment, TaskComment, TaskEvent, TaskNotification, TaskReminder,
+    TaskStats,
+)
+from tasks.notifications import send_batch
+from tasks.overdue import get_due_tasks, sweep_batch
+from tasks.reminders import ReminderScheduler
+from tasks.pagination import decode_cursor, paginate_by_cursor
+from tasks.search import SQLiteFTSSearchBackend, get_search_backend, search_tasks
+from tasks.settings import AUTOCOMPLETE_LIMIT
+from tasks.views import (
+    task_bulk_update, task_comments, task_detail_async, task_events, task_export, task_list_async,
+)
+
+
+# The views and templates reverse un-namespaced URL names; tests that need them use this URLconf
+urlpatterns = get_task_management_urls()
+
+
+class TaskTestCase(TestCase):
+    """The IT department and its manager, which most tests start from, and helpers for the rest"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name='IT')
+        self.manager = self.create_user('manager', role='manager')
+
+    def create_user(self, username, role='employee', **fields):
+        fields.setdefault('department', self.department)
+        return User.objects.create_user(username=username, password='testpass123', role=role, **fields)
+
+    def create_task(self, title='Test Task', **fields):
+        fields.setdefault('description', 'Description')
+        fields.setdefault('department', self.department)
+        fields.setdefault('created_by', self.manager)
+        fields.setdefault('due_date', timezone.now() + timedelta(days=3))
+        return Task.objects.create(title=title, **fields)
+
+
+class TaskQueryPlanTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_user('employee')
+        self.create_task(assigned_to=self.employee)
+
+    def test_view_queries_do_not_full_scan(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan expectations are written against SQLite')
+        out = StringIO()
+        call_command('explain_task_queries', '--fail-on-scan', stdout=out)
+        self.assertIn('No full table scans found', out.getvalue())
+
+
+class TaskStatsTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_user('employee')
+        self.task = self.create_task(assigned_to=self.employee)
+
+    def test_create_counts_task(self):
+        self.assertEqual(TaskStats.get_counts(), {'pending': 1})
+        self.assertEqual(TaskStats.get_counts(assigned_to_id=self.employee.pk), {'pending': 1})
+
+    def test_status_change_moves_bucket(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(TaskStats.get_counts(department_id=self.department.pk), {'pending': 0, 'completed': 1})
+
+    def test_unassign_moves_bucket(self):
+        self.task.assigned_to = None
+        self.task.save()
+        self.assertEqual(TaskStats.get_counts(assigned_to_id=self.employee.pk), {'pending': 0})
+        self.assertEqual(TaskStats.get_counts(assigned_to__isnull=True), {'pending': 1})
+
+    def test_delete_and_cascade_decrement(self):
+        Task.objects.create(
+            title='Second Task',
+            description='Description',
+            created_by=self.manager,
+            department=self.department,
+            due_date=timezone.now() + timedelta(days=7)
+        )
+        self.task.delete()
+        self.assertEqual(TaskStats.get_counts(), {'pending': 1})
+        self.manager.delete()
+        self.assertEqual(TaskStats.get_counts(), {'pending': 0})
+
+    def test_stale_instances_move_the_stored_bucket(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        other = Task.objects.get(pk=self.task.pk)
+        other.status = 'completed'
+        other.save()
+        stale.refresh_from_db()
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(TaskStats.get_counts(), {'pending': 0, 'completed': 1})
+
+        # Two loads of one task both saving the same change count it once
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        for task in (first, second):
+            task.status = 'in_progress'
+            task.save()
+        self.assertEqual(TaskStats.get_counts(), {'pending': 0, 'completed': 0, 'in_progress': 1})
+
+    def test_deleting_a_stale_instance_empties_the_stored_bucket(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        other = Task.objects.get(pk=self.task.pk)
+        other.status = 'completed'
+        other.save()
+        with self.assertNoLogs('tasks.models', 'WARNING'):
+            stale.delete()
+        self.assertEqual(TaskStats.get_counts(), {'pending': 0, 'completed': 0})
+
+    def test_adjust_does_not_go_negative(self):
+        with self.assertLogs('tasks.models', 'WARNING'):
+            TaskStats.adjust((self.department.pk, self.employee.pk, 'pending'), -2)
+        self.assertEqual(TaskStats.get_counts(), {'pending': 1})
+
+    def test_rebuild_detects_and_repairs_drift(self):
+        Task.objects.filter(pk=self.task.pk).update(status='in_progress')
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_stats', '--check', stdout=StringIO())
+        call_command('rebuild_task_stats', stdout=StringIO())
+        self.assertEqual(TaskStats.get_counts(), {'in_progress': 1})
+        call_command('rebuild_task_stats', '--check', stdout=StringIO())
+
+
+class CursorPaginationTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            self.create_task(f'Task {i}', priority='high' if i % 2 else 'low')
+        # Two tasks sharing a timestamp exercise the id tiebreaker
+        Task.objects.filter(title__in=['Task 2', 'Task 3']).update(
+            created_at=Task.objects.get(title='Task 2').created_at
+        )
+        self.expected = list(Task.objects.order_by('-created_at', '-id').values_list('title', flat=True))
+
+    def titles(self, page):
+        return [task.title for task in page]
+
+    def test_walk_forward_and_back(self):
+        first = paginate_by_cursor(Task.objects.all(), page_size=2)
+        self.assertFalse(first.has_previous)
+        second = paginate_by_cursor(Task.objects.all(), first.next_cursor, page_size=2)
+        third = paginate_by_cursor(Task.objects.all(), second.next_cursor, page_size=2)
+        self.assertEqual(self.titles(first) + self.titles(second) + self.titles(third), self.expected)
+        self.assertFalse(third.has_next)
+
+        back = paginate_by_cursor(Task.objects.all(), third.previous_cursor, page_size=2)
+        self.assertEqual(self.titles(back), self.titles(second))
+        back = paginate_by_cursor(Task.objects.all(), back.previous_cursor, page_size=2)
+        self.assertEqual(self.titles(back), self.titles(first))
+        self.assertFalse(back.has_previous)
+
+    def test_filters_apply_to_every_page(self):
+        high = Task.objects.filter(priority='high')
+        first = paginate_by_cursor(high, page_size=1)
+        second = paginate_by_cursor(high, first.next_cursor, page_size=1)
+        self.assertEqual(self.titles(first) + self.titles(second), ['Task 3', 'Task 1'])
+        self.assertFalse(second.has_next)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        page = paginate_by_cursor(Task.objects.all(), 'not-a-cursor', page_size=2)
+        self.assertEqual(self.titles(page), self.expected[:2])
+
+
+class TaskSearchTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_department = Department.objects.create(name='HR')
+        self.other_manager = self.create_user('other_manager', role='manager', department=self.other_department)
+        self.title_match = self.create_task('Database migration', description='Move the data')
+        self.description_match = self.create_task('Cleanup', description='Drop the old database tables')
+        self.create_task('Hiring plan', description='Interview candidates')
+        self.other_match = self.create_task(
+            'Database audit', description='Review access', department=self.other_department,
+            created_by=self.other_manager,
+        )
+
+    def test_results_are_ranked_and_scoped(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Ranking expectations are written against SQLite FTS5')
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+        tasks, field = search_tasks(Task.get_user_tasks(self.manager), 'databas')
+        ranked = list(tasks.order_by(f'-{field}', '-pk'))
+        # Prefix match on both rows, title hit ranked first, other department excluded
+        self.assertEqual(ranked, [self.title_match, self.description_match])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.title_match.title = 'Schema change'
+        self.title_match.save()
+        self.description_match.delete()
+        tasks, _ = search_tasks(Task.get_user_tasks(self.manager), 'database')
+        self.assertEqual(list(tasks), [])
+
+    def test_search_results_paginate_by_rank(self):
+        tasks, field = search_tasks(Task.objects.all(), 'database')
+        first = paginate_by_cursor(tasks, page_size=2, field=field)
+        second = paginate_by_cursor(tasks, first.next_cursor, page_size=2, field=field)
+        seen = [task.pk for task in first] + [task.pk for task in second]
+        self.assertCountEqual(seen, [self.title_match.pk, self.description_match.pk, self.other_match.pk])
+        self.assertFalse(second.has_next)
+
+
+class TaskFastSaveTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_user('employee')
+        self.task = self.create_task(assigned_to=self.employee)
+
+    def test_status_change_writes_only_changed_columns(self):
+        # The completed bucket exists already, as it does for any department past its first task
+        self.create_task('Done', assigned_to=self.employee, status='completed')
+        task = Task.objects.get(pk=self.task.pk)
+        form = TaskStatusForm({'status': 'completed'}, instance=task)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+            form.save()
+        statements = [q['sql'] for q in queries.captured_queries]
+        # SAVEPOINT, the stored stats bucket (locked on PostgreSQL), the narrow UPDATE, the TaskStats
+        # decrement and increment, the TaskEvent INSERT and RELEASE SAVEPOINT
+        self.assertEqual(len(statements), 7)
+        self.assertTrue(statements[1].startswith('SELECT "tasks_task"."department_id"'))
+        self.assertTrue(statements[2].startswith('UPDATE "tasks_task" SET'))
+        for column in ('"title"', '"description"', '"assigned_to_id"', '"department_id"', '"due_date"'):
+            self.assertNotIn(column, statements[2])
+        self.assertTrue(all(sql.startswith('UPDATE "tasks_taskstats"') for sql in statements[3:5]))
+        self.assertTrue(statements[5].startswith('INSERT INTO "tasks_taskevent"'))
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'completed')
+        self.assertIsNotNone(task.completed_at)
+
+    def test_saving_a_deleted_task_inserts_it(self):
+        task = Task.objects.get(pk=self.task.pk)
+        Task.objects.filter(pk=task.pk).delete()
+        task.title = 'Restored'
+        task.save()
+        self.assertEqual(Task.objects.get(pk=task.pk).title, 'Restored')
+
+    def test_reassignment_is_still_validated(self):
+        other_department = Department.objects.create(name='HR')
+        outsider = User.objects.create_user(
+            username='outsider',
+            password='testpass123',
+            role='employee',
+            department=other_department
+        )
+        task = Task.objects.get(pk=self.task.pk)
+        task.assigned_to = outsider
+        with self.assertRaises(ValidationError):
+            task.save()
+
+    def test_explicit_update_fields_include_derived_columns(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.status = 'completed'
+        task.save(update_fields=['status'])
+        task.refresh_from_db()
+        self.assertIsNotNone(task.completed_at)
+
+
+class ImportTasksCommandTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_department = Department.objects.create(name='HR')
+        self.employee = self.create_user('employee', employee_id='E-1')
+        self.outsider = self.create_user('outsider', department=self.other_department)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_csv_import_with_rejections(self):
+        future = (timezone.now() + timedelta(days=3)).isoformat()
+        past = (timezone.now() - timedelta(days=3)).isoformat()
+        path = self.write('tasks.csv', '\n'.join([
+            'title,description,department,created_by,assigned_to,status,priority,due_date',
+            f'Ok,Imported,IT,manager,E-1,completed,high,{future}',
+            f'Unassigned,Imported,IT,manager,,,,{future}',
+            f'Past due,Imported,IT,manager,employee,,,{past}',
+            f'Wrong department,Imported,IT,manager,outsider,,,{future}',
+            f'Unknown,Imported,Nowhere,manager,,,,{future}',
+        ]))
+        call_command('import_tasks', path, '--batch-size', '2', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', flat=True)), ['Ok', 'Unassigned']
+        )
+        self.assertIsNotNone(Task.objects.get(title='Ok').completed_at)
+        self.assertEqual(TaskStats.get_counts(department_id=self.department.pk), {'completed': 1, 'pending': 1})
+        with open(f'{path}.errors.ndjson', encoding='utf-8') as f:
+            rejected = [json.loads(line) for line in f]
+        self.assertEqual([r['line'] for r in rejected], [4, 5, 6])
+        self.assertIn('due_date', rejected[0]['errors'])
+        self.assertIn('assigned_to', rejected[1]['errors'])
+        self.assertIn('department', rejected[2]['errors'])
+
+    def test_import_without_bulk_insert_returning_pks(self):
+        future = (timezone.now() + timedelta(days=3)).isoformat()
+        path = self.write('tasks.csv', '\n'.join([
+            'title,description,department,created_by,assigned_to,status,priority,due_date',
+            f'First,Imported,IT,manager,E-1,,,{future}',
+            f'Second,Imported,IT,manager,,completed,,{future}',
+        ]))
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            call_command('import_tasks', path, stdout=StringIO())
+        tasks = Task.objects.order_by('title')
+        self.assertEqual([task.title for task in tasks], ['First', 'Second'])
+        self.assertEqual(
+            sorted(TaskEvent.objects.filter(type=TaskEvent.CREATED).values_list('task_id', flat=True)),
+            sorted(task.pk for task in tasks),
+        )
+        self.assertEqual(TaskStats.get_counts(department_id=self.department.pk), {'completed': 1, 'pending': 1})
+
+    def test_ndjson_dry_run_inserts_nothing(self):
+        row = {
+            'title': 'Ok', 'description': 'Imported', 'department': str(self.department.pk),
+            'created_by': 'manager', 'due_date': (timezone.now() + timedelta(days=3)).isoformat(),
+        }
+        # Lines that are not JSON, or not JSON objects, are rejected like invalid rows
+        path = self.write('tasks.ndjson', json.dumps(row) + '\nnot json\n42\n[1]\n"x"\n')
+        out = StringIO()
+        call_command('import_tasks', path, '--dry-run', stdout=out)
+        self.assertIn('1 task(s) validated', out.getvalue())
+        self.assertIn('4 row(s) rejected', out.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskExportTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_user('employee')
+        other = Department.objects.create(name='HR')
+        other_manager = self.create_user('other', role='manager', department=other)
+        for i in range(3):
+            self.create_task(
+                f'Mine {i}', description='Exported', assigned_to=self.employee,
+                status='completed' if i == 0 else 'pending',
+            )
+        self.create_task('Unassigned', description='Exported')
+        self.create_task('Elsewhere', description='Hidden', department=other, created_by=other_manager)
+
+    def export(self, user, **params):
+        request = RequestFactory().get('/tasks/export/', params)
+        request.user = user
+        response = task_export(request)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_is_scoped_to_the_user(self):
+        response, content = self.export(self.manager)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        lines = content.splitlines()
+        self.assertEqual(lines[0], ','.join(name for name, _ in EXPORT_COLUMNS))
+        self.assertEqual(len(lines), 5)
+        self.assertNotIn('Elsewhere', content)
+
+        _, content = self.export(self.employee)
+        self.assertEqual(len(content.splitlines()), 4)
+        self.assertNotIn('Unassigned', content)
+
+    def test_ndjson_applies_list_filters(self):
+        response, content = self.export(self.manager, format='ndjson', status='pending')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['status'] for row in rows}, {'pending'})
+        self.assertEqual(rows[0]['department'], 'IT')
+
+    @override_settings(ROOT_URLCONF='tasks.tests')
+    def test_my_tasks_exports_the_users_tasks(self):
+        self.client.force_login(self.manager)
+        self.assertContains(self.client.get('/tasks/my-tasks/'), 'href="/tasks/export/?scope=mine"')
+        _, content = self.export(self.manager, scope='mine')
+        self.assertEqual(len(content.splitlines()), 1)
+        _, content = self.export(self.employee, scope='mine', status='pending')
+        self.assertEqual(len(content.splitlines()), 4)
+
+
+class BulkActionTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_department = Department.objects.create(name='HR')
+        self.employee = self.create_user('employee')
+        self.admin = self.create_user('admin', role='admin', department=None)
+        self.colleague = self.create_user('colleague')
+        other_manager = self.create_user('other', role='manager', department=self.other_department)
+        self.tasks = [
+            self.create_task(f'Task {i}', description='Bulk', assigned_to=self.employee) for i in range(5)
+        ]
+        self.elsewhere = self.create_task(
+            'Elsewhere', description='Bulk', department=self.other_department, created_by=other_manager,
+        )
+
+    def assertStatsMatchTasks(self):
+        for department in (self.department, self.other_department):
+            actual = Counter(Task.objects.filter(department=department).values_list('status', flat=True))
+            counts = {status: n for status, n in TaskStats.get_counts(department=department).items() if n}
+            self.assertEqual(counts, dict(actual))
+
+    def test_set_status_is_set_based(self):
+        ids = [task.pk for task in self.tasks] + [self.elsewhere.pk, 999999]
+        with CaptureQueriesContext(connection) as queries:
+            outcomes = apply_bulk_action(self.manager, ids, 'set_status', 'completed')
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(outcomes[self.elsewhere.pk], FORBIDDEN)
+        self.assertEqual(outcomes[999999], NOT_FOUND)
+        self.assertEqual({outcomes[task.pk] for task in self.tasks}, {UPDATED})
+        completed = Task.objects.filter(pk__in=[task.pk for task in self.tasks])
+        self.assertFalse(completed.exclude(status='completed').exists())
+        self.assertFalse(completed.filter(completed_at__isnull=True).exists())
+        self.assertEqual(Task.objects.get(pk=self.elsewhere.pk).status, 'pending')
+        self.assertStatsMatchTasks()
+
+        # Re-completing keeps the completion time; reopening clears it
+        completed_at = Task.objects.get(pk=self.tasks[0].pk).completed_at
+        outcomes = apply_bulk_action(self.manager, [self.tasks[0].pk], 'set_status', 'completed')
+        self.assertEqual(outcomes[self.tasks[0].pk], UNCHANGED)
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).completed_at, completed_at)
+        apply_bulk_action(self.employee, [self.tasks[0].pk], 'set_status', 'in_progress')
+        self.assertIsNone(Task.objects.get(pk=self.tasks[0].pk).completed_at)
+        self.assertStatsMatchTasks()
+
+    def test_reassign_stays_within_department(self):
+        ids = [self.tasks[0].pk, self.elsewhere.pk]
+        outcomes = apply_bulk_action(self.admin, ids, 'reassign', self.colleague)
+        self.assertEqual(outcomes, {self.tasks[0].pk: UPDATED, self.elsewhere.pk: INVALID})
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).assigned_to, self.colleague)
+        self.assertEqual(TaskStats.get_counts(assigned_to=self.colleague), {'pending': 1})
+        self.assertStatsMatchTasks()
+
+        outcomes = apply_bulk_action(self.employee, [self.tasks[1].pk], 'set_priority', 'high')
+        self.assertEqual(outcomes, {self.tasks[1].pk: FORBIDDEN})
+
+    def test_view_reports_outcomes_as_json(self):
+        request = RequestFactory().post(
+            '/tasks/bulk/',
+            {'task_ids': [self.tasks[0].pk, self.elsewhere.pk], 'operation': 'set_priority', 'priority': 'high'},
+            HTTP_ACCEPT='application/json',
+        )
+        request.user = self.manager
+        response = task_bulk_update(request)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = json.loads(response.content)
+        self.assertEqual(data['results'], {str(self.tasks[0].pk): UPDATED, str(self.elsewhere.pk): FORBIDDEN})
+        self.assertEqual(data['counts'], {UPDATED: 1, FORBIDDEN: 1})
+
+        request = RequestFactory().post(
+            '/tasks/bulk/', {'task_ids': 'x', 'operation': 'set_status'}, HTTP_ACCEPT='application/json'
+        )
+        request.user = self.manager
+        self.assertEqual(task_bulk_update(request).status_code, 400)
+
+
+class ArchiveTasksCommandTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tasks = [
+            self.create_task(f'Task {i}', description='Archive', status='completed') for i in range(5)
+        ]
+        self.open_task = self.create_task('Open', description='Archive')
+        TaskComment.objects.create(task=self.tasks[0], author=self.manager, content='Done')
+        # Four old completions, one recent
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks[:4]]).update(
+            completed_at=timezone.now() - timedelta(days=100)
+        )
+
+    def test_archives_old_completed_tasks_in_batches(self):
+        stats_before = TaskStats.get_counts(department=self.department)
+        out = StringIO()
+        call_command('archive_tasks', '--days', '90', '--batch-size', '3', stdout=out)
+        self.assertIn('4 task(s) archived in 2 batch(es)', out.getvalue())
+
+        archived_ids = {task.pk for task in self.tasks[:4]}
+        self.assertEqual(set(TaskArchive.objects.values_list('pk', flat=True)), archived_ids)
+        self.assertFalse(Task.objects.filter(pk__in=archived_ids).exists())
+        self.assertTrue(Task.objects.filter(pk=self.tasks[4].pk).exists())
+        comment = TaskArchiveComment.objects.get()
+        self.assertEqual((comment.task_id, comment.content), (self.tasks[0].pk, 'Done'))
+        self.assertFalse(TaskComment.objects.exists())
+
+        # Archived tasks stay counted, and the rebuild agrees
+        self.assertEqual(TaskStats.get_counts(department=self.department), stats_before)
+        call_command('rebuild_task_stats', '--check', stdout=StringIO())
+
+    def test_deleting_archived_tasks_uncounts_them(self):
+        call_command('archive_tasks', '--days', '90', stdout=StringIO())
+        TaskArchive.objects.get(pk=self.tasks[0].pk).delete()
+        self.assertEqual(TaskStats.get_counts(department=self.department), {'completed': 4, 'pending': 1})
+        # Cascaded from the creator, whose buckets (by assignee) stay
+        creator = self.create_user('creator', role='manager')
+        TaskArchive.objects.filter(pk=self.tasks[1].pk).update(created_by=creator)
+        creator.delete()
+        self.assertEqual(TaskStats.get_counts(department=self.department), {'completed': 3, 'pending': 1})
+        # Cascaded from the department, whose buckets go with it
+        with self.assertNoLogs('tasks.models', 'WARNING'):
+            self.department.delete()
+        self.assertFalse(TaskStats.objects.exists())
+        call_command('rebuild_task_stats', '--check', stdout=StringIO())
+
+    def test_archived_tasks_resolve_and_merge_into_pages(self):
+        call_command('archive_tasks', '--days', '90', stdout=StringIO())
+        archived = get_task_or_archived(self.tasks[0].pk)
+        self.assertTrue(archived.is_archived)
+        self.assertEqual(archived.comments.count(), 1)
+        self.assertFalse(get_task_or_archived(self.open_task.pk).is_archived)
+        with self.assertRaises(Http404):
+            get_task_or_archived(999999)
+
+        querysets = [Task.objects.all(), TaskArchive.objects.all()]
+        expected = [task.pk for task in (self.tasks + [self.open_task])][::-1]
+        page = paginate_by_cursor(querysets, page_size=4)
+        self.assertEqual([task.pk for task in page], expected[:4])
+        page = paginate_by_cursor(querysets, page.next_cursor, page_size=4)
+        self.assertEqual([task.pk for task in page], expected[4:])
+        page = paginate_by_cursor(querysets, page.previous_cursor, page_size=4)
+        self.assertEqual([task.pk for task in page], expected[:4])
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class TaskCommentThreadTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.outsider = self.create_user('outsider')
+        self.task = self.create_task('Chatty', description='Comments')
+        self.comments = [
+            TaskComment.objects.create(task=self.task, author=self.manager, content=f'Comment {i}')
+            for i in range(45)
+        ]
+        self.factory = RequestFactory()
+
+    def get(self, url, user=None, **headers):
+        request = self.factory.get(url, **headers)
+        request.user = user or self.manager
+        return task_comments(request, pk=self.task.pk)
+
+    def test_pages_walk_back_through_the_thread(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(f'/tasks/{self.task.pk}/comments/', HTTP_ACCEPT='application/json')
+        self.assertLessEqual(len(queries), 2)
+        data = json.loads(response.content)
+        self.assertEqual([c['content'] for c in data['comments']], [f'Comment {i}' for i in range(44, 24, -1)])
+        self.assertIn('data-load-comments', data['html'])
+
+        seen = [c['id'] for c in data['comments']]
+        while data['next_url']:
+            data = json.loads(self.get(data['next_url'], HTTP_ACCEPT='application/json').content)
+            seen += [c['id'] for c in data['comments']]
+        self.assertEqual(seen, [comment.pk for comment in reversed(self.comments)])
+
+        # The HTML fragment is the default
+        response = self.get(f'/tasks/{self.task.pk}/comments/')
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        self.assertContains(response, 'id="comment-', count=20)
+
+    def test_post_returns_the_new_comment_fragment(self):
+        request = self.factory.post(f'/tasks/{self.task.pk}/comments/', {'content': 'Fresh'})
+        request.user = self.manager
+        response = task_comments(request, pk=self.task.pk)
+        self.assertEqual(response.status_code, 201)
+        comment = TaskComment.objects.get(content='Fresh')
+        self.assertContains(response, f'id="comment-{comment.pk}"', status_code=201)
+        self.assertNotContains(response, 'Comment 44', status_code=201)
+
+        request = self.factory.post(f'/tasks/{self.task.pk}/comments/', {'content': ''})
+        request.user = self.manager
+        self.assertEqual(task_comments(request, pk=self.task.pk).status_code, 400)
+
+    def test_thread_is_hidden_from_unrelated_employees(self):
+        with self.assertRaises(PermissionDenied):
+            self.get(f'/tasks/{self.task.pk}/comments/', user=self.outsider)
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class TaskPageQueryCountTest(TaskTestCase):
+    """The number of queries per page must not grow with the number of rows shown"""
+
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_user('employee')
+        self.admin = self.create_user('admin', role='admin', department=None)
+        due = timezone.now() + timedelta(days=3)
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}', description='Counted', department=self.department,
+                created_by=self.manager, assigned_to=self.employee, due_date=due,
+            )
+            for i in range(100)
+        ])
+        self.task = Task.objects.first()
+        TaskComment.objects.bulk_create([
+            TaskComment(task=self.task, author=self.employee, content=f'Comment {i}')
+            for i in range(100)
+        ])
+        self.client = Client()
+        cache.clear()
+
+    def assertPageQueries(self, user, url, expected):
+        self.client.force_login(user)
+        # Session and user lookups are part of every request
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_task_list(self):
+        # session, user, ETag validators, page of tasks with their related rows;
+        # assignee widgets search on demand
+        response = self.assertPageQueries(self.manager, '/tasks/', 4)
+        self.assertEqual(len(response.context['tasks']), 25)
+        self.assertEqual(len(response.context['editable_task_ids']), 25)
+        self.assertPageQueries(self.admin, '/tasks/', 4)
+        self.assertPageQueries(self.employee, '/tasks/', 4)
+
+    def test_task_detail(self):
+        # session, user, ETag validators (task, comments), task with its related rows,
+        # comment page, comment count
+        url = f'/tasks/{self.task.pk}/'
+        response = self.assertPageQueries(self.manager, url, 7)
+        self.assertTrue(response.context['can_edit'])
+        response = self.assertPageQueries(self.employee, url, 7)
+        self.assertFalse(response.context['can_edit'])
+        self.assertTrue(response.context['can_update_status'])
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class TaskChoicesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.it = Department.objects.create(name='IT')
+        self.hr = Department.objects.create(name='HR')
+        self.admin = User.objects.create_user(username='admin', password='testpass123', role='admin')
+        self.manager = User.objects.create_user(
+            username='manager', password='testpass123', role='manager', department=self.it
+        )
+        self.alice = User.objects.create_user(
+            username='alice', password='testpass123', role='employee', department=self.it,
+            first_name='Alice', last_name='Smith', employee_id='E-100',
+        )
+        self.bob = User.objects.create_user(
+            username='bob', password='testpass123', role='employee', department=self.hr,
+            first_name='Bob', last_name='Alvarez',
+        )
+
+    def search(self, user, term, kind=ASSIGNEES):
+        return [result['value'] for result in get_user_search_results(user, term, kind)['results']]
+
+    def test_search_matches_prefixes(self):
+        self.assertEqual(self.search(self.admin, 'ali'), ['alice'])
+        self.assertEqual(self.search(self.admin, 'SMI'), ['alice'])
+        self.assertEqual(self.search(self.admin, 'e-1'), ['alice'])
+        self.assertEqual(self.search(self.admin, 'alice  sm'), ['alice'])
+        self.assertEqual(sorted(self.search(self.admin, 'al')), ['alice', 'bob'])
+        self.assertEqual(self.search(self.admin, 'lice'), [])
+
+    def test_search_is_scoped(self):
+        self.assertEqual(self.search(self.manager, 'bo'), [])
+        self.assertEqual(self.search(self.manager, 'ma', kind=USERS), ['manager'])
+        self.assertEqual(self.search(self.manager, 'ma'), [])
+        self.assertEqual(self.search(self.alice, 'al'), [])
+        self.assertEqual(get_user_search_results(self.admin, 'a'), {'results': [], 'more': False})
+
+    def test_search_is_limited(self):
+        User.objects.bulk_create([
+            User(username=f'zed{i}', role='employee', department=self.it) for i in range(25)
+        ])
+        results = get_user_search_results(self.admin, 'zed')
+        self.assertEqual(len(results['results']), AUTOCOMPLETE_LIMIT)
+        self.assertTrue(results['more'])
+
+    def test_search_is_cached_and_invalidated(self):
+        self.search(self.admin, 'ali')
+        with self.assertNumQueries(0):
+            self.search(self.admin, 'ALI')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.username = 'alicia'
+            self.alice.save()
+        self.assertEqual(self.search(self.admin, 'ali'), ['alicia'])
+
+    def test_search_view(self):
+        self.client.force_login(self.manager)
+        response = self.client.get('/tasks/users/', {'q': 'al', 'kind': 'users'})
+        self.assertEqual(response.json(), {
+            'results': [{'id': self.alice.pk, 'value': 'alice', 'label': 'Alice Smith'}],
+            'more': False,
+        })
+        self.client.force_login(self.alice)
+        self.assertEqual(self.client.get('/tasks/users/', {'q': 'al'}).status_code, 403)
+
+    def test_search_uses_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan expectations are written against SQLite')
+        plan = search_users(User.objects.all(), 'alice sm').explain()
+        self.assertNotRegex(plan, r'SCAN (TABLE )?accounts_user\b')
+
+    def test_form_takes_typed_names(self):
+        data = {
+            'title': 'Typed', 'description': 'Typed', 'department': self.it.pk, 'priority': 'low',
+            'due_date': (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M'),
+        }
+        for value in ('alice', 'E-100', str(self.alice.pk)):
+            form = TaskForm(user=self.manager, data={**data, 'assigned_to': value})
+            self.assertTrue(form.is_valid(), form.errors)
+            self.assertEqual(form.cleaned_data['assigned_to'], self.alice)
+        # Out of the manager's scope
+        form = TaskForm(user=self.manager, data={**data, 'assigned_to': 'bob'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('assigned_to', form.errors)
+
+    def test_form_renders_text_input(self):
+        task = Task.objects.create(
+            title='Edit', description='Edit', department=self.it, created_by=self.manager,
+            assigned_to=self.alice, due_date=timezone.now() + timedelta(days=1),
+        )
+        html = str(TaskForm(instance=task, user=self.manager)['assigned_to'])
+        self.assertIn('value="alice"', html)
+        self.assertIn('data-autocomplete-url="/tasks/users/?kind=assignees"', html)
+        self.assertIn('<datalist id="id_assigned_to-options">', html)
+        self.assertNotIn('<option', html)
+
+    def test_list_filter_takes_typed_names(self):
+        Task.objects.create(
+            title='Filtered', description='Filtered', department=self.it, created_by=self.manager,
+            assigned_to=self.alice, due_date=timezone.now() + timedelta(days=1),
+        )
+        self.client.force_login(self.manager)
+        for value, expected in (('alice', 1), ('e-100', 1), (str(self.alice.pk), 1), ('bob', 0)):
+            response = self.client.get('/tasks/', {'assigned_to': value})
+            self.assertEqual(len(response.context['tasks']), expected, value)
+
+    def test_department_choices_are_cached(self):
+        self.assertEqual(get_department_choices(self.manager.permissions), [(self.it.pk, 'IT')])
+        get_department_choices(self.admin.permissions)
+        with self.assertNumQueries(0):
+            str(TaskForm(user=self.admin)['department'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hr.name = 'People'
+            self.hr.save()
+        self.assertIn((self.hr.pk, 'People'), get_department_choices(self.admin.permissions))
+
+    def test_login_does_not_invalidate(self):
+        self.search(self.admin, 'ali')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.login(username='alice', password='testpass123')
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.search(self.admin, 'ali')
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class TaskListFragmentCacheTest(TaskTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.admin = self.create_user('admin', role='admin', department=None)
+        self.employee = self.create_user('employee', first_name='Erin', last_name='Doe')
+        self.task = self.create_task('Cached row', description='Cached', assigned_to=self.employee)
+
+    def get_list(self, user):
+        self.client.force_login(user)
+        return self.client.get('/tasks/').content.decode()
+
+    def test_edits_are_not_served_stale(self):
+        self.assertIn('Cached row', self.get_list(self.manager))
+        self.task.title = 'Renamed row'
+        self.task.save()
+        html = self.get_list(self.manager)
+        self.assertIn('Renamed row', html)
+        self.assertNotIn('Cached row', html)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.first_name = 'Erica'
+            self.employee.save()
+        self.assertIn('Erica Doe', self.get_list(self.manager))
+
+    def test_rows_vary_on_viewer_permissions(self):
+        edit_url = f'/tasks/{self.task.pk}/update/'
+        self.assertIn(edit_url, self.get_list(self.admin))
+        html = self.get_list(self.employee)
+        self.assertIn('Cached row', html)
+        self.assertNotIn(edit_url, html)
+        self.assertNotIn('<td>Erin Doe</td>', html)
+
+    def test_rows_vary_on_overdue(self):
+        self.get_list(self.manager)
+        Task.objects.filter(pk=self.task.pk).update(due_date=timezone.now() - timedelta(days=1))
+        call_command('sweep_overdue_tasks', stdout=StringIO())
+        self.assertIn('Overdue', self.get_list(self.manager))
+
+    def test_table_is_served_from_cache(self):
+        self.client.force_login(self.manager)
+        response = self.client.get('/tasks/')
+        table_key = make_template_fragment_key('task_table', [response.context['table_cache_key']])
+        row_key = make_template_fragment_key('task_row', [response.context['tasks'][0].row_cache_key])
+        self.assertIn('Cached row', cache.get(table_key))
+        self.assertIn('Cached row', cache.get(row_key))
+        # With the table cached, the rows are not looked up at all
+        cache.delete(row_key)
+        self.assertContains(self.client.get('/tasks/'), 'Cached row')
+        self.assertIsNone(cache.get(row_key))
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class ConditionalGetTest(TaskTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.employee = self.create_user('employee')
+        self.task = self.create_task('Validated', description='Validated', assigned_to=self.employee)
+        self.client.force_login(self.manager)
+
+    def revalidate(self, url, response, expected_status):
+        """GET url again with the validators of an earlier response"""
+        again = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(again.status_code, expected_status)
+        return again
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get('/tasks/')
+        self.assertIn('private', response['Cache-Control'])
+        # session, user and the validator aggregate only
+        with self.assertNumQueries(3):
+            self.revalidate('/tasks/', response, 304)
+
+    def test_list_changes_are_modified(self):
+        response = self.client.get('/tasks/')
+        self.task.title = 'Edited'
+        self.task.save()
+        response = self.revalidate('/tasks/', response, 200)
+
+        other = Task.objects.create(
+            title='Other', description='Other', department=self.department, created_by=self.manager,
+            due_date=timezone.now() + timedelta(days=3),
+        )
+        response = self.revalidate('/tasks/', response, 200)
+        # Deleting a task leaves max(updated_at) as it was
+        other.delete()
+        response = self.revalidate('/tasks/', response, 200)
+
+        # Falling due changes the page once the sweeper flags the task
+        Task.objects.filter(pk=self.task.pk).update(due_date=timezone.now() - timedelta(hours=1))
+        response = self.revalidate('/tasks/', response, 304)
+        call_command('sweep_overdue_tasks', stdout=StringIO())
+        self.revalidate('/tasks/', response, 200)
+
+    def test_list_validators_follow_filters_and_viewer(self):
+        response = self.client.get('/tasks/')
+        self.assertNotEqual(self.client.get('/tasks/', {'status': 'completed'})['ETag'], response['ETag'])
+        self.client.force_login(self.employee)
+        self.revalidate('/tasks/', response, 200)
+        self.assertNotIn('ETag', self.client.get('/tasks/', {'search': 'Validated'}))
+
+    def test_detail(self):
+        url = f'/tasks/{self.task.pk}/'
+        response = self.client.get(url)
+        self.revalidate(url, response, 304)
+        TaskComment.objects.create(task=self.task, author=self.employee, content='New')
+        response = self.revalidate(url, response, 200)
+        self.revalidate(url, response, 304)
+
+    def test_detail_permission_checks_still_apply(self):
+        outsider = User.objects.create_user(username='outsider', password='testpass123', role='employee')
+        url = f'/tasks/{self.task.pk}/'
+        response = self.client.get(url)
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 403)
+
+    def test_pending_messages_are_always_rendered(self):
+        response = self.client.get('/tasks/')
+        self.client.post(f'/tasks/{self.task.pk}/', {'content': 'Comment'})
+        again = self.client.get('/tasks/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertContains(again, 'Comment added successfully.')
+        self.revalidate('/tasks/', response, 304)
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class TaskAPITest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_user('employee')
+        other = Department.objects.create(name='HR')
+        other_manager = self.create_user('other', role='manager', department=other)
+        self.tasks = [
+            self.create_task(f'Task {i}', description='Listed', assigned_to=self.employee if i % 2 else None)
+            for i in range(5)
+        ]
+        self.hidden = self.create_task('Elsewhere', description='Hidden', department=other, created_by=other_manager)
+        self.client.force_login(self.manager)
+
+    def test_list_is_scoped_and_paginated(self):
+        response = self.client.get('/tasks/api/', {'limit': 3})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertNotIn(b', ', response.content)
+        data = response.json()
+        self.assertEqual([row['title'] for row in data['results']], ['Task 4', 'Task 3', 'Task 2'])
+        self.assertEqual(set(data['results'][0]), set(API_FIELDS))
+        self.assertIsNone(data['previous'])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual([row['title'] for row in data['results']], ['Task 1', 'Task 0'])
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(data['previous'])
+
+        self.client.force_login(self.employee)
+        data = self.client.get('/tasks/api/', {'fields': 'title'}).json()
+        self.assertEqual(data['results'], [{'title': 'Task 3'}, {'title': 'Task 1'}])
+
+    def test_sparse_fields_only_fetch_their_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/tasks/api/', {'fields': 'id,status', 'status': 'pending'}).json()
+        self.assertEqual(data['results'][0], {'id': self.tasks[4].pk, 'status': 'pending'})
+        sql = queries[-1]['sql']
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('JOIN', sql)
+
+        data = self.client.get('/tasks/api/', {'fields': 'title,department,assigned_to'}).json()
+        self.assertEqual(data['results'][1], {'title': 'Task 3', 'department': 'IT', 'assigned_to': 'employee'})
+
+    def test_detail(self):
+        task = self.tasks[1]
+        response = self.client.get(f'/tasks/api/{task.pk}/', {'fields': 'id,assigned_to'})
+        self.assertEqual(response.json(), {'id': task.pk, 'assigned_to': 'employee'})
+        self.assertEqual(self.client.get(f'/tasks/api/{self.hidden.pk}/').status_code, 404)
+
+    def test_errors_are_json(self):
+        response = self.client.get('/tasks/api/', {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown fields: secret'})
+        self.client.logout()
+        self.assertEqual(self.client.get('/tasks/api/').status_code, 401)
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class AsyncViewsTest(TaskTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.employee = self.create_user('employee')
+        self.outsider = self.create_user('outsider', department=None)
+        self.task = self.create_task('Async task', description='Served async', assigned_to=self.employee)
+        TaskComment.objects.create(task=self.task, author=self.employee, content='Live comment')
+
+    def get(self, view, user, path, *args):
+        request = AsyncRequestFactory().get(path)
+        request.user = user
+        return view(request, *args)
+
+    async def test_task_list(self):
+        request = AsyncRequestFactory().get('/tasks/')
+        request.user = self.manager
+        response = await task_list_async(request)
+        self.assertContains(response, 'Async task')
+        self.assertIn('private', response['Cache-Control'])
+
+        again = AsyncRequestFactory().get('/tasks/', headers={'If-None-Match': response['ETag']})
+        again.user = self.manager
+        # As CsrfViewMiddleware would from the cookie set by the first response
+        again.META['CSRF_COOKIE'] = request.META['CSRF_COOKIE']
+        self.assertEqual((await task_list_async(again)).status_code, 304)
+
+    async def test_task_detail(self):
+        response = await self.get(task_detail_async, self.employee, f'/tasks/{self.task.pk}/', self.task.pk)
+        self.assertContains(response, 'Live comment')
+        with self.assertRaises(PermissionDenied):
+            await self.get(task_detail_async, self.outsider, f'/tasks/{self.task.pk}/', self.task.pk)
+        with self.assertRaises(Http404):
+            await self.get(task_detail_async, self.manager, '/tasks/0/', 0)
+
+    async def test_archived_task_detail(self):
+        await sync_to_async(call_command)('archive_tasks', days=0, stdout=StringIO())
+        response = await self.get(task_detail_async, self.manager, f'/tasks/{self.task.pk}/', self.task.pk)
+        self.assertContains(response, 'Async task')
+
+    @override_settings(LOGIN_URL='/login/')
+    async def test_anonymous_users_are_redirected(self):
+        response = await self.get(task_list_async, AnonymousUser(), '/tasks/')
+        self.assertEqual(response.status_code, 302)
+
+
+class GatherQueriesTest(TransactionTestCase):
+    def test_queries_run_concurrently_on_separate_connections(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def query():
+            # Both calls must be running at once to get past the barrier
+            barrier.wait()
+            return threading.get_ident(), Task.objects.count()
+
+        results = async_to_sync(gather_queries)(query, query)
+        self.assertEqual([count for _, count in results], [0, 0])
+        self.assertNotEqual(results[0][0], results[1][0])
+        self.assertNotIn(threading.get_ident(), {ident for ident, _ in results})
+
+    def test_queries_in_a_transaction_use_its_connection(self):
+        with transaction.atomic():
+            Department.objects.create(name='Uncommitted')
+            results = async_to_sync(gather_queries)(
+                lambda: threading.get_ident(), lambda: Department.objects.count(),
+            )
+        self.assertEqual(results, [threading.get_ident(), 1])
+
+    def test_worker_queries_count_towards_the_request(self):
+        async def view(request):
+            counts = await gather_queries(Task.objects.count, Department.objects.count)
+            return HttpResponse(str(counts))
+
+        middleware = QueryInstrumentationMiddleware(view)
+        response = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class TaskEventsTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_department = Department.objects.create(name='HR')
+        self.employee = self.create_user('employee')
+        self.other_manager = self.create_user('other', role='manager', department=self.other_department)
+        self.colleague = self.create_user('colleague')
+        self.broker = events.EventBroker()
+        patcher = mock.patch('tasks.events.broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_task(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().create_task('Live', description='Live', assigned_to=self.employee, **fields)
+
+    def last_event(self):
+        return self.broker.recent[-1]
+
+    def test_signals_publish_scoped_events(self):
+        task = self.create_task()
+        event = self.last_event()
+        self.assertEqual(event['type'], events.TASK_CREATED)
+        self.assertEqual(event['task']['id'], task.pk)
+        self.assertTrue(events.visible_to(self.manager.permissions, event))
+        self.assertTrue(events.visible_to(self.employee.permissions, event))
+        self.assertFalse(events.visible_to(self.other_manager.permissions, event))
+        self.assertFalse(events.visible_to(self.colleague.permissions, event))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = 'in_progress'
+            task.save()
+        self.assertEqual(self.last_event()['type'], events.TASK_STATUS)
+
+        # Reassigning tells the previous assignee too, so the task leaves their pages
+        with self.captureOnCommitCallbacks(execute=True):
+            task.assigned_to = self.colleague
+            task.save()
+        event = self.last_event()
+        self.assertEqual(event['type'], events.TASK_UPDATED)
+        self.assertTrue(events.visible_to(self.employee.permissions, event))
+        self.assertTrue(events.visible_to(self.colleague.permissions, event))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskComment.objects.create(task=task, author=self.colleague, content='Hello')
+        self.assertEqual(self.last_event()['type'], events.COMMENT_CREATED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_bulk_action(self.manager, [task.pk], 'set_status', 'completed')
+        self.assertEqual(self.last_event()['type'], events.TASK_STATUS)
+        self.assertEqual(self.last_event()['task']['status'], 'completed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertEqual(self.last_event()['type'], events.TASK_DELETED)
+        self.assertEqual([event['id'] for event in self.broker.recent], [1, 2, 3, 4, 5, 6])
+
+    async def test_subscriptions_get_the_events_they_may_see(self):
+        subscription = self.broker.subscribe(self.other_manager.permissions)
+        hidden = events.task_event(events.TASK_UPDATED, self.task_data(self.department.pk))
+        shown = events.task_event(events.TASK_UPDATED, self.task_data(self.other_department.pk))
+        self.broker.publish(hidden)
+        self.broker.publish(shown)
+        event = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(event['id'], 2)
+        self.assertTrue(subscription.queue.empty())
+        self.broker.unsubscribe(subscription)
+        self.assertFalse(self.broker.subscriptions)
+
+    async def test_resuming_and_overflow(self):
+        for _ in range(3):
+            self.broker.publish(events.task_event(events.TASK_UPDATED, self.task_data(self.department.pk)))
+        resumed = self.broker.subscribe(self.manager.permissions, last_event_id=1)
+        self.assertEqual([resumed.queue.get_nowait()['id'] for _ in range(2)], [2, 3])
+        # An id this process never issued: the client must reload
+        restarted = self.broker.subscribe(self.manager.permissions, last_event_id=40)
+        self.assertEqual(restarted.queue.get_nowait()['type'], events.RESET)
+
+        with mock.patch('tasks.events.EVENT_QUEUE_SIZE', 2):
+            slow = events.Subscription(self.manager.permissions, asyncio.get_running_loop())
+        for i in range(3):
+            slow.put({'id': i, 'type': events.TASK_UPDATED})
+        self.assertEqual(slow.queue.get_nowait()['type'], events.RESET)
+        self.assertTrue(slow.queue.empty())
+
+    def test_change_poller(self):
+        with mock.patch('tasks.events.EVENT_STREAM_POLL_INTERVAL', 5):
+            poller = events.ChangePoller()
+            task = self.create_task()
+            TaskComment.objects.create(task=task, author=self.employee, content='Polled')
+            found = poller.poll()
+            self.assertEqual([event['type'] for event in found], [events.TASK_CREATED, events.COMMENT_CREATED])
+            self.assertEqual(poller.poll(), [])
+            Task.objects.filter(pk=task.pk).update(title='Edited', updated_at=timezone.now())
+            self.assertEqual([event['type'] for event in poller.poll()], [events.TASK_UPDATED])
+
+    def test_stream_is_off_under_wsgi(self):
+        self.client.force_login(self.employee)
+        self.assertNotIn('data-live-url="', self.client.get('/tasks/').content.decode())
+        with mock.patch('tasks.views.LIVE_UPDATES', True):
+            self.assertIn('data-live-url="', self.client.get('/tasks/', {'priority': 'high'}).content.decode())
+            # 204 tells EventSource to stop rather than hold a WSGI worker for the stream
+            self.assertEqual(self.client.get('/tasks/events/').status_code, 204)
+
+    @mock.patch('tasks.views.LIVE_UPDATES', True)
+    @mock.patch('tasks.views.EVENT_STREAM_MAX_AGE', 0.5)
+    async def test_stream(self):
+        request = AsyncRequestFactory().get('/tasks/events/')
+        request.user = self.employee
+        response = await task_events(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), f'retry: {events.RETRY_MS}\n\n'.encode())
+
+        next_chunk = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        self.broker.publish(events.task_event(events.TASK_CREATED, self.task_data(self.department.pk)))
+        chunk = (await asyncio.wait_for(next_chunk, 1)).decode()
+        self.assertTrue(chunk.startswith('id: 1\ndata: {"type":"task.created","task":{"id":1,'))
+        self.assertNotIn('scope', chunk)
+        # Streams end by themselves, and unsubscribe, after EVENT_STREAM_MAX_AGE
+        self.assertEqual([chunk async for chunk in stream], [])
+        self.assertFalse(self.broker.subscriptions)
+
+    def task_data(self, department_id):
+        return {
+            'id': 1, 'title': 'Event', 'status': 'pending', 'priority': 'medium',
+            'department_id': department_id, 'assigned_to_id': self.employee.pk, 'updated_at': timezone.now(),
+        }
+
+
+class TaskChangesFeedTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_department = Department.objects.create(name='HR')
+        self.employee = self.create_user('employee')
+        self.admin = self.create_user('admin', role='admin', department=None)
+        self.other_manager = self.create_user('other', role='manager', department=self.other_department)
+        self.task = self.create_task('Tracked', description='Outbox')
+
+    def get_changes(self, user, **params):
+        self.client.force_login(user)
+        return self.client.get('/tasks/api/changes/', params)
+
+    def test_changes_are_logged_with_their_diff(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.status = 'completed'
+        task.save()
+        task.priority = 'high'
+        task.save()
+        task.save()  # Nothing changed: no event
+        TaskComment.objects.create(task=task, author=self.manager, content='Done')
+        task_id = task.pk
+        task.delete()
+
+        events = list(TaskEvent.objects.all())
+        self.assertEqual(
+            [event.type for event in events],
+            [TaskEvent.CREATED, TaskEvent.STATUS, TaskEvent.UPDATED, TaskEvent.COMMENTED, TaskEvent.DELETED],
+        )
+        self.assertEqual({event.task_id for event in events}, {task_id})
+        self.assertEqual(events[0].changes['title'], 'Tracked')
+        self.assertNotIn('updated_at', events[0].changes)
+        self.assertEqual(set(events[1].changes), {'status', 'completed_at', 'is_overdue'})
+        self.assertEqual(events[2].changes, {'priority': 'high'})
+        self.assertEqual(events[3].changes['author_id'], self.manager.pk)
+
+        # A change that rolls back leaves no event
+        task = Task.objects.create(
+            title='Rolled back', description='Outbox', department=self.department,
+            created_by=self.manager, due_date=timezone.now() + timedelta(days=3),
+        )
+        count = TaskEvent.objects.count()
+        with self.assertRaises(ValueError), transaction.atomic():
+            task.status = 'in_progress'
+            task.save()
+            raise ValueError
+        self.assertEqual(TaskEvent.objects.count(), count)
+
+    def test_set_based_writes_are_logged(self):
+        apply_bulk_action(self.manager, [self.task.pk], 'set_status', 'completed')
+        event = TaskEvent.objects.last()
+        self.assertEqual(event.type, TaskEvent.STATUS)
+        self.assertEqual(event.changes['status'], 'completed')
+        self.assertIsNotNone(event.changes['completed_at'])
+
+        Task.objects.filter(pk=self.task.pk).update(completed_at=timezone.now() - timedelta(days=100))
+        call_command('archive_tasks', '--days', '90', stdout=StringIO())
+        self.assertEqual(TaskEvent.objects.last().type, TaskEvent.ARCHIVED)
+        self.assertFalse(TaskEvent.objects.filter(type=TaskEvent.DELETED).exists())
+
+    def test_feed_is_scoped_and_resumable(self):
+        moved = Task.objects.get(pk=self.task.pk)
+        moved.department = self.other_department
+        moved.save()
+        Task.objects.create(
+            title='Assigned', description='Outbox', department=self.department,
+            created_by=self.manager, assigned_to=self.employee, due_date=timezone.now() + timedelta(days=3),
+        )
+
+        data = self.get_changes(self.manager, limit=2).json()
+        self.assertEqual([row['type'] for row in data['results']], [TaskEvent.CREATED, TaskEvent.UPDATED])
+        self.assertEqual(data['results'][1]['changes'], {'department_id': self.other_department.pk})
+        self.assertTrue(data['has_more'])
+        data = self.get_changes(self.manager, since=data['since']).json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.get_changes(self.manager, since=data['since']).json()['results'], [])
+
+        # The task's new department sees it arrive, but not its history
+        data = self.get_changes(self.other_manager).json()
+        self.assertEqual([row['type'] for row in data['results']], [TaskEvent.UPDATED])
+        data = self.get_changes(self.employee).json()
+        self.assertEqual([row['changes']['title'] for row in data['results']], ['Assigned'])
+        self.assertEqual(len(self.get_changes(self.admin).json()['results']), 3)
+
+        # Where ids are not in commit order (neither SQLite nor PostgreSQL), the newest events wait
+        with mock.patch.object(connection, 'vendor', 'mysql'), mock.patch('tasks.models.CHANGES_FEED_DELAY', 60):
+            self.assertEqual(self.get_changes(self.admin).json()['results'], [])
+
+    def test_positions(self):
+        self.assertEqual(parse_position('42'), (None, 42))
+        self.assertEqual(parse_position('981.42'), (981, 42))
+        self.assertEqual(format_position((None, 42)), 42)
+        self.assertEqual(format_position((981, 42)), '981.42')
+        self.assertEqual(self.get_changes(self.admin, since='x').status_code, 400)
+
+    def test_prune(self):
+        for i in range(4):
+            self.task.priority = ('low', 'high')[i % 2]
+            self.task.save()
+        first, *_, last = TaskEvent.objects.values_list('pk', flat=True)
+        TaskEvent.objects.filter(pk__lt=last).update(created_at=timezone.now() - timedelta(days=60))
+        out = StringIO()
+        call_command('prune_task_events', '--days', '30', '--batch-size', '2', stdout=out)
+        self.assertIn('4 event(s) deleted', out.getvalue())
+        self.assertEqual(list(TaskEvent.objects.values_list('pk', flat=True)), [last])
+
+        # A consumer whose cursor is older than what is kept has to re-read the tasks
+        self.assertEqual(self.get_changes(self.admin, since=first).status_code, 410)
+        self.assertEqual(len(self.get_changes(self.admin, since=last - 1).json()['results']), 1)
+        self.assertEqual(self.get_changes(self.admin, since='x').status_code, 400)
+
+
+class FailingNotificationBackend:
+    def send(self, digests):
+        return digests
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class TaskNotificationTest(TaskTestCase):
+    def setUp(self):
+        patcher = mock.patch('tasks.models.SEND_NOTIFICATIONS', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+        User.objects.filter(pk=self.manager.pk).update(email='manager@example.com')
+        self.employee = self.create_user('employee', email='employee@example.com')
+        self.task = self.create_task('Notify', description='Queue', assigned_to=self.employee)
+
+    def queued(self):
+        return list(TaskNotification.objects.values_list('recipient__username', 'kind', 'status'))
+
+    def test_changes_are_queued_not_sent(self):
+        self.assertEqual(self.queued(), [('employee', TaskNotification.ASSIGNED, '')])
+        self.client.force_login(self.employee)
+        self.client.post(f'/tasks/{self.task.pk}/status/', {'status': 'in_progress'})
+        self.assertEqual(self.queued()[1:], [
+            ('manager', TaskNotification.STATUS, 'in_progress'),
+            ('employee', TaskNotification.STATUS, 'in_progress'),
+        ])
+        self.assertEqual(mail.outbox, [])
+
+        # A change that rolls back notifies nobody
+        count = TaskNotification.objects.count()
+        with self.assertRaises(ValueError), transaction.atomic():
+            apply_bulk_action(self.manager, [self.task.pk], 'set_status', 'completed')
+            raise ValueError
+        self.assertEqual(TaskNotification.objects.count(), count)
+
+        with mock.patch('tasks.models.SEND_NOTIFICATIONS', False):
+            Task.objects.create(
+                title='Quiet', description='Queue', department=self.department, created_by=self.manager,
+                assigned_to=self.employee, due_date=timezone.now() + timedelta(days=3),
+            )
+        self.assertEqual(TaskNotification.objects.count(), count)
+
+    def test_saving_the_same_assignee_is_not_an_assignment(self):
+        self.task.title = 'Renamed'
+        self.task.save(update_fields=['title', 'assigned_to'])
+        self.assertEqual(self.queued(), [('employee', TaskNotification.ASSIGNED, '')])
+
+        self.task.assigned_to = self.create_user('colleague')
+        self.task.save(update_fields=['assigned_to'])
+        self.assertEqual(self.queued()[1:], [('colleague', TaskNotification.ASSIGNED, '')])
+
+    def test_worker_sends_one_digest_per_recipient(self):
+        other = Task.objects.create(
+            title='Second', description='Queue', department=self.department, created_by=self.manager,
+            assigned_to=self.employee, due_date=timezone.now() + timedelta(days=3),
+        )
+        apply_bulk_action(self.manager, [self.task.pk, other.pk], 'set_status', 'in_progress')
+        apply_bulk_action(self.manager, [self.task.pk], 'set_status', 'completed')
+        # Nobody to send to: dropped
+        User.objects.filter(pk=self.manager.pk).update(email='')
+
+        out = StringIO()
+        call_command('send_task_notifications', stdout=out)
+        self.assertIn('8 notification(s) sent, 0 failed, in 1 batch(es)', out.getvalue())
+        self.assertFalse(TaskNotification.objects.exists())
+        [message] = mail.outbox
+        self.assertEqual(message.to, ['employee@example.com'])
+        self.assertEqual(message.subject, '2 task updates')
+        self.assertIn('Notify: assigned to you, now Completed', message.body)
+        self.assertIn(f'Second: assigned to you, now In Progress\n  /tasks/{other.pk}/', message.body)
+
+    def test_failed_deliveries_are_retried_then_given_up(self):
+        backend = FailingNotificationBackend()
+        for attempt in range(1, 6):
+            self.assertEqual(send_batch(10, backend), (0, 1))
+            self.assertEqual(TaskNotification.objects.get().attempts, attempt)
+        self.assertEqual(send_batch(10, backend), (0, 0))
+
+        TaskNotification.objects.update(attempts=0)
+        self.assertEqual(send_batch(10), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+# Jobs run by JobQueueTest
+job_calls = []
+
+
+@job(queue='test')
+def record_job(value):
+    job_calls.append(value)
+
+
+@job(queue='test', max_attempts=2)
+def failing_job():
+    raise RuntimeError('Boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        job_calls.clear()
+
+    def test_enqueued_jobs_run_when_due(self):
+        record_job.enqueue({'value': 1})
+        later = enqueue(record_job, {'value': 2}, delay=60)
+        self.assertEqual((later.queue, later.status), ('test', Job.QUEUED))
+        with self.assertRaises(ValueError):
+            enqueue(len)
+
+        out = StringIO()
+        call_command('run_workers', '--burst', '--queues', 'test', stdout=out)
+        self.assertIn('1 job(s) run', out.getvalue())
+        self.assertEqual(job_calls, [1])
+        # Finished jobs are deleted
+        self.assertEqual(list(Job.objects.all()), [later])
+
+    def test_failures_are_retried_with_backoff(self):
+        job_id = failing_job.enqueue().pk
+        worker = Worker(['test'])
+        with self.assertLogs('tasks.jobs', 'ERROR'):
+            self.assertTrue(worker.run_once())
+        failed = Job.objects.get(pk=job_id)
+        self.assertEqual((failed.status, failed.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError: Boom', failed.last_error)
+        self.assertAlmostEqual((failed.run_at - timezone.now()).total_seconds(), 10, delta=2)
+        self.assertFalse(worker.run_once())
+
+        Job.objects.filter(pk=job_id).update(run_at=timezone.now())
+        with self.assertLogs('tasks.jobs', 'ERROR'):
+            self.assertTrue(worker.run_once())
+        self.assertEqual(Job.objects.get(pk=job_id).status, Job.FAILED)
+
+        unknown = Job.objects.create(name='tasks.tests.missing_job', queue='test')
+        self.assertTrue(worker.run_once())
+        unknown.refresh_from_db()
+        self.assertEqual((unknown.status, unknown.last_error), (Job.FAILED, "Unknown job 'tasks.tests.missing_job'"))
+
+    def test_expired_leases_are_claimed_again(self):
+        job_id = record_job.enqueue({'value': 1}).pk
+        lost = claim('worker-a')
+        self.assertEqual((lost.pk, lost.status), (job_id, Job.RUNNING))
+        self.assertIsNone(claim('worker-b'))
+
+        Job.objects.filter(pk=job_id).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(requeue_expired(), 1)
+        taken = claim('worker-b')
+        self.assertEqual((taken.pk, taken.attempts), (job_id, 2))
+        # The first worker turning up late does not undo the second's claim
+        self.assertFalse(finish(lost))
+        self.assertTrue(finish(taken))
+        self.assertFalse(Job.objects.exists())
+
+    def test_queue_concurrency_limit(self):
+        first = record_job.enqueue({'value': 1})
+        second = record_job.enqueue({'value': 2})
+        other = enqueue(record_job, {'value': 3}, queue='other')
+        with mock.patch('tasks.jobs.JOB_QUEUES', {'test': {'concurrency': 1}}):
+            self.assertEqual(claim('worker-a', ['test']).pk, first.pk)
+            self.assertIsNone(claim('worker-b', ['test']))
+            self.assertEqual(claim('worker-b').pk, other.pk)
+            finish(Job.objects.get(pk=first.pk))
+            self.assertEqual(claim('worker-b', ['test']).pk, second.pk)
+
+
+@override_settings(ROOT_URLCONF='tasks.tests')
+class OverdueSweepTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tasks = [self.create_task(f'Task {i}', description='Sweep') for i in range(5)]
+        # Three fall due without a save
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks[:3]]).update(
+            due_date=timezone.now() - timedelta(hours=1)
+        )
+
+    def flagged(self):
+        return set(Task.objects.filter(is_overdue=True).values_list('pk', flat=True))
+
+    def test_sweep_flags_due_tasks_once(self):
+        self.assertEqual(self.flagged(), set())
+        out = StringIO()
+        call_command('sweep_overdue_tasks', '--batch-size', '2', stdout=out)
+        self.assertIn('3 task(s) flagged overdue in 2 batch(es)', out.getvalue())
+        self.assertEqual(self.flagged(), {task.pk for task in self.tasks[:3]})
+        self.assertEqual(TaskEvent.objects.filter(changes={'is_overdue': True}).count(), 3)
+
+        out = StringIO()
+        call_command('sweep_overdue_tasks', stdout=out)
+        self.assertIn('0 task(s) flagged overdue', out.getvalue())
+
+    def test_writes_keep_the_flag(self):
+        task = Task.objects.get(pk=self.tasks[3].pk)
+        task.due_date = timezone.now() - timedelta(hours=1)
+        task.save()
+        self.assertEqual(self.flagged(), {task.pk})
+
+        apply_bulk_action(self.manager, [task.pk, self.tasks[0].pk], 'set_status', 'completed')
+        self.assertEqual(self.flagged(), set())
+        # Reopened past its due date: overdue straight away
+        apply_bulk_action(self.manager, [task.pk], 'set_status', 'pending')
+        self.assertEqual(self.flagged(), {task.pk})
+
+    def test_overdue_only_filter(self):
+        call_command('sweep_overdue_tasks', stdout=StringIO())
+        self.client.force_login(self.manager)
+        response = self.client.get('/tasks/', {'overdue': '1'})
+        self.assertEqual(
+            {task.pk for task in response.context['tasks']}, {task.pk for task in self.tasks[:3]}
+        )
+        data = self.client.get('/tasks/api/', {'overdue': '1', 'fields': 'id,is_overdue'}).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertTrue(all(row['is_overdue'] for row in data['results']))
+
+    def test_reports_only_the_tasks_it_flipped(self):
+        due = [task.pk for task in self.tasks[:3]]
+        before = dict(Task.objects.filter(pk__in=due).values_list('pk', 'updated_at'))
+        real_get_due_tasks = get_due_tasks
+
+        def completing_one(now):
+            # The first task is completed between the sweep's SELECT and its UPDATE
+            if completing_one.calls:
+                Task.objects.filter(pk=due[0]).update(status='completed')
+            completing_one.calls += 1
+            return real_get_due_tasks(now)
+        completing_one.calls = 0
+
+        with mock.patch('tasks.overdue.get_due_tasks', completing_one):
+            self.assertEqual(sweep_batch(timezone.now(), 10), 2)
+        self.assertEqual(self.flagged(), set(due[1:]))
+        self.assertEqual(
+            sorted(TaskEvent.objects.filter(changes={'is_overdue': True}).values_list('task_id', flat=True)), due[1:]
+        )
+        # The change poller behind the live pages sees the flip
+        for pk, updated_at in Task.objects.filter(pk__in=due[1:]).values_list('pk', 'updated_at'):
+            self.assertGreater(updated_at, before[pk])
+
+
+class ReminderSchedulerTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_user('employee', email='employee@example.com')
+        now = timezone.now()
+
+        def create(title, hours, **fields):
+            return self.create_task(title, description='Remind', due_date=now + timedelta(hours=hours), **fields)
+
+        self.soon = create('Soon', 23.5, assigned_to=self.employee)
+        self.later = create('Later', 30)
+        self.done = create('Done', 23, status='completed')
+        self.past = create('Past', 1)
+        # Fell due without a save (and unswept), so still open and unflagged
+        Task.objects.filter(pk=self.past.pk).update(due_date=now - timedelta(hours=1))
+
+    def scheduler(self):
+        return ReminderScheduler(hours=[24], lookahead=60)
+
+    def test_fires_once_per_task_and_due_date(self):
+        scheduler = self.scheduler()
+        self.assertEqual(scheduler.tick(), 1)
+        self.assertEqual(list(TaskReminder.objects.values_list('task_id', 'hours')), [(self.soon.pk, 24)])
+        self.assertEqual(Job.objects.filter(name='tasks.reminders.send_reminder').count(), 1)
+        # Only the window is held: the 30-hour task fires in 6 hours
+        self.assertEqual(scheduler.heap, [])
+        self.assertEqual(scheduler.tick(), 0)
+        # Nor does a restarted (or second) scheduler fire it again
+        self.assertEqual(self.scheduler().tick(), 0)
+        self.assertEqual(TaskReminder.objects.count(), 1)
+
+    def test_follows_task_changes(self):
+        scheduler = self.scheduler()
+        scheduler.tick()
+        self.later.due_date = timezone.now() + timedelta(hours=24, minutes=30)
+        self.later.save()
+        self.assertEqual(scheduler.tick(), 0)
+        self.assertEqual(len(scheduler.heap), 1)
+
+        # Completed before its reminder: the queued entry is dropped
+        self.later.status = 'completed'
+        self.later.save()
+        self.assertEqual(scheduler.tick(timezone.now() + timedelta(minutes=45)), 0)
+        self.assertEqual(scheduler.heap, [])
+
+        # Reopened with a new due date: reminded again, for that date
+        self.soon.due_date += timedelta(minutes=10)
+        self.soon.save()
+        self.assertEqual(scheduler.tick(), 1)
+        self.assertEqual(TaskReminder.objects.filter(task=self.soon).count(), 2)
+
+    def test_window_moves_on(self):
+        scheduler = self.scheduler()
+        scheduler.tick()
+        self.assertEqual(scheduler.tick(timezone.now() + timedelta(hours=5, minutes=30)), 0)
+        self.assertEqual([entry[1] for entry in scheduler.heap], [self.later.pk])
+        self.assertEqual(scheduler.tick(timezone.now() + timedelta(hours=6, minutes=1)), 1)
+        self.assertEqual(scheduler.due_dates, {})
+
+    @mock.patch('tasks.reminders.SEND_NOTIFICATIONS', True)
+    def test_job_queues_one_notification(self):
+        call_command('schedule_task_reminders', '--once', '--hours', '24', stdout=StringIO())
+        Worker().run(burst=True)
+        notification = TaskNotification.objects.get()
+        self.assertEqual(
+            (notification.recipient, notification.task_id, notification.kind),
+            (self.employee, self.soon.pk, TaskNotification.REMINDER),
+        )
+        self.assertIsNotNone(TaskReminder.objects.get().sent_at)
+        # A job run again (after a lost lease) sends nothing more
+        enqueue(registry['tasks.reminders.send_reminder'], {'reminder_id': TaskReminder.objects.get().pk})
+        Worker().run(burst=True)
+        self.assertEqual(TaskNotification.objects.count(), 1)
+
+        self.assertEqual(send_batch(10), (1, 0))
+        [message] = mail.outbox
+        self.assertIn('Soon: due ', message.body)
+
+    def test_job_notifies_nobody_with_notifications_off(self):
+        call_command('schedule_task_reminders', '--once', '--hours', '24', stdout=StringIO())
+        Worker().run(burst=True)
+        self.assertIsNotNone(TaskReminder.objects.get().sent_at)
+        self.assertFalse(TaskNotification.objects.exists())
+
+
+class QueryInstrumentationTest(TaskTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(6):
+            self.create_task(f'Task {i}', description='Queries')
+        self.request = RequestFactory().get('/tasks/')
+
+    def n_plus_one(self, request):
+        # The creator loaded once per task
+        return HttpResponse(', '.join(task.created_by.username for task in Task.objects.all()))
+
+    def logging_only(self):
+        # TaskTestRunner makes N+1s raise; these tests look at what is logged instead
+        return self.settings(TASK_MANAGEMENT_TASKS={**settings.TASK_MANAGEMENT_TASKS, 'RAISE_ON_N_PLUS_ONE': False})
+
+    def test_fingerprint_folds_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = 'y' LIMIT 21"),
+        )
+
+    def test_n_plus_one_raises_under_tests(self):
+        middleware = QueryInstrumentationMiddleware(self.n_plus_one)
+        with self.assertRaisesMessage(RepeatedQueriesError, 'ran this query 6 times'):
+            middleware(self.request)
+
+    @mock.patch('tasks.middleware.QUERY_BUDGET', 5)
+    def test_logs_n_plus_one_and_budget(self):
+        middleware = QueryInstrumentationMiddleware(self.n_plus_one)
+        with self.logging_only(), self.assertLogs('tasks.middleware', 'WARNING') as logs:
+            response = middleware(self.request)
+        self.assertIn('ran a query 6 times', logs.output[0])
+        self.assertIn('ran 7 queries', logs.output[1])
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="7 queries"$')
+
+    def test_async_stack(self):
+        async def view(request):
+            return await sync_to_async(self.n_plus_one)(request)
+
+        middleware = QueryInstrumentationMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        with self.logging_only(), self.assertLogs('tasks.middleware', 'WARNING'):
+            response = async_to_sync(middleware)(self.request)
+        self.assertIn('desc="7 queries"', response['Server-Timing'])
+
+    @override_settings(ROOT_URLCONF='tasks.tests')
+    def test_task_list_within_budget(self):
+        self.client.force_login(self.manager)
+        with self.assertNoLogs('tasks.middleware', 'WARNING'):
+            response = self.client.get('/tasks/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response['Server-Timing'])
@@ -1,11 +1,20 @@
 from django.urls import path
-from . import views
+from . import api, views
+from .settings import ASYNC_VIEWS
 
 urlpatterns = [
-    path('', views.task_list, name='task-list'),
+    path('', views.task_list_async if ASYNC_VIEWS else views.task_list, name='task-list'),
     path('my-tasks/', views.my_tasks, name='my-tasks'),
+    path('export/', views.task_export, name='task-export'),
+    path('bulk/', views.task_bulk_update, name='task-bulk-update'),
+    path('users/', views.user_search, name='task-user-search'),
+    path('events/', views.task_events, name='task-events'),
+    path('api/', api.task_list, name='task-api-list'),
+    path('api/<int:pk>/', api.task_detail, name='task-api-detail'),
+    path('api/changes/', api.task_changes, name='task-api-changes'),
     path('create/', views.task_create, name='task-create'),
-    path('<int:pk>/', views.task_detail, name='task-detail'),
+    path('<int:pk>/', views.task_detail_async if ASYNC_VIEWS else views.task_detail, name='task-detail'),
+    path('<int:pk>/comments/', views.task_comments, name='task-comments'),
     path('<int:pk>/update/', views.task_update, name='task-update'),
     path('<int:pk>/delete/', views.task_delete, name='task-delete'),
     path('<int:pk>/status/', views.task_update_status, name='task-update-status'),
@@ -1,25 +1,95 @@
+import asyncio
+from collections import Counter
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils import timezone
-from .models import Task, TaskComment
-from .forms import TaskForm, TaskStatusForm, TaskCommentForm
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+from .models import Task, TaskArchive, TaskComment
+from .forms import TaskForm, TaskStatusForm, TaskCommentForm, TaskBulkActionForm
+from .bulk import BulkActionError, apply_bulk_action
+from .archive import get_task_or_archived
+from .concurrency import async_login_required, gather_queries, release_connections
+from .conditional import page_validators, task_detail_validators, task_set_validators
+from .choices import SEARCH_KINDS, ASSIGNEES, get_user_search_results, lookup_user
+from .pagination import paginate_by_cursor, cursor_url
+from .search import SimpleSearchBackend, search_tasks
+from .settings import (
+    CACHE_ALIAS,
+    COMMENT_PAGE_SIZE,
+    EVENT_STREAM_HEARTBEAT,
+    EVENT_STREAM_MAX_AGE,
+    FRAGMENT_CACHE_TIMEOUT,
+    LIVE_UPDATES,
+    TASK_LIST_PAGE_SIZE,
+)
+from . import cache as task_cache, events
+from .export import EXPORT_FORMATS, export_response
 from accounts.models import User
 
 
-@login_required
-def task_list(request):
-    """List tasks based on user role"""
-    user = request.user
-    
-    if user.is_admin:
-        tasks = Task.objects.select_related('assigned_to', 'department', 'created_by').all()
-    elif user.is_manager:
-        tasks = Task.objects.filter(department=user.department).select_related('assigned_to', 'created_by')
-    else:
-        tasks = Task.objects.filter(assigned_to=user).select_related('department', 'created_by')
+def wants_json(request):
+    return 'application/json' in request.headers.get('Accept', '')
+
+
+def get_page_links(request, page):
+    """Previous/next URLs for a cursor page, preserving the current filters"""
+    return {
+        'next_page_url': cursor_url(request, page.next_cursor) if page.has_next else None,
+        'previous_page_url': cursor_url(request, page.previous_cursor) if page.has_previous else None,
+    }
+
+
+def get_table_cache_context(request, tasks, editable_task_ids=frozenset()):
+    """
+    Fragment cache keys for task_list.html: one per row and one for the whole table.
+
+    Each row's key (set as task.row_cache_key) covers everything its HTML
+    depends on besides the task itself: whether the viewer may edit it and
+    sees the assignee column, whether it is overdue, user and department
+    names (the choice cache version, bumped when they change) and the time
+    zone its dates are shown in. The table's key digests the row keys, so it
+    changes whenever any row does or the page holds different tasks.
+    """
+    permissions = request.user.permissions
+    shared = (
+        int(permissions.can_assign_tasks),
+        task_cache.get_version(task_cache.CHOICES_NAMESPACE, task_cache.GLOBAL_SCOPE),
+        timezone.get_current_timezone_name(),
+    )
+    row_keys = []
+    for task in tasks:
+        task.row_cache_key = task_cache.task_row_key(
+            task, int(task.pk in editable_task_ids), int(task.is_overdue), *shared
+        )
+        row_keys.append(task.row_cache_key)
+    return {
+        'fragment_cache_alias': CACHE_ALIAS,
+        'fragment_cache_timeout': FRAGMENT_CACHE_TIMEOUT,
+        'table_cache_key': task_cache.digest(*shared, *row_keys),
+    }
+
+
+def get_live_context():
+    """Template context for live task lists: whether to open the stream, and labels to patch rows with"""
+    return {
+        'live_updates': LIVE_UPDATES,
+        'live_labels': {'status': dict(Task.STATUS_CHOICES), 'priority': dict(Task.PRIORITY_CHOICES)},
+    }
+
+
+def apply_list_filters(request, tasks):
+    """Narrow tasks (Task or TaskArchive rows) to the status/priority/overdue/assignee filters in the query string"""
+    permissions = request.user.permissions
     
     # Filter by status
     status = request.GET.get('status')
@@ -31,74 +101,371 @@ def task_list(request):
     if priority:
         tasks = tasks.filter(priority=priority)
     
-    # Filter by assigned user (for managers and admins)
-    assigned_to = request.GET.get('assigned_to')
-    if assigned_to and (user.is_admin or user.is_manager):
-        tasks = tasks.filter(assigned_to_id=assigned_to)
+    # Overdue only: archived tasks are all completed, so never overdue
+    if request.GET.get('overdue') == '1':
+        tasks = tasks.filter(is_overdue=True) if tasks.model is Task else tasks.none()
+    
+    # Filter by assigned user (for managers and admins), named by username, employee ID or id
+    assigned_to = request.GET.get('assigned_to', '').strip()
+    if assigned_to and permissions.can_assign_tasks:
+        assignee = lookup_user(permissions.managed_users, assigned_to)
+        tasks = tasks.filter(assigned_to_id=assignee.pk) if assignee else tasks.none()
+    
+    return tasks
+
+
+def filter_tasks(request):
+    """
+    Tasks visible to the user that match the list filters in the query string.
+
+    Returns (queryset, ordering_field); search results are ordered by rank.
+    """
+    tasks = apply_list_filters(request, Task.get_user_tasks(request.user))
     
     # Search
+    ordering_field = 'created_at'
     search = request.GET.get('search')
     if search:
-        tasks = tasks.filter(
-            Q(title__icontains=search) | Q(description__icontains=search)
-        )
+        tasks, ordering_field = search_tasks(tasks, search)
+    
+    return tasks, ordering_field
+
+
+def task_list_validators(request):
+    # Search ranks and the archive merge are not cheap to validate; render those
+    if request.GET.get('search') or request.GET.get('include_archived'):
+        return None
+    tasks = apply_list_filters(request, Task.get_user_tasks(request.user))
+    return task_set_validators(tasks, 'list', request.GET.urlencode())
+
+
+def my_tasks_validators(request):
+    tasks = Task.objects.filter(assigned_to_id=request.user.pk)
+    return task_set_validators(tasks, 'my-tasks', request.GET.urlencode())
+
+
+def get_task_list_context(request):
+    permissions = request.user.permissions
+    tasks, ordering_field = filter_tasks(request)
+    tasks = tasks.select_related('assigned_to', 'department', 'created_by')
+    
+    # Admins can opt in to listing archived tasks alongside live ones, newest first
+    include_archived = permissions.is_admin and request.GET.get('include_archived') == '1'
+    if include_archived:
+        archived = apply_list_filters(request, TaskArchive.objects.all())
+        search = request.GET.get('search')
+        if search:
+            archived = SimpleSearchBackend().search(archived, search)
+        archived = archived.select_related('assigned_to', 'department', 'created_by')
+        # Search ranks are not comparable across the two tables, so merge on creation date
+        ordering_field = 'created_at'
+        tasks = [tasks, archived]
+    
+    page = paginate_by_cursor(tasks, request.GET.get('cursor'), TASK_LIST_PAGE_SIZE, field=ordering_field)
     
     context = {
-        'tasks': tasks,
+        'tasks': page.object_list,
         'status_choices': Task.STATUS_CHOICES,
         'priority_choices': Task.PRIORITY_CHOICES,
+        'include_archived': include_archived,
+        'editable_task_ids': {
+            task.pk for task in page.object_list
+            if not task.is_archived and permissions.can_edit_task(task)
+        },
     }
+    context.update(get_page_links(request, page))
+    context.update(get_table_cache_context(request, page.object_list, context['editable_task_ids']))
+    context.update(get_live_context())
+    return context
+
+
+@login_required
+@page_validators(task_list_validators)
+def task_list(request):
+    """List tasks based on user role"""
+    return render(request, 'tasks/task_list.html', get_task_list_context(request))
+
+
+@async_login_required
+@page_validators(task_list_validators)
+async def task_list_async(request):
+    """
+    task_list for ASGI deployments.
+
+    A list page is one query (two when merging in the archive), so there is
+    little to overlap; the queries and the render just run off the event loop.
+    """
+    def respond():
+        return render(request, 'tasks/task_list.html', get_task_list_context(request))
+    return await sync_to_async(respond)()
+
+
+@login_required
+def user_search(request):
+    """Prefix search over the users the current user can assign tasks to, for the autocomplete widgets"""
+    if not request.user.permissions.can_assign_tasks:
+        raise PermissionDenied
+    kind = request.GET.get('kind', ASSIGNEES)
+    if kind not in SEARCH_KINDS:
+        kind = ASSIGNEES
+    return JsonResponse(get_user_search_results(request.user, request.GET.get('q', ''), kind))
+
+
+@async_login_required
+async def task_events(request):
+    """
+    Server-sent events: the task changes the user can see, as they commit (see tasks.events).
+
+    Meant for ASGI. Streams end after EVENT_STREAM_MAX_AGE seconds and
+    browsers reconnect, resuming from Last-Event-ID, so a stream whose
+    client went away is never held for long. Under WSGI, or with
+    LIVE_UPDATES off, it answers 204, which stops browsers reconnecting.
+    """
+    if not LIVE_UPDATES or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    permissions = request.user.permissions
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    # The user is loaded; an open stream needs no database connection
+    await sync_to_async(release_connections)()
+
+    async def stream():
+        subscription = events.broker.subscribe(permissions, last_event_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + EVENT_STREAM_MAX_AGE
+        try:
+            yield f'retry: {events.RETRY_MS}\n\n'
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), min(EVENT_STREAM_HEARTBEAT, remaining))
+                except asyncio.TimeoutError:
+                    if loop.time() < deadline:
+                        yield ': keep-alive\n\n'
+                    continue
+                yield events.format_event(event)
+        finally:
+            events.broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def task_export(request):
+    """Stream the filtered task list (or, with scope=mine, the My Tasks list) as CSV or NDJSON"""
+    if request.GET.get('scope') == 'mine':
+        tasks = Task.objects.filter(assigned_to_id=request.user.pk)
+    else:
+        tasks, _ = filter_tasks(request)
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'csv'
+    return export_response(tasks, export_format)
+
+
+@login_required
+@require_POST
+def task_bulk_update(request):
+    """Apply a status, priority or assignee change to many tasks at once"""
+    form = TaskBulkActionForm(request.POST, user=request.user)
     
-    if user.can_assign_tasks():
-        context['assignable_users'] = user.get_managed_users()
+    outcomes = None
+    error = None
+    if form.is_valid():
+        try:
+            outcomes = apply_bulk_action(
+                request.user,
+                form.cleaned_data['task_ids'],
+                form.cleaned_data['operation'],
+                form.get_value(),
+            )
+        except BulkActionError as e:
+            error = str(e)
+    else:
+        error = ' '.join(message for messages_ in form.errors.values() for message in messages_)
     
-    return render(request, 'tasks/task_list.html', context)
+    if wants_json(request):
+        if error:
+            return JsonResponse({'error': error}, status=400)
+        return JsonResponse({
+            'results': {str(task_id): outcome for task_id, outcome in outcomes.items()},
+            'counts': Counter(outcomes.values()),
+        })
+    
+    if error:
+        messages.error(request, error)
+    else:
+        counts = Counter(outcomes.values())
+        messages.success(request, ', '.join(
+            f'{count} {outcome.replace("_", " ")}' for outcome, count in sorted(counts.items())
+        ))
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('task-list')
+
+
+def check_task_visible(user, task):
+    """Raise PermissionDenied unless user may view task (live or archived)"""
+    if not user.permissions.can_view_task(task):
+        raise PermissionDenied
+
+
+def get_comment_page(task, cursor=None):
+    """A page of the task's comments, newest first, and the URL of the next (older) page"""
+    page = paginate_by_cursor(task.comments.select_related('author'), cursor, page_size=COMMENT_PAGE_SIZE)
+    next_url = None
+    if page.has_next:
+        next_url = f"{reverse('task-comments', kwargs={'pk': task.pk})}?cursor={page.next_cursor}"
+    return page.object_list, next_url
+
+
+def get_task_detail_context(task, comments, comments_next_url, comment_count):
+    return {
+        'task': task,
+        'comments': comments,
+        'comments_next_url': comments_next_url,
+        'comment_count': comment_count,
+    }
+
+
+def render_task_detail(request, context):
+    """Render task_detail for a GET, given the context from get_task_detail_context"""
+    task = context['task']
+    if task.is_archived:
+        context.update({'can_edit': False, 'can_update_status': False})
+    else:
+        permissions = request.user.permissions
+        context.update({
+            'comment_form': TaskCommentForm(),
+            'can_edit': permissions.can_edit_task(task),
+            'can_update_status': permissions.can_update_status(task),
+        })
+    return render(request, 'tasks/task_detail.html', context)
 
 
 @login_required
+@page_validators(task_detail_validators)
 def task_detail(request, pk):
-    """View task details"""
-    task = get_object_or_404(Task, pk=pk)
+    """View task details; archived tasks are shown read-only"""
+    task = get_task_or_archived(pk)
     user = request.user
     
     # Check permissions
-    if not user.is_admin:
-        if user.is_manager and task.department != user.department:
-            raise PermissionDenied
-        elif user.is_employee and task.assigned_to != user:
-            raise PermissionDenied
+    check_task_visible(user, task)
     
-    comments = task.comments.select_related('author').all()
+    comments, comments_next_url = get_comment_page(task)
+    context = get_task_detail_context(task, comments, comments_next_url, task.comments.count())
     
-    if request.method == 'POST':
-        comment_form = TaskCommentForm(request.POST)
-        if comment_form.is_valid():
-            comment = comment_form.save(commit=False)
-            comment.task = task
-            comment.author = user
-            comment.save()
-            messages.success(request, 'Comment added successfully.')
-            return redirect('task-detail', pk=pk)
-    else:
-        comment_form = TaskCommentForm()
+    if request.method != 'POST':
+        return render_task_detail(request, context)
+    if task.is_archived:
+        raise PermissionDenied
     
-    context = {
-        'task': task,
-        'comments': comments,
+    # Without JavaScript the comment form posts here; task_comments answers the fetch() version
+    comment_form = TaskCommentForm(request.POST)
+    if comment_form.is_valid():
+        comment = comment_form.save(commit=False)
+        comment.task = task
+        comment.author = user
+        comment.save()
+        messages.success(request, 'Comment added successfully.')
+        return redirect('task-detail', pk=pk)
+    
+    context.update({
         'comment_form': comment_form,
-        'can_edit': user.can_assign_tasks() and (user.is_admin or task.created_by == user),
-        'can_update_status': task.assigned_to == user or user.can_assign_tasks(),
-    }
+        'can_edit': user.permissions.can_edit_task(task),
+        'can_update_status': user.permissions.can_update_status(task),
+    })
     
     return render(request, 'tasks/task_detail.html', context)
 
 
+@async_login_required
+@page_validators(task_detail_validators)
+async def task_detail_async(request, pk):
+    """
+    task_detail for ASGI deployments.
+
+    The task, its first page of comments and the comment count are fetched
+    concurrently, assuming the task is live; an archived task's comments are
+    fetched again from the archive. POSTs go to task_detail.
+    """
+    if request.method == 'POST':
+        return await sync_to_async(task_detail)(request, pk)
+    
+    live = Task(pk=pk)
+    task, (comments, comments_next_url), comment_count = await gather_queries(
+        partial(get_task_or_archived, pk),
+        partial(get_comment_page, live),
+        live.comments.count,
+    )
+    await sync_to_async(check_task_visible)(request.user, task)
+    if task.is_archived:
+        (comments, comments_next_url), comment_count = await gather_queries(
+            partial(get_comment_page, task),
+            task.comments.count,
+        )
+    
+    context = get_task_detail_context(task, comments, comments_next_url, comment_count)
+    return await sync_to_async(render_task_detail)(request, context)
+
+
+@login_required
+def task_comments(request, pk):
+    """
+    Older comments for "load older" (GET, with the cursor from the previous page),
+    or add a comment (POST). Both answer with a rendered fragment, or JSON on request.
+    """
+    task = get_task_or_archived(pk)
+    check_task_visible(request.user, task)
+    
+    if request.method == 'POST':
+        if task.is_archived:
+            raise PermissionDenied
+        form = TaskCommentForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        comment = form.save(commit=False)
+        comment.task = task
+        comment.author = request.user
+        comment.save()
+        html = render_to_string('tasks/_comment.html', {'comment': comment}, request)
+        if wants_json(request):
+            return JsonResponse({'id': comment.pk, 'html': html}, status=201)
+        return HttpResponse(html, status=201)
+    
+    comments, next_url = get_comment_page(task, request.GET.get('cursor'))
+    html = render_to_string('tasks/_comment_page.html', {'comments': comments, 'next_url': next_url}, request)
+    if wants_json(request):
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.get_full_name() or comment.author.username,
+                    'content': comment.content,
+                    'created_at': comment.created_at,
+                }
+                for comment in comments
+            ],
+            'html': html,
+            'next_url': next_url,
+        })
+    return HttpResponse(html)
+
+
 @login_required
 def task_create(request):
     """Create a new task"""
     user = request.user
+    permissions = user.permissions
     
-    if not user.can_assign_tasks():
+    if not permissions.can_assign_tasks:
         raise PermissionDenied
     
     if request.method == 'POST':
@@ -108,12 +475,12 @@ def task_create(request):
             task.created_by = user
             
             # Validate department permission
-            if user.is_manager and task.department != user.department:
+            if permissions.is_manager and task.department_id != permissions.department_id:
                 messages.error(request, 'You can only create tasks in your own department.')
                 return render(request, 'tasks/task_form.html', {'form': form})
             
             # Validate assignment permission
-            if task.assigned_to and not user.can_assign_to_user(task.assigned_to):
+            if task.assigned_to and not permissions.can_assign_to(task.assigned_to):
                 messages.error(request, 'You cannot assign tasks to this user.')
                 return render(request, 'tasks/task_form.html', {'form': form})
             
@@ -133,22 +500,16 @@ def task_update(request, pk):
     user = request.user
     
     # Check permissions
-    if not user.can_assign_tasks():
+    if not user.permissions.can_edit_task(task):
         raise PermissionDenied
     
-    if user.is_manager:
-        if task.department != user.department:
-            raise PermissionDenied
-        if task.created_by != user and not user.is_admin:
-            raise PermissionDenied
-    
     if request.method == 'POST':
         form = TaskForm(request.POST, instance=task, user=user)
         if form.is_valid():
             updated_task = form.save(commit=False)
             
             # Validate assignment permission
-            if updated_task.assigned_to and not user.can_assign_to_user(updated_task.assigned_to):
+            if updated_task.assigned_to and not user.permissions.can_assign_to(updated_task.assigned_to):
                 messages.error(request, 'You cannot assign tasks to this user.')
                 return render(request, 'tasks/task_form.html', {'form': form, 'action': 'Update'})
             
@@ -168,15 +529,9 @@ def task_delete(request, pk):
     user = request.user
     
     # Check permissions
-    if not user.can_assign_tasks():
+    if not user.permissions.can_edit_task(task):
         raise PermissionDenied
     
-    if user.is_manager:
-        if task.department != user.department:
-            raise PermissionDenied
-        if task.created_by != user:
-            raise PermissionDenied
-    
     if request.method == 'POST':
         task_title = task.title
         task.delete()
@@ -193,8 +548,7 @@ def task_update_status(request, pk):
     user = request.user
     
     # Check permissions
-    if not (user.is_admin or task.assigned_to == user or 
-            (user.is_manager and task.department == user.department)):
+    if not user.permissions.can_update_status(task):
         raise PermissionDenied
     
     if request.method == 'POST':
@@ -210,14 +564,20 @@ def task_update_status(request, pk):
 
 
 @login_required
+@page_validators(my_tasks_validators)
 def my_tasks(request):
     """View tasks assigned to current user"""
-    tasks = Task.objects.filter(assigned_to=request.user).select_related('department', 'created_by')
+    tasks = Task.objects.filter(assigned_to_id=request.user.pk).select_related('department', 'created_by')
+    page = paginate_by_cursor(tasks, request.GET.get('cursor'), TASK_LIST_PAGE_SIZE)
     
     context = {
-        'tasks': tasks,
+        'tasks': page.object_list,
         'status_choices': Task.STATUS_CHOICES,
-        'page_title': 'My Tasks'
+        'page_title': 'My Tasks',
+        'export_query': 'scope=mine',
     }
+    context.update(get_page_links(request, page))
+    context.update(get_table_cache_context(request, page.object_list))
+    context.update(get_live_context())
     
     return render(request, 'tasks/task_list.html', context)